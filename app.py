@@ -1,26 +1,55 @@
 # Final version for deployment
 # --- IMPORTS ---
-from flask import Flask, render_template, session, redirect, url_for, request, flash, jsonify
+from flask import Flask, render_template, session, redirect, url_for, request, flash, jsonify, Response, send_file, abort
 from utils.auth import admin_required
-from utils.db import get_db_connection
+from utils.db import get_db_connection, open_connection, init_app as init_db
+from utils.scoring import get_live_scores, get_live_scores_for_matches, get_set_scores, log_score_event, void_last_event, restore_last_voided, delete_match_events, get_event_feed, rebuild_match_totals
+from utils.live import LiveHub, stream_messages
+from utils.standings import refresh_standings, refresh_match_standings, rebuild_standings, verify_standings, points_log
+from utils.cache import ResponseCache
+from utils.content import ContentStore
+from utils.changes import ChangeTracker
+from utils.images import queue_derivatives, derivative_files, responsive_image, strip_metadata
+from utils.uploads import store_upload, collect_garbage, UploadTooLarge
+from utils.assets import AssetManifest
+from utils.pagination import fetch_page, page_size, MAX_PAGE_SIZE
+from utils.stories import summarize
+from utils.search import search, MAX_QUERY_LENGTH
+from utils.cricket import cricket_stats, rebuild_cricket_stats
+from utils.brackets import build_bracket, validate_link, advance_winner, BracketConflict, BRACKET_TABLES
+from utils.writer import ScoreWriter
 import datetime
 import os
-from werkzeug.utils import secure_filename
 import json
+import hashlib
+import uuid
+import re
 
 # --- APP SETUP ---
 app = Flask(__name__)
 app.config.from_pyfile('config.py')
 APP_ROOT = os.path.dirname(os.path.abspath(__file__))
 app.config['UPLOAD_FOLDER'] = os.path.join(APP_ROOT, 'static', 'uploads')
+init_db(app)
+live_hub = LiveHub()
+content_store = ContentStore()
+page_cache = ResponseCache(app.config['PAGE_CACHE_SIZE'], app.config['PAGE_CACHE_MAX_AGE'])
+change_tracker = ChangeTracker()
+bracket_trees = ResponseCache(max_entries=64)
+score_writer = ScoreWriter(app.config['SCORE_WRITER_BATCH_WINDOW'], app.config['SCORE_WRITER_MAX_BATCH'])
+assets = AssetManifest(app.static_folder)
+assets.load()
+change_tracker.register(content_store.invalidate)
+change_tracker.register(page_cache.invalidate)
+change_tracker.register(bracket_trees.invalidate)
 
 
 # --- CONFIGURATION & HELPERS ---
 
 SPORT_CONFIG = {
     'default': {'format': 'points'},
-    'Cricket Boys': {'format': 'points'},
-    'Cricket Girls': {'format': 'points'},
+    'Cricket Boys': {'format': 'points', 'overs': 20},
+    'Cricket Girls': {'format': 'points', 'overs': 20},
     'Basketball (B)': {'format': 'points'},
     'Basketball (G)': {'format': 'points'},
     'Volleyball': {'format': 'sets_detailed'},
@@ -62,90 +91,20 @@ SPORT_BUTTON_CONFIG = {
     ],
 }
 
-def get_live_scores(conn, match_id, team_id):
-    """Calculates point-based scores (Cricket, Basketball)."""
-    score = conn.execute('SELECT SUM(points_scored) FROM score_log WHERE match_id = ? AND team_id = ?', (match_id, team_id)).fetchone()[0] or 0
-    wickets = conn.execute("SELECT COUNT(*) FROM score_log WHERE match_id = ? AND team_id = ? AND event_type = 'Wicket'", (match_id, team_id)).fetchone()[0] or 0
-    balls_faced = conn.execute('SELECT SUM(counts_as_ball) FROM score_log WHERE match_id = ? AND team_id = ?', (match_id, team_id)).fetchone()[0] or 0
-    overs = balls_faced // 6
-    balls = balls_faced % 6
-    return {'score': score, 'wickets': wickets, 'overs': overs, 'balls': balls}
-
-def get_set_scores(conn, match_id, class1_id, class2_id):
-    """Calculates set-based scores (Volleyball, Throwball)."""
-    completed_sets = []
-    current_set_scores = {class1_id: 0, class2_id: 0}
-    sets_won = {class1_id: 0, class2_id: 0}
-    events = conn.execute('SELECT * FROM score_log WHERE match_id = ? ORDER BY created_at ASC', (match_id,)).fetchall()
+MAX_BATCH_MATCHES = 50
+MAX_BATCH_EVENTS = 200
+MAX_CLIENT_EVENT_ID_LENGTH = 64
+MAX_SCHEDULE_DAYS = 31
+CONTENT_ADDRESSED_UPLOAD = re.compile(r'uploads/[0-9a-f]{64}[-.]')
 
-    for event in events:
-        if event['event_type'] == 'Set End':
-            completed_sets.append(current_set_scores.copy())
-            if current_set_scores[class1_id] > current_set_scores[class2_id]:
-                sets_won[class1_id] += 1
-            else:
-                sets_won[class2_id] += 1
-            current_set_scores = {class1_id: 0, class2_id: 0}
-        elif event['event_type'] == 'Point':
-            current_set_scores[event['team_id']] += event['points_scored']
-
-    return {'completed_sets': completed_sets, 'current_set_scores': current_set_scores, 'sets_won': sets_won}
-
-
-# --- PUBLIC ROUTES ---
-
-@app.route('/')
-def home():
-    """Renders a dynamic public landing page."""
-    conn = get_db_connection()
-    leaderboard_query = """
-        WITH MatchParticipants AS (
-            SELECT m.id as match_id, m.sport_id, m.winner_id, m.result_details, r.round_type, c.id as class_id, c.name as class_name
-            FROM matches m JOIN rounds r ON m.round_id = r.id JOIN classes c ON m.class1_id = c.id WHERE m.status = 'COMPLETED'
-            UNION ALL
-            SELECT m.id as match_id, m.sport_id, m.winner_id, m.result_details, r.round_type, c.id as class_id, c.name as class_name
-            FROM matches m JOIN rounds r ON m.round_id = r.id JOIN classes c ON m.class2_id = c.id WHERE m.status = 'COMPLETED'
-        ),
-        ClassStats AS (
-            SELECT
-                c.id AS class_id, c.name AS class_name,
-                SUM(CASE WHEN mp.winner_id = c.id THEN 1 ELSE 0 END) AS wins,
-                SUM(CASE
-                    WHEN mp.winner_id = c.id AND mp.round_type = 'FINAL' THEN 5
-                    WHEN mp.winner_id != c.id AND mp.round_type = 'FINAL' THEN 4
-                    WHEN mp.winner_id != c.id AND mp.round_type = 'SEMI_FINAL' THEN 3
-                    WHEN mp.winner_id != c.id AND mp.round_type = 'QUARTER_FINAL' THEN 2
-                    ELSE 0
-                END) AS tournament_points
-            FROM classes c LEFT JOIN MatchParticipants mp ON c.id = mp.class_id GROUP BY c.id, c.name
-        ),
-        ParticipationPoints AS (
-            SELECT class_id, COUNT(DISTINCT sport_id) AS participation_points
-            FROM MatchParticipants WHERE result_details NOT LIKE '%Walkover%' GROUP BY class_id
-        ),
-        WinPoints AS (
-            SELECT winner_id as class_id, COUNT(id) as win_points
-            FROM matches
-            WHERE status = 'COMPLETED' AND result_details IS NOT NULL AND result_details != '' AND result_details NOT LIKE '%Walkover%'
-            GROUP BY winner_id
-        ),
-        AdjustmentPoints AS (
-            SELECT class_id, SUM(points) AS adjustment_points FROM point_adjustments GROUP BY class_id
-        )
-        SELECT
-            cs.class_name,
-            (IFNULL(cs.tournament_points, 0) + IFNULL(pp.participation_points, 0) + IFNULL(ap.adjustment_points, 0) + IFNULL(wp.win_points, 0)) AS total_points
-        FROM ClassStats cs
-        LEFT JOIN ParticipationPoints pp ON cs.class_id = pp.class_id
-        LEFT JOIN AdjustmentPoints ap ON cs.class_id = ap.class_id
-        LEFT JOIN WinPoints wp ON cs.class_id = wp.class_id
-        ORDER BY total_points DESC, cs.wins DESC
-        LIMIT 3;
+def fetch_schedule(conn, start_date, end_date):
     """
-    top_teams = conn.execute(leaderboard_query).fetchall()
-
-    today_str = datetime.date.today().strftime('%Y-%m-%d')
-    todays_matches_query = """
+    Returns the matches scheduled between two dates (inclusive), in time order.
+    match_time is compared as a plain range so the covering schedule index can
+    be used; both 'YYYY-MM-DDTHH:MM' and 'YYYY-MM-DD HH:MM:SS' values sort
+    correctly within their day.
+    """
+    return conn.execute("""
         SELECT
             m.id, m.status, m.result_details, m.match_time, s.name AS sport_name,
             c1.name AS class1_name, c2.name AS class2_name
@@ -153,102 +112,284 @@ def home():
         JOIN sports s ON m.sport_id = s.id
         JOIN classes c1 ON m.class1_id = c1.id
         JOIN classes c2 ON m.class2_id = c2.id
-        WHERE date(m.match_time) = ?
+        WHERE m.match_time >= ? AND m.match_time < ?
         ORDER BY m.match_time ASC
+    """, (start_date.isoformat(), (end_date + datetime.timedelta(days=1)).isoformat())).fetchall()
+
+
+MATCH_LIST_QUERY = """
+    SELECT
+        m.id, m.status, m.result_details, m.match_time,
+        s.name AS sport_name, r.name AS round_name,
+        c1.name AS class1_name, c2.name AS class2_name
+    FROM matches m
+    JOIN sports s ON m.sport_id = s.id
+    LEFT JOIN rounds r ON m.round_id = r.id
+    JOIN classes c1 ON m.class1_id = c1.id
+    JOIN classes c2 ON m.class2_id = c2.id
+"""
+
+def fetch_matches_page(conn, args):
+    """One page of matches, newest first, optionally filtered by sport or class."""
+    conditions = []
+    params = []
+    if args.get('sport_id'):
+        conditions.append("m.sport_id = ?")
+        params.append(args['sport_id'])
+    if args.get('class_id'):
+        conditions.append("(m.class1_id = ? OR m.class2_id = ?)")
+        params.extend([args['class_id'], args['class_id']])
+    return fetch_page(conn, MATCH_LIST_QUERY, conditions, params, ('m.match_time', 'm.id'),
+                      args.get('cursor'), page_size(args.get('limit')))
+
+def fetch_stories_page(conn, args):
+    """One page of stories, newest first. Reads only the list projection, never the story body."""
+    query = 'SELECT id, title, author, image_filename, created_at, excerpt, reading_minutes FROM stories'
+    return fetch_page(conn, query, [], [], ('created_at', 'id'), args.get('cursor'), page_size(args.get('limit')))
+
+def fetch_adjustments_page(conn, args):
+    """One page of the point adjustment log, newest first."""
+    query = """
+        SELECT pa.id, pa.points, pa.reason, pa.created_at, c.name as class_name
+        FROM point_adjustments pa
+        JOIN classes c ON pa.class_id = c.id
+    """
+    return fetch_page(conn, query, [], [], ('pa.created_at', 'pa.id'), args.get('cursor'), page_size(args.get('limit')))
+
+def next_page_urls(endpoint, api_endpoint, next_cursor, **args):
+    """URLs of the next page as HTML and as "load more" JSON, or (None, None) on the last page."""
+    if next_cursor is None:
+        return None, None
+    args = {key: value for key, value in args.items() if value}
+    return url_for(endpoint, cursor=next_cursor, **args), url_for(api_endpoint, cursor=next_cursor, **args)
+
+def page_json(key, rows, partial, next_url, **context):
+    """The "load more" JSON for a listing: the rows, the same rows rendered, and the next URL."""
+    return jsonify({
+        key: [dict(row) for row in rows],
+        'html': render_template(partial, **{key: rows}, **context),
+        'next_url': next_url,
+    })
+
+# Where each kind of search result links to: (endpoint, id argument).
+SEARCH_RESULT_LINKS = {
+    'story': ('view_story', 'story_id'),
+    'match': ('match_details', 'match_id'),
+    'class': ('class_points_log', 'class_id'),
+    'sport': ('view_bracket', 'sport_id'),
+}
+
+def search_site(conn, text, limit=20):
+    """Runs a full-text search and adds the URL of each result."""
+    results = search(conn, text, limit)
+    for result in results:
+        endpoint, id_arg = SEARCH_RESULT_LINKS[result['kind']]
+        result['url'] = url_for(endpoint, **{id_arg: result['ref_id']})
+    return results
+
+def build_score_snapshot(conn, match, team_scores=None):
+    """
+    Builds the live score payload for a match row that includes its sport_name.
+    `team_scores` can carry point-based scores already loaded in bulk, keyed by
+    (match_id, team_id), to avoid a per-match lookup.
+    """
+    config = SPORT_CONFIG.get(match['sport_name'], SPORT_CONFIG['default'])
+    if config['format'] == 'sets_detailed':
+        scores = get_set_scores(conn, match['id'], match['class1_id'], match['class2_id'])
+    elif team_scores is not None:
+        empty = {'score': 0, 'wickets': 0, 'overs': 0, 'balls': 0}
+        scores = {
+            match['class1_id']: team_scores.get((match['id'], match['class1_id']), empty),
+            match['class2_id']: team_scores.get((match['id'], match['class2_id']), empty)
+        }
+    else:
+        scores = {
+            match['class1_id']: get_live_scores(conn, match['id'], match['class1_id']),
+            match['class2_id']: get_live_scores(conn, match['id'], match['class2_id'])
+        }
+    return {
+        'match_id': match['id'], 'sport_name': match['sport_name'], 'status': match['status'], 'format': config['format'],
+        'result_details': match['result_details'], 'scores': scores
+    }
+
+def match_snapshot(conn, match_id):
+    """Returns the live score payload of a match, or None if it doesn't exist."""
+    match = conn.execute("""
+        SELECT m.id, m.status, m.result_details, m.class1_id, m.class2_id, s.name AS sport_name
+        FROM matches m JOIN sports s ON m.sport_id = s.id
+        WHERE m.id = ?
+    """, (match_id,)).fetchone()
+    return build_score_snapshot(conn, match) if match is not None else None
+
+def publish_snapshot(snapshot):
+    """Pushes a score snapshot to everyone watching the match's live stream."""
+    if snapshot is not None:
+        live_hub.publish(snapshot['match_id'], 'scores', snapshot)
+    return snapshot
+
+def write_score_events(match_id, write):
+    """
+    Runs `write(conn)` on the score writer, which commits it together with
+    any other scoring writes arriving at the same moment, and publishes the
+    match's new scores. Returns (result of write, snapshot).
+    """
+    def operation(conn):
+        return write(conn), match_snapshot(conn, match_id)
+    return score_writer.run(operation, on_commit=lambda result: publish_snapshot(result[1]))
+
+def write_match_state(write):
+    """
+    Runs `write(conn)` on the score writer for writes to matches, point
+    adjustments or the standings, so they are serialized with scoring instead
+    of competing with it for the write lock. `write` returns (result, ids of the
+    matches whose scores to publish once committed). Returns the result.
+    """
+    def operation(conn):
+        result, match_ids = write(conn)
+        return result, [match_snapshot(conn, match_id) for match_id in match_ids if match_id]
+    def publish(outcome):
+        for snapshot in outcome[1]:
+            publish_snapshot(snapshot)
+    return score_writer.run(operation, on_commit=publish)[0]
+
+def get_bracket(conn, sport_id):
+    """Returns the sport's bracket tree, built once and kept until its matches, rounds or classes change."""
+    def build():
+        bracket = build_bracket(conn, sport_id)
+        return bracket, bracket is not None
+    return bracket_trees.get_or_build(sport_id, build, BRACKET_TABLES)
+
+def get_match_version(conn, match_id):
+    """Returns the match's change counter, bumped by triggers on every score_log or match write."""
+    row = conn.execute('SELECT version FROM matches WHERE id = ?', (match_id,)).fetchone()
+    return row['version'] if row else None
+
+def not_modified_response(etag):
+    """Returns a 304 response if the client already holds this ETag, otherwise None."""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
+    return None
+
+def with_etag(response, etag):
+    """Marks a response as revalidatable against the given ETag."""
+    response = app.make_response(response)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+
+def image_processed(filename):
     """
-    todays_matches = conn.execute(todays_matches_query, (today_str,)).fetchall()
+    Called from the image pool once an upload's variants exist. Records a
+    change to the rows that use it, so every worker re-renders those pages
+    with the new srcset.
+    """
+    conn = open_connection()
+    try:
+        for table, column in (('stories', 'image_filename'), ('team_members', 'photo_filename')):
+            row_ids = [row[0] for row in conn.execute(f'SELECT id FROM {table} WHERE {column} = ?', (filename,))]
+            change_tracker.record(conn, table, row_ids)
+        conn.commit()
+    finally:
+        conn.close()
+
+def save_image_upload(conn, file_storage):
+    """
+    Stores an uploaded photo, with its metadata removed, and queues its
+    resized variants. Returns the stored filename.
+    """
+    filename = store_upload(conn, file_storage, app.config['UPLOAD_FOLDER'], app.config['MAX_UPLOAD_BYTES'],
+                            prepare=strip_metadata)
+    queue_derivatives(filename, app.config['UPLOAD_FOLDER'], on_ready=image_processed)
+    return filename
+
+@app.template_global()
+def asset_url(filename):
+    """Like url_for('static', filename=...), but returns the fingerprinted URL when there is one."""
+    hashed = assets.hashed_name(filename)
+    if hashed is None:
+        return url_for('static', filename=filename)
+    return url_for('serve_asset', filename=hashed)
+
+@app.template_global()
+def upload_image(filename, alt='', sizes='100vw', **attrs):
+    """Renders an uploaded image with responsive WebP/JPEG variants."""
+    return responsive_image(filename, app.config['UPLOAD_FOLDER'], alt, sizes, **attrs)
+
+
+# --- PUBLIC ROUTES ---
+
+@app.route('/')
+@page_cache.cached_page('standings', 'classes', 'matches', 'sports')
+def home():
+    """Renders a dynamic public landing page."""
+    conn = get_db_connection()
+    top_teams = conn.execute("""
+        SELECT c.name AS class_name, st.total_points
+        FROM standings st JOIN classes c ON st.class_id = c.id
+        ORDER BY st.total_points DESC, st.wins DESC
+        LIMIT 3
+    """).fetchall()
+
+    today = datetime.date.today()
+    todays_matches = fetch_schedule(conn, today, today)
     conn.close()
     return render_template('public/index.html', top_teams=top_teams, todays_matches=todays_matches)
 
 @app.route('/leaderboard')
+@page_cache.cached_page('standings', 'classes')
 def leaderboard():
     conn = get_db_connection()
-    query = """
-        WITH MatchParticipants AS (
-            SELECT m.id as match_id, m.sport_id, m.winner_id, m.result_details, r.round_type, c.id as class_id, c.name as class_name
-            FROM matches m JOIN rounds r ON m.round_id = r.id JOIN classes c ON m.class1_id = c.id WHERE m.status = 'COMPLETED'
-            UNION ALL
-            SELECT m.id as match_id, m.sport_id, m.winner_id, m.result_details, r.round_type, c.id as class_id, c.name as class_name
-            FROM matches m JOIN rounds r ON m.round_id = r.id JOIN classes c ON m.class2_id = c.id WHERE m.status = 'COMPLETED'
-        ),
-        ClassStats AS (
-            SELECT
-                c.id AS class_id, c.name AS class_name, COUNT(mp.match_id) AS played,
-                SUM(CASE WHEN mp.winner_id = c.id THEN 1 ELSE 0 END) AS wins,
-                SUM(CASE WHEN mp.winner_id IS NOT NULL AND mp.winner_id != c.id THEN 1 ELSE 0 END) AS losses,
-                SUM(CASE
-                    WHEN mp.winner_id = c.id AND mp.round_type = 'FINAL' THEN 5
-                    WHEN mp.winner_id != c.id AND mp.round_type = 'FINAL' THEN 4
-                    WHEN mp.winner_id != c.id AND mp.round_type = 'SEMI_FINAL' THEN 3
-                    WHEN mp.winner_id != c.id AND mp.round_type = 'QUARTER_FINAL' THEN 2
-                    ELSE 0
-                END) AS tournament_points
-            FROM classes c LEFT JOIN MatchParticipants mp ON c.id = mp.class_id GROUP BY c.id, c.name
-        ),
-        ParticipationPoints AS (
-            SELECT class_id, COUNT(DISTINCT sport_id) AS participation_points
-            FROM MatchParticipants WHERE result_details NOT LIKE '%Walkover%' GROUP BY class_id
-        ),
-        WinPoints AS (
-            SELECT winner_id as class_id, COUNT(id) as win_points
-            FROM matches
-            WHERE status = 'COMPLETED' AND result_details IS NOT NULL AND result_details != '' AND result_details NOT LIKE '%Walkover%'
-            GROUP BY winner_id
-        ),
-        AdjustmentPoints AS (
-            SELECT class_id, SUM(points) AS adjustment_points FROM point_adjustments GROUP BY class_id
-        )
-        SELECT
-            cs.class_id, cs.class_name, cs.played, cs.wins, cs.losses,
-            (IFNULL(cs.tournament_points, 0) + IFNULL(pp.participation_points, 0) + IFNULL(ap.adjustment_points, 0) + IFNULL(wp.win_points, 0)) AS total_points
-        FROM ClassStats cs
-        LEFT JOIN ParticipationPoints pp ON cs.class_id = pp.class_id
-        LEFT JOIN AdjustmentPoints ap ON cs.class_id = ap.class_id
-        LEFT JOIN WinPoints wp ON cs.class_id = wp.class_id
-        ORDER BY total_points DESC, cs.wins DESC;
-    """
-    standings = conn.execute(query).fetchall()
+    standings = conn.execute("""
+        SELECT st.class_id, c.name AS class_name, st.played, st.wins, st.losses, st.total_points
+        FROM standings st JOIN classes c ON st.class_id = c.id
+        ORDER BY st.total_points DESC, st.wins DESC
+    """).fetchall()
     conn.close()
     return render_template('public/leaderboard.html', standings=standings, page_title="Leaderboard")
 
 @app.route('/matches')
 def matches():
     conn = get_db_connection()
-    sport_filter = request.args.get('sport_id', None)
-    class_filter = request.args.get('class_id', None)
-    query = """
-        SELECT
-            m.id, m.status, m.result_details, m.match_time,
-            s.name AS sport_name, r.name AS round_name,
-            c1.name AS class1_name, c2.name AS class2_name
-        FROM matches m
-        JOIN sports s ON m.sport_id = s.id
-        JOIN rounds r ON m.round_id = r.id
-        JOIN classes c1 ON m.class1_id = c1.id
-        JOIN classes c2 ON m.class2_id = c2.id
-    """
-    conditions = []
-    params = []
-    if sport_filter:
-        conditions.append("m.sport_id = ?")
-        params.append(sport_filter)
-    if class_filter:
-        conditions.append("(m.class1_id = ? OR m.class2_id = ?)")
-        params.extend([class_filter, class_filter])
-    if conditions:
-        query += " WHERE " + " AND ".join(conditions)
-    query += " ORDER BY m.match_time DESC"
-    all_matches = conn.execute(query, params).fetchall()
+    all_matches, next_cursor = fetch_matches_page(conn, request.args)
     sports = conn.execute('SELECT id, name FROM sports ORDER BY name').fetchall()
     classes = conn.execute('SELECT id, name FROM classes ORDER BY name').fetchall()
     conn.close()
+    next_url, load_more_url = next_page_urls('matches', 'matches_api', next_cursor,
+                                             sport_id=request.args.get('sport_id'), class_id=request.args.get('class_id'))
     return render_template('public/matches.html', all_matches=all_matches, 
-                           sports=sports, classes=classes, 
+                           sports=sports, classes=classes, next_url=next_url, load_more_url=load_more_url,
                            page_title="Match Schedule")
 
+@app.route('/api/matches')
+def matches_api():
+    """The next page of the match schedule, for "load more"."""
+    conn = get_db_connection()
+    rows, next_cursor = fetch_matches_page(conn, request.args)
+    conn.close()
+    _, next_url = next_page_urls('matches', 'matches_api', next_cursor,
+                                 sport_id=request.args.get('sport_id'), class_id=request.args.get('class_id'))
+    return page_json('matches', rows, 'public/_match_items.html', next_url)
+
 @app.route('/matches/<int:match_id>')
 def match_details(match_id):
     conn = get_db_connection()
+    version = get_match_version(conn, match_id)
+    etag = None
+    # Pages carrying flash messages are one-off and must not be revalidated.
+    if version is not None and '_flashes' not in session:
+        announcement = read_announcement()
+        etag = '-'.join([
+            f'match-{match_id}-v{version}', session.get('role') or 'public',
+            hashlib.md5(announcement.encode()).hexdigest()[:8]
+        ])
+        cached = not_modified_response(etag)
+        if cached:
+            conn.close()
+            return cached
     match = conn.execute("""
         SELECT m.*, s.name as sport_name, r.name as round_name, c1.name as class1_name, c2.name as class2_name
         FROM matches m
@@ -279,24 +420,197 @@ def match_details(match_id):
         SELECT sl.*, c.name as team_name
         FROM score_log sl
         JOIN classes c ON sl.team_id = c.id
-        WHERE sl.match_id = ?
-        ORDER BY sl.created_at DESC
+        WHERE sl.match_id = ? AND sl.voided = 0
+        ORDER BY sl.id DESC
     """, (match_id,)).fetchall()
     conn.close()
-    return render_template('public/match_details.html', match=match, score_log=score_log, scores=scores, is_cricket=is_cricket, score_format=score_format, page_title="Match Details")
+    page = render_template('public/match_details.html', match=match, score_log=score_log, scores=scores, is_cricket=is_cricket, score_format=score_format, page_title="Match Details")
+    return with_etag(page, etag) if etag else page
+
+@app.route('/api/matches/<int:match_id>/events')
+def match_events_api(match_id):
+    """Score events and corrections logged after sequence number `after`, for appending to an open event log."""
+    conn = get_db_connection()
+    version = get_match_version(conn, match_id)
+    if version is None:
+        conn.close()
+        return jsonify({'error': 'Match not found'}), 404
+    after = max(request.args.get('after', 0, type=int), 0)
+    limit = page_size(request.args.get('limit'), default=MAX_PAGE_SIZE)
+    etag = f'events-{match_id}-v{version}-{after}-{limit}'
+    cached = not_modified_response(etag)
+    if cached:
+        conn.close()
+        return cached
+    entries, has_more = get_event_feed(conn, match_id, after, limit)
+    conn.close()
+    return with_etag(jsonify({
+        'match_id': match_id, 'events': entries,
+        'after': entries[-1]['seq'] if entries else after, 'more': has_more,
+    }), etag)
+
+@app.route('/api/matches/<int:match_id>/cricket-stats')
+def cricket_stats_api(match_id):
+    """Run rates, partnerships, fall of wickets and the over-by-over series of a cricket match."""
+    conn = get_db_connection()
+    match = conn.execute("""
+        SELECT m.class1_id, m.class2_id, m.version, s.name AS sport_name
+        FROM matches m JOIN sports s ON m.sport_id = s.id
+        WHERE m.id = ?
+    """, (match_id,)).fetchone()
+    config = SPORT_CONFIG.get(match['sport_name'], SPORT_CONFIG['default']) if match else {}
+    if 'overs' not in config:
+        conn.close()
+        return jsonify({'error': 'Cricket match not found'}), 404
+    etag = f"cricket-stats-{match_id}-v{match['version']}"
+    cached = not_modified_response(etag)
+    if cached:
+        conn.close()
+        return cached
+    stats = cricket_stats(conn, match_id, [match['class1_id'], match['class2_id']], config['overs'])
+    conn.close()
+    return with_etag(jsonify(stats), etag)
 
 @app.route('/api/match-scores/<int:match_id>')
 def get_match_scores_api(match_id):
     conn = get_db_connection()
-    match = conn.execute('SELECT class1_id, class2_id FROM matches WHERE id = ?', (match_id,)).fetchone()
+    match = conn.execute('SELECT class1_id, class2_id, version FROM matches WHERE id = ?', (match_id,)).fetchone()
     if match is None:
         return jsonify({'error': 'Match not found'}), 404
+    etag = f"match-scores-{match_id}-v{match['version']}"
+    cached = not_modified_response(etag)
+    if cached:
+        conn.close()
+        return cached
     scores = {
         match['class1_id']: get_live_scores(conn, match_id, match['class1_id']),
         match['class2_id']: get_live_scores(conn, match_id, match['class2_id'])
     }
     conn.close()
-    return jsonify(scores)
+    return with_etag(jsonify(scores), etag)
+
+@app.route('/api/live-scores')
+def get_live_scores_api():
+    """
+    Live scores for several matches in one response, selected either with
+    ?ids=1,2,3 or with ?status=LIVE. Point-based totals for every match are
+    loaded with a single query.
+    """
+    ids_param = request.args.get('ids', '')
+    status = request.args.get('status')
+    query = """
+        SELECT m.id, m.status, m.result_details, m.class1_id, m.class2_id, m.version, s.name AS sport_name
+        FROM matches m JOIN sports s ON m.sport_id = s.id
+    """
+    if ids_param:
+        try:
+            match_ids = sorted({int(i) for i in ids_param.split(',') if i.strip()})
+        except ValueError:
+            return jsonify({'error': 'ids must be a comma-separated list of match ids'}), 400
+        if len(match_ids) > MAX_BATCH_MATCHES:
+            return jsonify({'error': f'At most {MAX_BATCH_MATCHES} matches can be requested at once'}), 400
+        query += f" WHERE m.id IN ({', '.join('?' for _ in match_ids)})"
+        params = match_ids
+    elif status in ('UPCOMING', 'LIVE', 'COMPLETED'):
+        query += " WHERE m.status = ?"
+        params = [status]
+    else:
+        return jsonify({'error': 'Pass either ids or a valid status'}), 400
+    query += f" ORDER BY m.id LIMIT {MAX_BATCH_MATCHES}"
+
+    conn = get_db_connection()
+    matches = conn.execute(query, params).fetchall()
+    etag = 'live-scores-' + hashlib.md5(
+        ','.join(f"{m['id']}:{m['version']}" for m in matches).encode()
+    ).hexdigest()
+    cached = not_modified_response(etag)
+    if cached:
+        conn.close()
+        return cached
+    team_scores = get_live_scores_for_matches(conn, [m['id'] for m in matches])
+    payload = {m['id']: build_score_snapshot(conn, m, team_scores) for m in matches}
+    conn.close()
+    return with_etag(jsonify(payload), etag)
+
+@app.route('/api/schedule')
+def get_schedule_api():
+    """
+    Matches grouped by day for ?from=YYYY-MM-DD&to=YYYY-MM-DD (defaults to the
+    coming week), loaded with a single indexed range query.
+    """
+    try:
+        start = datetime.date.fromisoformat(request.args.get('from') or datetime.date.today().isoformat())
+        end = datetime.date.fromisoformat(request.args.get('to') or (start + datetime.timedelta(days=6)).isoformat())
+    except ValueError:
+        return jsonify({'error': 'Dates must be in YYYY-MM-DD format'}), 400
+    if end < start or (end - start).days >= MAX_SCHEDULE_DAYS:
+        return jsonify({'error': f'The range must cover between 1 and {MAX_SCHEDULE_DAYS} days'}), 400
+    conn = get_db_connection()
+    rows = fetch_schedule(conn, start, end)
+    conn.close()
+    days = {(start + datetime.timedelta(days=offset)).isoformat(): [] for offset in range((end - start).days + 1)}
+    for row in rows:
+        days[row['match_time'][:10]].append(dict(row))
+    return jsonify({
+        'from': start.isoformat(), 'to': end.isoformat(),
+        'days': [{'date': day, 'matches': matches} for day, matches in days.items()]
+    })
+
+@app.route('/api/matches/<int:match_id>/stream')
+def stream_match_scores(match_id):
+    """Server-Sent Events stream of score updates for one match."""
+    last_event_id = request.headers.get('Last-Event-ID', type=int)
+    # Subscribe before reading the snapshot so no update can slip in between.
+    subscription = live_hub.subscribe(match_id, last_event_id)
+    conn = get_db_connection()
+    match = conn.execute("""
+        SELECT m.id, m.status, m.result_details, m.class1_id, m.class2_id, s.name AS sport_name
+        FROM matches m JOIN sports s ON m.sport_id = s.id
+        WHERE m.id = ?
+    """, (match_id,)).fetchone()
+    if match is None:
+        conn.close()
+        live_hub.unsubscribe(match_id, subscription[0])
+        return jsonify({'error': 'Match not found'}), 404
+    snapshot = build_score_snapshot(conn, match)
+    conn.close()
+    response = Response(stream_messages(live_hub, match_id, subscription, snapshot), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    response.call_on_close(lambda: live_hub.unsubscribe(match_id, subscription[0]))
+    return response
+
+@app.route('/assets/<path:filename>')
+def serve_asset(filename):
+    """Serves a fingerprinted static file, precompressed when the client accepts it."""
+    found = assets.send(filename, request.accept_encodings)
+    if found is None:
+        abort(404)
+    path, mimetype, encoding = found
+    response = send_file(path, mimetype=mimetype, max_age=31536000)
+    if encoding is not None:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/search')
+@page_cache.cached_page('stories', 'matches', 'classes', 'sports')
+def search_page():
+    query = request.args.get('q', '').strip()[:MAX_QUERY_LENGTH]
+    conn = get_db_connection()
+    results = search_site(conn, query) if query else []
+    conn.close()
+    return render_template('public/search.html', query=query, results=results, page_title="Search")
+
+@app.route('/api/search')
+def search_api():
+    """Ranked full-text results with matches highlighted in <mark>; every word matches as a prefix."""
+    conn = get_db_connection()
+    results = search_site(conn, request.args.get('q', ''), page_size(request.args.get('limit')))
+    conn.close()
+    return jsonify({'query': request.args.get('q', ''), 'results': results})
 
 @app.route('/brackets')
 def list_brackets():
@@ -306,104 +620,77 @@ def list_brackets():
     return render_template('public/list_brackets.html', sports=sports_with_rounds, page_title="Tournament Brackets")
 
 @app.route('/brackets/<int:sport_id>')
+@page_cache.cached_page(*BRACKET_TABLES)
 def view_bracket(sport_id):
     conn = get_db_connection()
-    sport = conn.execute('SELECT name FROM sports WHERE id = ?', (sport_id,)).fetchone()
-    if sport is None:
+    bracket = get_bracket(conn, sport_id)
+    conn.close()
+    if bracket is None:
         return redirect(url_for('list_brackets'))
-    query = """
-        SELECT r.name as round_name, c1.name as class1_name, c2.name as class2_name, w.name as winner_name
-        FROM matches m
-        JOIN rounds r ON m.round_id = r.id
-        JOIN classes c1 ON m.class1_id = c1.id
-        JOIN classes c2 ON m.class2_id = c2.id
-        LEFT JOIN classes w ON m.winner_id = w.id
-        WHERE m.sport_id = ? ORDER BY r.id, m.id
-    """
-    matches = conn.execute(query, (sport_id,)).fetchall()
-    rounds = {}
-    for match in matches:
-        round_name = match['round_name']
-        if round_name not in rounds:
-            rounds[round_name] = []
-        rounds[round_name].append(match)
+    sport_name = bracket['sport']['name']
+    return render_template('public/brackets.html', sport_name=sport_name, bracket=bracket, page_title=f"{sport_name} Bracket")
+
+@app.route('/api/brackets/<int:sport_id>')
+@page_cache.cached_page(*BRACKET_TABLES)
+def bracket_api(sport_id):
+    conn = get_db_connection()
+    bracket = get_bracket(conn, sport_id)
     conn.close()
-    return render_template('public/brackets.html', sport_name=sport['name'], rounds=rounds, page_title=f"{sport['name']} Bracket")
+    if bracket is None:
+        return jsonify({'error': 'Sport not found'}), 404
+    return jsonify(bracket)
 
 @app.route('/about')
+@page_cache.cached_page('team_members')
 def about():
     conn = get_db_connection()
-    members = conn.execute('SELECT * FROM team_members ORDER BY name').fetchall()
+    members = content_store.team_members(conn)
     conn.close()
     return render_template('public/about.html', members=members, page_title="About Us")
 
 @app.route('/stories')
+@page_cache.cached_page('stories')
 def list_stories():
     conn = get_db_connection()
-    stories = conn.execute('SELECT id, title, content, author, image_filename FROM stories ORDER BY created_at DESC').fetchall()
+    stories, next_cursor = fetch_stories_page(conn, request.args)
+    conn.close()
+    next_url, load_more_url = next_page_urls('list_stories', 'stories_api', next_cursor)
+    return render_template('public/list_stories.html', stories=stories, next_url=next_url,
+                           load_more_url=load_more_url, page_title="Trending Stories")
+
+@app.route('/api/stories')
+def stories_api():
+    """The next page of stories, for "load more"."""
+    conn = get_db_connection()
+    rows, next_cursor = fetch_stories_page(conn, request.args)
     conn.close()
-    return render_template('public/list_stories.html', stories=stories, page_title="Trending Stories")
+    _, next_url = next_page_urls('list_stories', 'stories_api', next_cursor)
+    return page_json('stories', rows, 'public/_story_items.html', next_url)
 
 @app.route('/stories/<int:story_id>')
 def view_story(story_id):
     conn = get_db_connection()
-    story = conn.execute('SELECT id, title, content, author, image_filename FROM stories WHERE id = ?', (story_id,)).fetchone()
+    story = conn.execute('SELECT id, title, content, author, image_filename, reading_minutes FROM stories WHERE id = ?', (story_id,)).fetchone()
     conn.close()
     if story is None:
         return redirect(url_for('list_stories'))
     return render_template('public/view_story.html', story=story, page_title=story['title'])
 
 @app.route('/class-log/<int:class_id>')
+@page_cache.cached_page('standings', 'classes', 'matches', 'rounds', 'sports', 'point_adjustments')
 def class_points_log(class_id):
     conn = get_db_connection()
     class_info = conn.execute('SELECT name FROM classes WHERE id = ?', (class_id,)).fetchone()
     if class_info is None:
         return redirect(url_for('leaderboard'))
-    tournament_events = conn.execute("""
-        SELECT s.name as sport_name, r.round_type,
-            CASE
-                WHEN m.winner_id = ? AND r.round_type = 'FINAL' THEN 5
-                WHEN m.winner_id != ? AND r.round_type = 'FINAL' THEN 4
-                WHEN m.winner_id != ? AND r.round_type = 'SEMI_FINAL' THEN 3
-                WHEN m.winner_id != ? AND r.round_type = 'QUARTER_FINAL' THEN 2
-                ELSE 0
-            END AS points,
-            CASE WHEN m.winner_id = ? THEN 'Won' ELSE 'Lost' END AS outcome
-        FROM matches m
-        JOIN rounds r ON m.round_id = r.id
-        JOIN sports s ON m.sport_id = s.id
-        WHERE (m.class1_id = ? OR m.class2_id = ?) AND m.status = 'COMPLETED'
-          AND r.round_type IN ('FINAL', 'SEMI_FINAL', 'QUARTER_FINAL') AND points > 0
-    """, (class_id, class_id, class_id, class_id, class_id, class_id, class_id)).fetchall()
-    participation_events = conn.execute("""
-        SELECT DISTINCT s.name as sport_name
-        FROM matches m
-        JOIN sports s ON m.sport_id = s.id
-        WHERE (m.class1_id = ? OR m.class2_id = ?) AND m.status = 'COMPLETED'
-    """, (class_id, class_id)).fetchall()
-    adjustments = conn.execute(
-        'SELECT points, reason FROM point_adjustments WHERE class_id = ? ORDER BY created_at DESC', (class_id,)
-    ).fetchall()
-    win_points_events = conn.execute("""
-        SELECT s.name as sport_name, c2.name as opponent_name
-        FROM matches m
-        JOIN sports s ON m.sport_id = s.id
-        JOIN classes c2 ON m.class2_id = c2.id
-        WHERE m.winner_id = ? AND m.class1_id = ? AND m.result_details IS NOT NULL AND m.result_details != ''
-        UNION ALL
-        SELECT s.name as sport_name, c1.name as opponent_name
-        FROM matches m
-        JOIN sports s ON m.sport_id = s.id
-        JOIN classes c1 ON m.class1_id = c1.id
-        WHERE m.winner_id = ? AND m.class2_id = ? AND m.result_details IS NOT NULL AND m.result_details != ''
-    """, (class_id, class_id, class_id, class_id)).fetchall()
+    log = points_log(conn, class_id)
     conn.close()
     return render_template('public/class_points_log.html',
                            class_name=class_info['name'],
-                           tournament_events=tournament_events,
-                           participation_events=participation_events,
-                           adjustments=adjustments,
-                           win_points_events=win_points_events,
+                           tournament_events=log['TOURNAMENT'],
+                           participation_events=log['PARTICIPATION'],
+                           adjustments=log['ADJUSTMENT'],
+                           win_points_events=log['WIN'],
                            page_title=f"Points Log for {class_info['name']}")
 
 
@@ -430,7 +717,7 @@ def admin_logout():
 @app.route('/admin/dashboard')
 @admin_required
 def admin_dashboard():
-    return render_template('admin/dashboard.html')
+    return render_template('admin/dashboard.html', writer_stats=score_writer.stats())
 
 
 # --- ADMIN CONTENT MANAGEMENT ---
@@ -451,10 +738,14 @@ def create_member():
         role = request.form.get('role')
         photo_file = request.files.get('photo')
         photo_filename = None
-        if photo_file and photo_file.filename != '':
-            photo_filename = secure_filename(photo_file.filename)
-            photo_file.save(os.path.join(app.config['UPLOAD_FOLDER'], photo_filename))
         conn = get_db_connection()
+        if photo_file and photo_file.filename != '':
+            try:
+                photo_filename = save_image_upload(conn, photo_file)
+            except UploadTooLarge as e:
+                conn.close()
+                flash(str(e), 'danger')
+                return redirect(request.url)
         conn.execute('INSERT INTO team_members (name, role, photo_filename) VALUES (?, ?, ?)', (name, role, photo_filename))
         conn.commit()
         conn.close()
@@ -473,8 +764,12 @@ def edit_member(member_id):
         current_filename = conn.execute('SELECT photo_filename FROM team_members WHERE id = ?', (member_id,)).fetchone()['photo_filename']
         photo_filename = current_filename
         if photo_file and photo_file.filename != '':
-            photo_filename = secure_filename(photo_file.filename)
-            photo_file.save(os.path.join(app.config['UPLOAD_FOLDER'], photo_filename))
+            try:
+                photo_filename = save_image_upload(conn, photo_file)
+            except UploadTooLarge as e:
+                conn.close()
+                flash(str(e), 'danger')
+                return redirect(request.url)
         conn.execute('UPDATE team_members SET name = ?, role = ?, photo_filename = ? WHERE id = ?', (name, role, photo_filename, member_id))
         conn.commit()
         conn.close()
@@ -498,9 +793,19 @@ def delete_member(member_id):
 @admin_required
 def admin_list_stories():
     conn = get_db_connection()
-    stories = conn.execute('SELECT id, title, author FROM stories ORDER BY created_at DESC').fetchall()
+    stories, next_cursor = fetch_stories_page(conn, request.args)
+    conn.close()
+    next_url, load_more_url = next_page_urls('admin_list_stories', 'admin_stories_api', next_cursor)
+    return render_template('admin/list_stories_admin.html', stories=stories, next_url=next_url, load_more_url=load_more_url)
+
+@app.route('/admin/api/stories')
+@admin_required
+def admin_stories_api():
+    conn = get_db_connection()
+    rows, next_cursor = fetch_stories_page(conn, request.args)
     conn.close()
-    return render_template('admin/list_stories_admin.html', stories=stories)
+    _, next_url = next_page_urls('admin_list_stories', 'admin_stories_api', next_cursor)
+    return page_json('stories', rows, 'admin/_story_items.html', next_url)
 
 @app.route('/admin/stories/new', methods=['GET', 'POST'])
 @admin_required
@@ -511,11 +816,19 @@ def create_story():
         author = request.form.get('author')
         image_file = request.files.get('image')
         image_filename = None
-        if image_file and image_file.filename != '':
-            image_filename = secure_filename(image_file.filename)
-            image_file.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
         conn = get_db_connection()
-        conn.execute('INSERT INTO stories (title, content, author, image_filename) VALUES (?, ?, ?, ?)', (title, content, author, image_filename))
+        if image_file and image_file.filename != '':
+            try:
+                image_filename = save_image_upload(conn, image_file)
+            except UploadTooLarge as e:
+                conn.close()
+                flash(str(e), 'danger')
+                return redirect(request.url)
+        excerpt, word_count, reading_minutes = summarize(content)
+        conn.execute(
+            'INSERT INTO stories (title, content, author, image_filename, excerpt, word_count, reading_minutes) VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (title, content, author, image_filename, excerpt, word_count, reading_minutes)
+        )
         conn.commit()
         conn.close()
         flash('Story created successfully!', 'success')
@@ -534,9 +847,18 @@ def edit_story(story_id):
         current_filename = conn.execute('SELECT image_filename FROM stories WHERE id = ?', (story_id,)).fetchone()['image_filename']
         image_filename = current_filename
         if image_file and image_file.filename != '':
-            image_filename = secure_filename(image_file.filename)
-            image_file.save(os.path.join(app.config['UPLOAD_FOLDER'], image_filename))
-        conn.execute('UPDATE stories SET title = ?, content = ?, author = ?, image_filename = ? WHERE id = ?', (title, content, author, image_filename, story_id))
+            try:
+                image_filename = save_image_upload(conn, image_file)
+            except UploadTooLarge as e:
+                conn.close()
+                flash(str(e), 'danger')
+                return redirect(request.url)
+        excerpt, word_count, reading_minutes = summarize(content)
+        conn.execute("""
+            UPDATE stories SET title = ?, content = ?, author = ?, image_filename = ?,
+                               excerpt = ?, word_count = ?, reading_minutes = ?
+            WHERE id = ?
+        """, (title, content, author, image_filename, excerpt, word_count, reading_minutes, story_id))
         conn.commit()
         conn.close()
         flash('Story updated successfully!', 'success')
@@ -595,9 +917,15 @@ def edit_round(round_id):
     if request.method == 'POST':
         name = request.form.get('name')
         round_type = request.form.get('round_type')
-        conn.execute('UPDATE rounds SET name = ?, round_type = ? WHERE id = ?', (name, round_type, round_id))
-        conn.commit()
         conn.close()
+
+        def write(conn):
+            conn.execute('UPDATE rounds SET name = ?, round_type = ? WHERE id = ?', (name, round_type, round_id))
+            # The round type decides tournament points, so every class in the round may move.
+            for match in conn.execute('SELECT class1_id, class2_id FROM matches WHERE round_id = ?', (round_id,)).fetchall():
+                refresh_standings(conn, match['class1_id'], match['class2_id'])
+            return None, []
+        write_match_state(write)
         flash('Round updated successfully!', 'success')
         return redirect(url_for('list_rounds'))
     round_data = conn.execute('SELECT * FROM rounds WHERE id = ?', (round_id,)).fetchone()
@@ -626,18 +954,19 @@ def delete_round(round_id):
 @admin_required
 def list_matches():
     conn = get_db_connection()
-    query = """
-        SELECT m.id, s.name as sport_name, c1.name as class1_name, c2.name as class2_name,
-               m.result_details, m.status, m.match_time
-        FROM matches m
-        JOIN sports s ON m.sport_id = s.id
-        JOIN classes c1 ON m.class1_id = c1.id
-        JOIN classes c2 ON m.class2_id = c2.id
-        ORDER BY m.match_time DESC
-    """
-    matches = conn.execute(query).fetchall()
+    matches, next_cursor = fetch_matches_page(conn, request.args)
+    conn.close()
+    next_url, load_more_url = next_page_urls('list_matches', 'admin_matches_api', next_cursor)
+    return render_template('admin/list_matches.html', matches=matches, next_url=next_url, load_more_url=load_more_url)
+
+@app.route('/admin/api/matches')
+@admin_required
+def admin_matches_api():
+    conn = get_db_connection()
+    rows, next_cursor = fetch_matches_page(conn, request.args)
     conn.close()
-    return render_template('admin/list_matches.html', matches=matches)
+    _, next_url = next_page_urls('list_matches', 'admin_matches_api', next_cursor)
+    return page_json('matches', rows, 'admin/_match_rows.html', next_url)
 
 @app.route('/admin/matches/new', methods=['GET', 'POST'])
 @admin_required
@@ -658,13 +987,16 @@ def create_match():
             conn.close()
             default_time = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M')
             return render_template('admin/match_form.html', rounds=rounds, classes=classes, default_time=default_time, form_title="Create New Match")
-        sport_id = conn.execute('SELECT sport_id FROM rounds WHERE id = ?', (round_id,)).fetchone()['sport_id']
-        conn.execute(
-            'INSERT INTO matches (sport_id, round_id, class1_id, class2_id, match_time, status) VALUES (?, ?, ?, ?, ?, ?)',
-            (sport_id, round_id, class1_id, class2_id, match_time_str, 'UPCOMING')
-        )
-        conn.commit()
         conn.close()
+
+        def write(conn):
+            sport_id = conn.execute('SELECT sport_id FROM rounds WHERE id = ?', (round_id,)).fetchone()['sport_id']
+            conn.execute(
+                'INSERT INTO matches (sport_id, round_id, class1_id, class2_id, match_time, status) VALUES (?, ?, ?, ?, ?, ?)',
+                (sport_id, round_id, class1_id, class2_id, match_time_str, 'UPCOMING')
+            )
+            return None, []
+        write_match_state(write)
         flash('Match created successfully!', 'success')
         return redirect(url_for('list_matches'))
     rounds = conn.execute("SELECT r.id, r.name, s.name as sport_name FROM rounds r JOIN sports s ON r.sport_id = s.id ORDER BY s.name, r.id").fetchall()
@@ -688,12 +1020,31 @@ def edit_match(match_id):
             return redirect(url_for('edit_match', match_id=match_id))
         if status != 'COMPLETED':
             winner_id = None
-        conn.execute(
-            'UPDATE matches SET status = ?, winner_id = ?, notes = ?, result_details = ?, scorecard_url = ? WHERE id = ?',
-            (status, winner_id, notes, result_details, scorecard_url, match_id)
-        )
-        conn.commit()
+        next_match_id = request.form.get('next_match_id', type=int)
+        next_slot = request.form.get('next_slot', type=int) if next_match_id else None
         conn.close()
+
+        def write(conn):
+            if next_match_id:
+                error = validate_link(conn, match_id, next_match_id, next_slot)
+                if error:
+                    return error, []
+            previous = conn.execute(
+                'SELECT winner_id, next_match_id, next_slot FROM matches WHERE id = ?', (match_id,)
+            ).fetchone()
+            conn.execute(
+                'UPDATE matches SET status = ?, winner_id = ?, notes = ?, result_details = ?, scorecard_url = ?, next_match_id = ?, next_slot = ? WHERE id = ?',
+                (status, winner_id, notes, result_details, scorecard_url, next_match_id, next_slot, match_id)
+            )
+            refresh_match_standings(conn, match_id)
+            return None, [match_id, advance_winner(conn, match_id, previous)]
+        try:
+            error = write_match_state(write)
+        except BracketConflict as e:
+            error = str(e)
+        if error:
+            flash(error, 'danger')
+            return redirect(url_for('edit_match', match_id=match_id))
         flash('Match updated successfully!', 'success')
         return redirect(url_for('list_matches'))
     match = conn.execute("""
@@ -704,21 +1055,34 @@ def edit_match(match_id):
         JOIN classes c2 ON m.class2_id = c2.id
         WHERE m.id = ?
     """, (match_id,)).fetchone()
-    conn.close()
     if match is None:
+        conn.close()
         flash('Match not found!', 'danger')
         return redirect(url_for('list_matches'))
+    next_matches = conn.execute("""
+        SELECT m.id, r.name AS round_name, c1.name AS class1_name, c2.name AS class2_name
+        FROM matches m
+        JOIN rounds r ON m.round_id = r.id
+        JOIN classes c1 ON m.class1_id = c1.id
+        JOIN classes c2 ON m.class2_id = c2.id
+        WHERE m.sport_id = ? AND m.id != ?
+        ORDER BY r.id, m.id
+    """, (match['sport_id'], match_id)).fetchall()
+    conn.close()
     uses_live_finalizer = match['sport_name'] in SPORT_CONFIG and SPORT_CONFIG[match['sport_name']]['format'] != 'points'
-    return render_template('admin/match_form.html', match=match, form_title="Edit Match", uses_live_finalizer=uses_live_finalizer)
+    return render_template('admin/match_form.html', match=match, next_matches=next_matches, form_title="Edit Match", uses_live_finalizer=uses_live_finalizer)
 
 @app.route('/admin/matches/<int:match_id>/delete', methods=['POST'])
 @admin_required
 def delete_match(match_id):
-    conn = get_db_connection()
-    conn.execute('DELETE FROM score_log WHERE match_id = ?', (match_id,))
-    conn.execute('DELETE FROM matches WHERE id = ?', (match_id,))
-    conn.commit()
-    conn.close()
+    def write(conn):
+        match = conn.execute('SELECT class1_id, class2_id FROM matches WHERE id = ?', (match_id,)).fetchone()
+        delete_match_events(conn, match_id)
+        conn.execute('DELETE FROM matches WHERE id = ?', (match_id,))
+        if match:
+            refresh_standings(conn, match['class1_id'], match['class2_id'])
+        return None, []
+    write_match_state(write)
     flash('Match has been deleted successfully.', 'success')
     return redirect(url_for('list_matches'))
 
@@ -729,24 +1093,30 @@ def declare_walkover(match_id):
     if not loser_id:
         flash('Invalid request for walkover.', 'danger')
         return redirect(url_for('list_matches'))
-    conn = get_db_connection()
-    match = conn.execute('SELECT * FROM matches WHERE id = ?', (match_id,)).fetchone()
-    winner_id = match['class2_id'] if int(loser_id) == match['class1_id'] else match['class1_id']
-    winner_name = conn.execute('SELECT name FROM classes WHERE id = ?', (winner_id,)).fetchone()['name']
-    loser_name = conn.execute('SELECT name FROM classes WHERE id = ?', (loser_id,)).fetchone()['name']
-    sport_name = conn.execute('SELECT name FROM sports WHERE id = ?', (match['sport_id'],)).fetchone()['name']
-    result_details = f"{winner_name} won by Walkover"
-    conn.execute(
-        'UPDATE matches SET status = ?, winner_id = ?, result_details = ? WHERE id = ?',
-        ('COMPLETED', winner_id, result_details, match_id)
-    )
-    reason = f"Walkover in {sport_name} vs {winner_name}"
-    conn.execute(
-        'INSERT INTO point_adjustments (class_id, points, reason) VALUES (?, ?, ?)',
-        (loser_id, -3, reason)
-    )
-    conn.commit()
-    conn.close()
+
+    def write(conn):
+        match = conn.execute('SELECT * FROM matches WHERE id = ?', (match_id,)).fetchone()
+        winner_id = match['class2_id'] if int(loser_id) == match['class1_id'] else match['class1_id']
+        winner_name = conn.execute('SELECT name FROM classes WHERE id = ?', (winner_id,)).fetchone()['name']
+        loser_name = conn.execute('SELECT name FROM classes WHERE id = ?', (loser_id,)).fetchone()['name']
+        sport_name = conn.execute('SELECT name FROM sports WHERE id = ?', (match['sport_id'],)).fetchone()['name']
+        result_details = f"{winner_name} won by Walkover"
+        conn.execute(
+            'UPDATE matches SET status = ?, winner_id = ?, result_details = ? WHERE id = ?',
+            ('COMPLETED', winner_id, result_details, match_id)
+        )
+        reason = f"Walkover in {sport_name} vs {winner_name}"
+        conn.execute(
+            'INSERT INTO point_adjustments (class_id, points, reason) VALUES (?, ?, ?)',
+            (loser_id, -3, reason)
+        )
+        refresh_standings(conn, match['class1_id'], match['class2_id'])
+        return loser_name, [match_id, advance_winner(conn, match_id)]
+    try:
+        loser_name = write_match_state(write)
+    except BracketConflict as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('list_matches'))
     flash(f"{loser_name} recorded with a walkover. -3 points applied.", 'success')
     return redirect(url_for('list_matches'))
 
@@ -766,54 +1136,87 @@ def point_adjustments():
         elif not points.lstrip('-').isdigit():
             flash('Points must be a valid number.', 'danger')
         else:
-            conn.execute(
-                'INSERT INTO point_adjustments (class_id, points, reason) VALUES (?, ?, ?)',
-                (class_id, int(points), reason)
-            )
-            conn.commit()
+            def write(conn):
+                conn.execute(
+                    'INSERT INTO point_adjustments (class_id, points, reason) VALUES (?, ?, ?)',
+                    (class_id, int(points), reason)
+                )
+                refresh_standings(conn, class_id)
+                return None, []
+            write_match_state(write)
             flash('Point adjustment saved successfully!', 'success')
-        
+        conn.close()
         return redirect(url_for('point_adjustments'))
 
     # GET request: Fetch data for the form and the log
     classes = conn.execute('SELECT * FROM classes ORDER BY name').fetchall()
-    # CORRECTED: Added pa.id to the SELECT statement
-    adjustments = conn.execute("""
-        SELECT pa.id, pa.points, pa.reason, pa.created_at, c.name as class_name
-        FROM point_adjustments pa
-        JOIN classes c ON pa.class_id = c.id
-        ORDER BY pa.created_at DESC
-    """).fetchall()
+    adjustments, next_cursor = fetch_adjustments_page(conn, request.args)
     
     conn.close()
     
-    return render_template('admin/adjustments_form.html', classes=classes, adjustments=adjustments)
+    next_url, load_more_url = next_page_urls('point_adjustments', 'admin_adjustments_api', next_cursor)
+    return render_template('admin/adjustments_form.html', classes=classes, adjustments=adjustments,
+                           next_url=next_url, load_more_url=load_more_url)
+
+@app.route('/admin/api/adjustments')
+@admin_required
+def admin_adjustments_api():
+    conn = get_db_connection()
+    rows, next_cursor = fetch_adjustments_page(conn, request.args)
+    conn.close()
+    _, next_url = next_page_urls('point_adjustments', 'admin_adjustments_api', next_cursor)
+    return page_json('adjustments', rows, 'admin/_adjustment_rows.html', next_url)
 
 @app.route('/admin/adjustments/<int:adjustment_id>/delete', methods=['POST'])
 @admin_required
 def delete_adjustment(adjustment_id):
     """Deletes a specific manual point adjustment."""
-    conn = get_db_connection()
-    conn.execute('DELETE FROM point_adjustments WHERE id = ?', (adjustment_id,))
-    conn.commit()
-    conn.close()
+    def write(conn):
+        adjustment = conn.execute('SELECT class_id FROM point_adjustments WHERE id = ?', (adjustment_id,)).fetchone()
+        conn.execute('DELETE FROM point_adjustments WHERE id = ?', (adjustment_id,))
+        if adjustment:
+            refresh_standings(conn, adjustment['class_id'])
+        return None, []
+    write_match_state(write)
     flash('Point adjustment deleted successfully.', 'success')
     return redirect(url_for('point_adjustments'))
 
+@app.route('/admin/standings/rebuild', methods=['POST'])
+@admin_required
+def rebuild_standings_table():
+    """Recomputes the standings table from scratch and checks it against the reference query."""
+    conn = get_db_connection()
+    rebuild_standings(conn)
+    mismatches = verify_standings(conn)
+    if mismatches:
+        conn.rollback()
+        conn.close()
+        names = ', '.join(name for name, _, _ in mismatches)
+        flash(f'Standings rebuild did not match the leaderboard query for: {names}. Nothing was changed.', 'danger')
+    else:
+        conn.commit()
+        conn.close()
+        flash('Standings rebuilt and verified successfully.', 'success')
+    return redirect(url_for('admin_dashboard'))
+
+@app.route('/admin/cache-stats')
+@admin_required
+def cache_stats():
+    """Reports public page cache hit/miss counters for tuning."""
+    return jsonify(page_cache.stats())
+
 @app.route('/admin/announcement', methods=['GET', 'POST'])
 @admin_required
 def manage_announcement():
-    announcement_file = 'announcement.txt'
+    conn = get_db_connection()
     if request.method == 'POST':
-        content = request.form.get('content')
-        with open(announcement_file, 'w') as f:
-            f.write(content)
+        content_store.set(conn, 'announcement', request.form.get('content', ''))
+        conn.commit()
+        conn.close()
         flash('Announcement updated successfully!', 'success')
         return redirect(url_for('manage_announcement'))
-    content = ""
-    if os.path.exists(announcement_file):
-        with open(announcement_file, 'r') as f:
-            content = f.read()
+    content = content_store.get(conn, 'announcement')
+    conn.close()
     return render_template('admin/announcement_form.html', content=content)
 
 # --- ADMIN LIVE SCORING ---
@@ -846,21 +1249,24 @@ def live_score_editor(match_id):
     
     is_cricket = 'Cricket' in sport_name
     
-    return render_template('admin/live_score_form.html', match=match, scores=scores, buttons=buttons, is_cricket=is_cricket, score_format=score_format)
+    return render_template('admin/live_score_form.html', match=match, scores=scores, buttons=buttons, is_cricket=is_cricket, score_format=score_format,
+                           max_batch_events=MAX_BATCH_EVENTS, form_event_id=uuid.uuid4().hex)
 
 @app.route('/admin/matches/end-set', methods=['POST'])
 @admin_required
 def end_set():
     """Logs the end of a set from the HTML form."""
     match_id = request.form.get('match_id')
-    conn = get_db_connection()
-    conn.execute(
-        "INSERT INTO score_log (match_id, team_id, points_scored, event_type, counts_as_ball) VALUES (?, ?, ?, ?, ?)",
-        (match_id, 0, 0, 'Set End', 0)
-    )
-    conn.commit()
-    conn.close()
-    flash('Set finalized.', 'success')
+    event_id, error = parse_event_id(request.form.get('event_id'))
+    if error:
+        flash(error, 'danger')
+        return redirect(url_for('live_score_editor', match_id=match_id))
+    # The snapshot folds the set state inside the same transaction.
+    logged, _ = write_score_events(match_id, lambda conn: log_score_event(conn, match_id, 0, 0, 'Set End', 0, event_id))
+    if logged:
+        flash('Set finalized.', 'success')
+    else:
+        flash('That set end was already logged.', 'info')
     return redirect(url_for('live_score_editor', match_id=match_id))
 
 @app.route('/admin/matches/add-score', methods=['POST'])
@@ -873,18 +1279,17 @@ def add_score():
     points = data.get('points')
     event_type = data.get('event_type')
     counts_as_ball = data.get('counts_as_ball')
-    
-    conn = get_db_connection()
-    conn.execute(
-        'INSERT INTO score_log (match_id, team_id, points_scored, event_type, counts_as_ball) VALUES (?, ?, ?, ?, ?)',
-        (match_id, team_id, points, event_type, counts_as_ball)
-    )
-    conn.commit()
-    new_stats = get_live_scores(conn, match_id, team_id)
-    conn.close()
-    
+    event_id, error = parse_event_id(data.get('event_id'))
+    if error:
+        return jsonify({'error': error}), 400
+
+    def write(conn):
+        logged = log_score_event(conn, match_id, team_id, points, event_type, counts_as_ball, event_id)
+        return logged is None, get_live_scores(conn, match_id, team_id)
+    (duplicate, new_stats), _ = write_score_events(match_id, write)
+
     return jsonify({
-        'success': True, 'team_id': team_id,
+        'success': True, 'team_id': team_id, 'duplicate': duplicate,
         'new_total': new_stats['score'], 'new_wickets': new_stats['wickets'],
         'new_overs': new_stats['overs'], 'new_balls': new_stats['balls']
     })
@@ -896,19 +1301,21 @@ def add_score_set():
     data = request.json
     match_id = data.get('match_id')
     team_id = data.get('team_id')
-    
-    conn = get_db_connection()
-    conn.execute(
-        'INSERT INTO score_log (match_id, team_id, points_scored, event_type, counts_as_ball) VALUES (?, ?, ?, ?, ?)',
-        (match_id, team_id, 1, 'Point', 0)
-    )
-    conn.commit()
+    event_id, error = parse_event_id(data.get('event_id'))
+    if error:
+        return jsonify({'error': error}), 400
 
-    match = conn.execute('SELECT class1_id, class2_id FROM matches WHERE id = ?', (match_id,)).fetchone()
-    new_scores = get_set_scores(conn, match_id, match['class1_id'], match['class2_id'])
+    conn = get_db_connection()
+    match = conn.execute('SELECT id FROM matches WHERE id = ?', (match_id,)).fetchone()
     conn.close()
+    if match is None:
+        return jsonify({'error': 'Match not found'}), 404
 
-    return jsonify({'success': True, 'new_scores': new_scores})
+    # The snapshot folds the set state, saving it with the new point.
+    logged, snapshot = write_score_events(match_id, lambda conn: log_score_event(conn, match_id, team_id, 1, 'Point', 0, event_id))
+    if snapshot is None:
+        return jsonify({'error': 'Match not found'}), 404
+    return jsonify({'success': True, 'duplicate': logged is None, 'new_scores': snapshot['scores']})
 
 @app.route('/admin/matches/log-complex-event', methods=['POST'])
 @admin_required
@@ -919,119 +1326,263 @@ def log_complex_event():
     team_id = data.get('team_id')
     base_event = data.get('base_event')
     extra_runs = data.get('extra_runs')
+    # Both parts are keyed off the one id, so a retry logs neither again.
+    event_id, error = parse_event_id(data.get('event_id'), MAX_CLIENT_EVENT_ID_LENGTH - 2)
+    if error:
+        return jsonify({'error': error}), 400
+
+    def write(conn):
+        logged = log_score_event(conn, match_id, team_id, base_event['points'], base_event['type'], base_event['counts_as_ball'],
+                                 event_id and f'{event_id}/1')
+        if logged and extra_runs['points'] > 0:
+            log_score_event(conn, match_id, team_id, extra_runs['points'], extra_runs['type'], extra_runs['counts_as_ball'],
+                            event_id and f'{event_id}/2')
+        return logged is None, get_live_scores(conn, match_id, team_id)
+    (duplicate, new_stats), _ = write_score_events(match_id, write)
 
-    conn = get_db_connection()
-    conn.execute(
-        'INSERT INTO score_log (match_id, team_id, points_scored, event_type, counts_as_ball) VALUES (?, ?, ?, ?, ?)',
-        (match_id, team_id, base_event['points'], base_event['type'], base_event['counts_as_ball'])
-    )
-    if extra_runs['points'] > 0:
-        conn.execute(
-            'INSERT INTO score_log (match_id, team_id, points_scored, event_type, counts_as_ball) VALUES (?, ?, ?, ?, ?)',
-            (match_id, team_id, extra_runs['points'], extra_runs['type'], extra_runs['counts_as_ball'])
-        )
-    conn.commit()
-    new_stats = get_live_scores(conn, match_id, team_id)
-    conn.close()
-    
     return jsonify({
-        'success': True, 'team_id': team_id, 'new_total': new_stats['score'],
+        'success': True, 'team_id': team_id, 'duplicate': duplicate, 'new_total': new_stats['score'],
         'new_wickets': new_stats['wickets'], 'new_overs': new_stats['overs'], 'new_balls': new_stats['balls']
     })
 
+def parse_event_id(value, max_length=MAX_CLIENT_EVENT_ID_LENGTH):
+    """
+    Validates the optional `event_id` a scorer sends with a single event, so
+    a retried request is logged once. Returns (event_id or None, error message or None).
+    """
+    if value is None or value == '':
+        return None, None
+    if not isinstance(value, str) or len(value) > max_length:
+        return None, f'event_id must be a string of at most {max_length} characters'
+    return value, None
+
+def parse_score_events(events, team_ids):
+    """
+    Validates a batch of score events from the scorer. Returns a list of
+    (client_event_id, team_id, points, event_type, counts_as_ball) tuples,
+    or an error message.
+    """
+    if not isinstance(events, list) or not 0 < len(events) <= MAX_BATCH_EVENTS:
+        return f'events must be a list of 1 to {MAX_BATCH_EVENTS} events'
+    parsed = []
+    for event in events:
+        if not isinstance(event, dict):
+            return 'Every event must be an object'
+        client_event_id = event.get('id')
+        event_type = event.get('type')
+        if not isinstance(client_event_id, str) or not 0 < len(client_event_id) <= MAX_CLIENT_EVENT_ID_LENGTH:
+            return f'Every event needs an id of at most {MAX_CLIENT_EVENT_ID_LENGTH} characters'
+        if not isinstance(event_type, str) or not event_type.strip():
+            return 'Every event needs a type'
+        try:
+            team_id = int(event.get('team_id'))
+            points = int(event.get('points', 0))
+            counts_as_ball = int(event.get('counts_as_ball', 0))
+        except (TypeError, ValueError):
+            return 'team_id, points and counts_as_ball must be integers'
+        # Set End events belong to no team.
+        if team_id not in team_ids and not (event_type == 'Set End' and team_id == 0):
+            return f'Event {client_event_id} is for a team not playing this match'
+        parsed.append((client_event_id, team_id, points, event_type.strip(), 1 if counts_as_ball else 0))
+    return parsed
+
+@app.route('/admin/matches/<int:match_id>/events:batch', methods=['POST'])
+@admin_required
+def log_event_batch(match_id):
+    """
+    Logs an ordered batch of score events in one transaction. Each event
+    carries a client-generated id, so a batch retried after a timeout never
+    counts an event twice. Returns the match's scores after the batch.
+    """
+    conn = get_db_connection()
+    match = conn.execute('SELECT class1_id, class2_id FROM matches WHERE id = ?', (match_id,)).fetchone()
+    conn.close()
+    if match is None:
+        return jsonify({'error': 'Match not found'}), 404
+    events = parse_score_events((request.get_json(silent=True) or {}).get('events'),
+                                {match['class1_id'], match['class2_id']})
+    if isinstance(events, str):
+        return jsonify({'error': events}), 400
+
+    def write(conn):
+        return [client_event_id for client_event_id, team_id, points, event_type, counts_as_ball in events
+                if log_score_event(conn, match_id, team_id, points, event_type, counts_as_ball, client_event_id) is None]
+    # The snapshot folds the set state, saving it with the new events.
+    duplicates, snapshot = write_score_events(match_id, write)
+    return jsonify(dict(snapshot, accepted=len(events) - len(duplicates), duplicates=duplicates))
+
 @app.route('/admin/matches/<int:match_id>/log-event', methods=['POST'])
 @admin_required
 def log_manual_event(match_id):
     """Logs a manual, non-scoring event from the HTML form."""
     team_id = request.form.get('team_id')
     event_description = request.form.get('event_description')
-    if not all([team_id, event_description]):
+    event_id, error = parse_event_id(request.form.get('event_id'))
+    if error:
+        flash(error, 'danger')
+    elif not all([team_id, event_description]):
         flash('Team and event description are required.', 'danger')
     else:
-        conn = get_db_connection()
-        conn.execute(
-            'INSERT INTO score_log (match_id, team_id, points_scored, event_type, counts_as_ball) VALUES (?, ?, ?, ?, ?)',
-            (match_id, team_id, 0, event_description, 0)
-        )
-        conn.commit()
-        conn.close()
-        flash('Event logged successfully!', 'success')
+        logged, _ = write_score_events(match_id, lambda conn: log_score_event(conn, match_id, team_id, 0, event_description, 0, event_id))
+        if logged:
+            flash('Event logged successfully!', 'success')
+        else:
+            flash('That event was already logged.', 'info')
     return redirect(url_for('live_score_editor', match_id=match_id))
 
 @app.route('/admin/matches/<int:match_id>/finalize', methods=['POST'])
 @admin_required
 def finalize_match(match_id):
-    conn = get_db_connection()
-    match = conn.execute('SELECT * FROM matches WHERE id = ?', (match_id,)).fetchone()
-    sport_name = conn.execute('SELECT name FROM sports WHERE id = ?', (match['sport_id'],)).fetchone()['name']
-    config = SPORT_CONFIG.get(sport_name, SPORT_CONFIG['default'])
-    
-    winner_id = None
-    result_details_for_db = ""
+    def write(conn):
+        match = conn.execute('SELECT * FROM matches WHERE id = ?', (match_id,)).fetchone()
+        sport_name = conn.execute('SELECT name FROM sports WHERE id = ?', (match['sport_id'],)).fetchone()['name']
+        config = SPORT_CONFIG.get(sport_name, SPORT_CONFIG['default'])
+
+        winner_id = None
+        result_details_for_db = ""
+
+        if config['format'] == 'points':
+            stats1 = get_live_scores(conn, match_id, match['class1_id'])
+            stats2 = get_live_scores(conn, match_id, match['class2_id'])
+            winner_id = match['class1_id'] if stats1['score'] > stats2['score'] else match['class2_id']
+            winner_name = conn.execute('SELECT name FROM classes WHERE id = ?', (winner_id,)).fetchone()['name']
+            result_details_for_db = f"{winner_name} won"
+
+        elif config['format'] == 'sets_detailed':
+            scores = get_set_scores(conn, match_id, match['class1_id'], match['class2_id'])
+            class1_id = match['class1_id']
+            class2_id = match['class2_id']
 
-    if config['format'] == 'points':
-        stats1 = get_live_scores(conn, match_id, match['class1_id'])
-        stats2 = get_live_scores(conn, match_id, match['class2_id'])
-        winner_id = match['class1_id'] if stats1['score'] > stats2['score'] else match['class2_id']
-        winner_name = conn.execute('SELECT name FROM classes WHERE id = ?', (winner_id,)).fetchone()['name']
-        result_details_for_db = f"{winner_name} won"
-    
-    elif config['format'] == 'sets_detailed':
-        scores = get_set_scores(conn, match_id, match['class1_id'], match['class2_id'])
-        class1_id = match['class1_id']
-        class2_id = match['class2_id']
-        
-        if scores['current_set_scores'][class1_id] > 0 or scores['current_set_scores'][class2_id] > 0:
-            scores['completed_sets'].append(scores['current_set_scores'])
-            if scores['current_set_scores'][class1_id] > scores['current_set_scores'][class2_id]:
-                scores['sets_won'][class1_id] += 1
-            else:
-                scores['sets_won'][class2_id] += 1
-
-        winner_id = class1_id if scores['sets_won'][class1_id] > scores['sets_won'][class2_id] else class2_id
-        loser_id = class2_id if winner_id == class1_id else class1_id
-        winner_name = conn.execute('SELECT name FROM classes WHERE id = ?', (winner_id,)).fetchone()['name']
-        
-        set_scores_str = ', '.join([f"{s[class1_id]}-{s[class2_id]}" for s in scores['completed_sets']])
-        result_details_for_db = f"{winner_name} won {scores['sets_won'][winner_id]}-{scores['sets_won'][loser_id]} ({set_scores_str})"
-
-    conn.execute(
-        'UPDATE matches SET status = ?, winner_id = ?, result_details = ? WHERE id = ?',
-        ('COMPLETED', winner_id, result_details_for_db, match_id)
-    )
-    conn.commit()
-    conn.close()
-    
+            if scores['current_set_scores'][class1_id] > 0 or scores['current_set_scores'][class2_id] > 0:
+                scores['completed_sets'].append(scores['current_set_scores'])
+                if scores['current_set_scores'][class1_id] > scores['current_set_scores'][class2_id]:
+                    scores['sets_won'][class1_id] += 1
+                else:
+                    scores['sets_won'][class2_id] += 1
+
+            winner_id = class1_id if scores['sets_won'][class1_id] > scores['sets_won'][class2_id] else class2_id
+            loser_id = class2_id if winner_id == class1_id else class1_id
+            winner_name = conn.execute('SELECT name FROM classes WHERE id = ?', (winner_id,)).fetchone()['name']
+
+            set_scores_str = ', '.join([f"{s[class1_id]}-{s[class2_id]}" for s in scores['completed_sets']])
+            result_details_for_db = f"{winner_name} won {scores['sets_won'][winner_id]}-{scores['sets_won'][loser_id]} ({set_scores_str})"
+
+        conn.execute(
+            'UPDATE matches SET status = ?, winner_id = ?, result_details = ? WHERE id = ?',
+            ('COMPLETED', winner_id, result_details_for_db, match_id)
+        )
+        refresh_standings(conn, match['class1_id'], match['class2_id'])
+        return None, [match_id, advance_winner(conn, match_id)]
+    try:
+        write_match_state(write)
+    except BracketConflict as e:
+        flash(str(e), 'danger')
+        return redirect(url_for('live_score_editor', match_id=match_id))
     flash("Match finalized successfully.", 'success')
     return redirect(url_for('list_matches'))
 
 @app.route('/admin/matches/<int:match_id>/undo', methods=['POST'])
 @admin_required
 def undo_last_event(match_id):
-    conn = get_db_connection()
-    last_event = conn.execute(
-        'SELECT id FROM score_log WHERE match_id = ? ORDER BY created_at DESC, id DESC LIMIT 1',
-        (match_id,)
-    ).fetchone()
-    if last_event:
-        conn.execute('DELETE FROM score_log WHERE id = ?', (last_event['id'],))
-        conn.commit()
-        flash('Last event has been undone.', 'success')
+    undone, _ = write_score_events(match_id, lambda conn: void_last_event(conn, match_id))
+    if undone:
+        flash(f"Undid '{undone['event_type']}'.", 'success')
     else:
         flash('No event to undo.', 'warning')
-    conn.close()
     return redirect(url_for('live_score_editor', match_id=match_id))
 
+@app.route('/admin/matches/<int:match_id>/redo', methods=['POST'])
+@admin_required
+def redo_last_event(match_id):
+    redone, _ = write_score_events(match_id, lambda conn: restore_last_voided(conn, match_id))
+    if redone:
+        flash(f"Redid '{redone['event_type']}'.", 'success')
+    else:
+        flash('No undone event to redo.', 'warning')
+    return redirect(url_for('live_score_editor', match_id=match_id))
+
+# --- CLI COMMANDS ---
+@app.cli.command('rebuild-standings')
+def rebuild_standings_command():
+    """Recomputes the standings table and verifies it against the leaderboard query."""
+    conn = get_db_connection()
+    count = rebuild_standings(conn)
+    mismatches = verify_standings(conn)
+    if mismatches:
+        conn.rollback()
+        conn.close()
+        for name, expected, actual in mismatches:
+            print(f"Mismatch for {name}: expected {expected}, got {actual}")
+        raise SystemExit(1)
+    conn.commit()
+    conn.close()
+    print(f"Standings rebuilt and verified for {count} classes.")
+
+@app.cli.command('rebuild-score-totals')
+def rebuild_score_totals_command():
+    """Recomputes the running score totals and cricket over aggregates of every match from the score_log."""
+    conn = get_db_connection()
+    count = rebuild_match_totals(conn)
+    overs = rebuild_cricket_stats(conn)
+    conn.commit()
+    conn.close()
+    print(f"Score totals rebuilt for {count} teams and {overs} cricket overs.")
+
+@app.cli.command('process-images')
+def process_images_command():
+    """Creates the resized variants of every uploaded story and team photo."""
+    conn = get_db_connection()
+    filenames = [row[0] for row in conn.execute('SELECT filename FROM uploads WHERE ref_count > 0')]
+    conn.close()
+    futures = [queue_derivatives(filename, app.config['UPLOAD_FOLDER'], on_ready=image_processed) for filename in filenames]
+    if not futures or futures[0] is None:
+        print("Nothing to do: no uploads, or Pillow is not installed.")
+        return
+    processed = sum(1 for future in futures if future.result())
+    print(f"Processed {processed} of {len(futures)} uploaded images.")
+
+@app.cli.command('build-assets')
+def build_assets_command():
+    """Fingerprints and precompresses the static files. Run on deploy, before the app starts."""
+    print(f"Built {assets.build()} changed static file(s) into {assets.build_folder}.")
+
+@app.cli.command('gc-uploads')
+def gc_uploads_command():
+    """Deletes uploaded files (and their variants) that nothing has used for an hour."""
+    conn = get_db_connection()
+    removed = collect_garbage(conn, app.config['UPLOAD_FOLDER'], related_files=derivative_files)
+    conn.close()
+    print(f"Removed {len(removed)} unreferenced upload(s).")
+
+# --- CACHE INVALIDATION ---
+@app.before_request
+def check_for_changes():
+    """Drops cached pages and content made stale by writes from any worker process."""
+    if request.endpoint not in ('static', 'serve_asset'):
+        change_tracker.check(get_db_connection())
+
+
+@app.after_request
+def cache_uploads_forever(response):
+    """Content-addressed uploads never change under the same name."""
+    if request.endpoint == 'static' and response.status_code == 200 \
+            and CONTENT_ADDRESSED_UPLOAD.match(request.view_args.get('filename', '')):
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+        response.cache_control.immutable = True
+    return response
+
+
 # --- CONTEXT PROCESSOR ---
+def read_announcement():
+    """Returns the current site-wide announcement text."""
+    return content_store.get(get_db_connection(), 'announcement').strip()
+
+
 @app.context_processor
 def inject_announcement():
     """Injects the announcement text into all templates."""
-    announcement_file = 'announcement.txt'
-    announcement = ""
-    if os.path.exists(announcement_file):
-        with open(announcement_file, 'r') as f:
-            announcement = f.read().strip()
-    return dict(announcement=announcement)
+    return dict(announcement=read_announcement())
 
 
 # --- ERROR HANDLERS ---
@@ -1040,6 +1591,12 @@ def handle_404(e):
     """Renders a custom 404 Not Found page."""
     return render_template('public/404.html'), 404
 
+@app.errorhandler(413)
+def handle_413(e):
+    """Sends an oversized upload back to its form instead of failing the request."""
+    flash(f"Uploads are limited to {app.config['MAX_UPLOAD_BYTES'] // (1024 * 1024)} MB.", 'danger')
+    return redirect(request.url)
+
 @app.errorhandler(500)
 def handle_500(e):
     """Renders a custom 500 Internal Server Error page."""
@@ -0,0 +1,251 @@
+"""
+Query plan check.
+
+Builds a scratch database, drives every route through the Flask test client
+while recording each SQL statement the app issues, then runs EXPLAIN QUERY
+PLAN on all of them. Exits with status 1 if any route fails or any statement
+makes SQLite fall back to a full table SCAN of anything but the small lookup
+tables.
+
+Statements run by triggers never reach the trace callback, so the body of
+every trigger in the schema is checked as well, with its NEW and OLD column
+references replaced by NULL.
+
+    python check_query_plans.py
+"""
+import io
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import utils.db
+
+# Tables bounded by the number of classes, sports or committee members. They
+# are read whole on purpose, so scanning them is expected.
+SMALL_TABLES = {'classes', 'sports', 'rounds', 'standings', 'team_members', 'schema_version', 'sqlite_master'}
+
+_SQL_KEYWORDS = {
+    'where', 'join', 'left', 'inner', 'cross', 'on', 'order', 'group', 'limit', 'union',
+    'as', 'set', 'values', 'select', 'natural', 'using', 'having', 'window',
+}
+_TABLE_REF = re.compile(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', re.IGNORECASE)
+_SCAN = re.compile(r'^SCAN (\w+)(.*)$')
+_TRIGGER_BODY = re.compile(r'\bBEGIN\b(.*)\bEND\s*$', re.IGNORECASE | re.DOTALL)
+_TRIGGER_ROW = re.compile(r'\b(?:NEW|OLD)\.\w+', re.IGNORECASE)
+
+
+def build_database(db_path):
+    """Creates, migrates and seeds a scratch database."""
+    from setup_database import setup_database
+    from seed.seed import clear_and_seed
+
+    sys.stdout, stdout = io.StringIO(), sys.stdout
+    try:
+        setup_database(db_path)
+        conn = sqlite3.connect(db_path)
+        clear_and_seed(conn.cursor())
+        conn.commit()
+        conn.close()
+    finally:
+        sys.stdout = stdout
+
+
+def exercise_routes(client, db_path):
+    """
+    Walks through a small tournament: scoring, results, content and every
+    page. Returns (method, url, status) for every request that failed.
+    """
+    with client.session_transaction() as session:
+        session['role'] = 'admin'
+
+    failed = []
+
+    def request(method, url, **kwargs):
+        response = client.open(url, method=method, **kwargs)
+        if response.status_code >= 400:
+            failed.append((method, url, response.status_code))
+        return response
+
+    def get(url):
+        return request('GET', url)
+
+    def post(url, **kwargs):
+        return request('POST', url, **kwargs)
+
+    conn = sqlite3.connect(db_path)
+    sports = dict(conn.execute('SELECT name, id FROM sports').fetchall())
+    conn.close()
+
+    def last_id(table):
+        conn = sqlite3.connect(db_path)
+        row_id = conn.execute(f'SELECT MAX(id) FROM {table}').fetchone()[0]
+        conn.close()
+        return row_id
+
+    post('/admin/rounds/new', data={'sport_id': sports['Cricket Boys'], 'name': 'Final', 'round_type': 'FINAL'})
+    cricket_round = last_id('rounds')
+    post('/admin/rounds/new', data={'sport_id': sports['Volleyball'], 'name': 'Semis', 'round_type': 'SEMI_FINAL'})
+    volleyball_round = last_id('rounds')
+
+    post('/admin/matches/new', data={'round_id': cricket_round, 'class1_id': 1, 'class2_id': 2, 'match_time': '2025-01-10T10:00'})
+    cricket = last_id('matches')
+    post('/admin/matches/new', data={'round_id': volleyball_round, 'class1_id': 3, 'class2_id': 4, 'match_time': '2025-01-10T12:00'})
+    volleyball = last_id('matches')
+    post('/admin/matches/new', data={'round_id': volleyball_round, 'class1_id': 5, 'class2_id': 6, 'match_time': '2025-01-11T12:00'})
+    walkover = last_id('matches')
+    post('/admin/rounds/new', data={'sport_id': sports['Volleyball'], 'name': 'Final', 'round_type': 'FINAL'})
+    post('/admin/matches/new', data={'round_id': last_id('rounds'), 'class1_id': 3, 'class2_id': 5, 'match_time': '2025-01-12T12:00'})
+    volleyball_final = last_id('matches')
+
+    live = {'status': 'LIVE', 'result_details': '', 'winner_id': '', 'notes': '', 'scorecard_url': ''}
+    post(f'/admin/matches/{cricket}/edit', data=live)
+    post(f'/admin/matches/{volleyball}/edit', data=dict(live, next_match_id=volleyball_final, next_slot=1))
+    post(f'/admin/matches/{walkover}/edit', data=dict(live, status='UPCOMING', next_match_id=volleyball_final, next_slot=2))
+    post('/admin/matches/add-score', json={'match_id': cricket, 'team_id': 1, 'points': 4, 'event_type': 'Boundary', 'counts_as_ball': 1})
+    post('/admin/matches/log-complex-event', json={
+        'match_id': cricket, 'team_id': 2,
+        'base_event': {'points': 1, 'type': 'Wide', 'counts_as_ball': 0},
+        'extra_runs': {'points': 1, 'type': 'Runs', 'counts_as_ball': 1},
+    })
+    post(f'/admin/matches/{cricket}/log-event', data={'team_id': 1, 'event_description': 'Great catch'})
+    batch = {'events': [{'id': 'plan-1', 'team_id': 1, 'points': 1, 'type': 'Runs', 'counts_as_ball': 1}]}
+    post(f'/admin/matches/{cricket}/events:batch', json=batch)
+    post(f'/admin/matches/{cricket}/events:batch', json=batch)
+    post('/admin/matches/add-score', json={'match_id': cricket, 'team_id': 1, 'points': 0, 'event_type': 'Wicket', 'counts_as_ball': 1})
+    post(f'/admin/matches/{volleyball}/events:batch', json={'events': [{'id': 'plan-2', 'team_id': 3, 'points': 1, 'type': 'Point'}]})
+    post('/admin/matches/add-score-set', json={'match_id': volleyball, 'team_id': 3})
+    post('/admin/matches/end-set', data={'match_id': volleyball})
+    post('/admin/matches/add-score-set', json={'match_id': volleyball, 'team_id': 4})
+    post(f'/admin/matches/{volleyball}/undo')
+    post(f'/admin/matches/{volleyball}/redo')
+    post(f'/admin/matches/{volleyball}/undo')
+    post(f'/admin/matches/{cricket}/undo')
+
+    get_urls = [
+        '/', '/leaderboard', '/matches', f'/matches?sport_id={sports["Cricket Boys"]}', '/matches?class_id=1',
+        f'/matches/{cricket}', f'/matches/{volleyball}', f'/api/match-scores/{cricket}',
+        f'/api/live-scores?ids={cricket},{volleyball}', '/api/live-scores?status=LIVE',
+        '/api/schedule?from=2025-01-09&to=2025-01-12',
+        '/brackets', f'/brackets/{sports["Cricket Boys"]}',
+        f'/brackets/{sports["Volleyball"]}', f'/api/brackets/{sports["Volleyball"]}',
+        f'/api/matches/{cricket}/events?after=0&limit=2', f'/api/matches/{volleyball}/events?after=2',
+        f'/api/matches/{cricket}/cricket-stats', '/about', '/stories', '/class-log/1',
+        '/admin/dashboard', '/admin/matches', f'/admin/matches/{cricket}/edit', f'/admin/matches/{cricket}/live',
+        f'/admin/matches/{volleyball}/live', '/admin/rounds', f'/admin/rounds/{cricket_round}/edit',
+        '/admin/adjustments', '/admin/stories', '/admin/team', '/admin/announcement',
+        '/api/matches?limit=1', f'/api/matches?limit=1&sport_id={sports["Volleyball"]}', '/api/stories?limit=1',
+        '/admin/api/matches?limit=1', '/admin/api/stories?limit=1', '/admin/api/adjustments?limit=1',
+        '/search?q=bcom', '/api/search?q=volley',
+    ]
+    for url in get_urls:
+        get(url)
+
+    post(f'/admin/matches/{cricket}/finalize')
+    post(f'/admin/matches/{volleyball}/finalize')
+    post(f'/admin/matches/{walkover}/walkover', data={'loser_id': 6})
+    post('/admin/adjustments', data={'class_id': 7, 'points': '2', 'reason': 'Fair play'})
+    post(f'/admin/adjustments/{last_id("point_adjustments")}/delete')
+    post(f'/admin/rounds/{cricket_round}/edit', data={'name': 'Grand Final', 'round_type': 'FINAL'})
+    post('/admin/stories/new', data={'title': 'Opening day', 'content': 'A great start.', 'author': 'Desk'})
+    post(f'/admin/stories/{last_id("stories")}/edit', data={'title': 'Opening day', 'content': 'An even greater start.', 'author': 'Desk'})
+    post('/admin/team/new', data={'name': 'Asha', 'role': 'Coordinator'})
+    post('/admin/standings/rebuild')
+    for url in get_urls:
+        get(url)
+    # Follow each "load more" chain to exercise the cursor queries.
+    for url in [url for url in get_urls if 'limit=1' in url]:
+        while url:
+            url = get(url).get_json()['next_url']
+    post(f'/admin/matches/{walkover}/delete')
+    return failed
+
+
+def full_scans(conn, statement, tables):
+    """Returns the tables a statement scans without using any index."""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(statement):
+        aliases[table] = table
+        if alias and alias.lower() not in _SQL_KEYWORDS:
+            aliases[alias] = table
+    scanned = []
+    for row in conn.execute('EXPLAIN QUERY PLAN ' + statement).fetchall():
+        match = _SCAN.match(row[3])
+        # Virtual tables (the FTS5 search index) report their own index lookups as a SCAN.
+        if match is None or 'USING' in match.group(2) or 'VIRTUAL TABLE' in match.group(2):
+            continue
+        table = aliases.get(match.group(1), match.group(1))
+        if table in tables and table not in SMALL_TABLES:
+            scanned.append(table)
+    return scanned
+
+
+def trigger_statements(conn):
+    """Returns the statements in the bodies of every trigger in the schema."""
+    statements = []
+    for (sql,) in conn.execute("SELECT sql FROM sqlite_master WHERE type = 'trigger'"):
+        body = _TRIGGER_BODY.search(sql)
+        if body:
+            statements += [_TRIGGER_ROW.sub('NULL', part) for part in body.group(1).split(';') if part.strip()]
+    return statements
+
+
+def main():
+    workdir = tempfile.mkdtemp()
+    db_path = os.path.join(workdir, 'plans.db')
+    try:
+        build_database(db_path)
+        utils.db.DB_PATH = db_path
+        utils.db.release_all()
+
+        from app import app, score_writer
+        app.config['TESTING'] = True
+        statements = []
+        # Routes running on this thread reuse its pooled connection.
+        utils.db.get_db_connection().set_trace_callback(statements.append)
+
+        def traced_connection():
+            conn = utils.db.open_connection()
+            conn.set_trace_callback(statements.append)
+            return conn
+        # Scoring writes run on the score writer's own thread and connection.
+        score_writer.connect = traced_connection
+        sys.stdout, stdout = io.StringIO(), sys.stdout
+        try:
+            failed_routes = exercise_routes(app.test_client(), db_path)
+        finally:
+            sys.stdout = stdout
+        utils.db.release_all()
+
+        conn = sqlite3.connect(db_path)
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        seen = set()
+        failures = []
+        for statement in statements + trigger_statements(conn):
+            statement = ' '.join(statement.split())
+            if statement in seen or not re.match(r'(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b', statement, re.IGNORECASE):
+                continue
+            seen.add(statement)
+            scanned = full_scans(conn, statement, tables)
+            if scanned:
+                failures.append((scanned, statement))
+        conn.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    for method, url, status in failed_routes:
+        print(f"{method} {url} returned {status}.")
+    print(f"Checked the query plans of {len(seen)} distinct statements.")
+    for scanned, statement in failures:
+        print(f"\nFULL SCAN of {', '.join(sorted(set(scanned)))}:\n    {statement}")
+    if failures:
+        print(f"\n{len(failures)} statement(s) fall back to a full table scan.")
+    if failures or failed_routes:
+        sys.exit(1)
+    print("No full table scans found.")
+
+
+if __name__ == '__main__':
+    main()
@@ -7,4 +7,18 @@ import os
 
 SECRET_KEY = os.environ.get('SECRET_KEY', 'default-secret-key-for-dev')
 ADMIN_PASSCODE = os.environ.get('ADMIN_PASSCODE', 'docathon@2025')
-TIMEZONE = 'Asia/Kolkata'
\ No newline at end of file
+TIMEZONE = 'Asia/Kolkata'
+# Public page cache: number of rendered pages kept in memory, and how long
+# browsers may reuse a page before checking again (seconds).
+PAGE_CACHE_SIZE = 256
+PAGE_CACHE_MAX_AGE = 10
+
+# Uploads: largest single photo accepted, and the hard cap on a whole request
+# body, which Flask enforces before reading it.
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+MAX_CONTENT_LENGTH = 12 * 1024 * 1024
+
+# Score writer: score events arriving within this many seconds of each other
+# are committed together, up to this many per transaction.
+SCORE_WRITER_BATCH_WINDOW = 0.005
+SCORE_WRITER_MAX_BATCH = 100
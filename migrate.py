@@ -0,0 +1,98 @@
+import importlib
+import os
+import sqlite3
+import sys
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(APP_ROOT, 'db', 'docathon.db')
+
+# Every migration in the order it must run. To change the schema, add a new
+# migration_XXX.py with an upgrade(conn) function and append it here.
+MIGRATIONS = [
+    (1, 'migration_001'),
+    (2, 'migration_002'),
+    (3, 'migration_003'),
+    (4, 'migration_004'),
+    (5, 'migration_005'),
+    (6, 'migration_006'),
+    (7, 'migration_007'),
+    (8, 'migration_008'),
+    (9, 'migration_009'),
+    (10, 'migration_010'),
+    (11, 'migration_011'),
+    (12, 'migration_012'),
+    (13, 'migration_013'),
+    (14, 'migration_014'),
+    (15, 'migration_015'),
+    (16, 'migration_016'),
+    (17, 'migration_017'),
+    (18, 'migration_018'),
+    (19, 'migration_019'),
+    (20, 'migration_020'),
+    (21, 'migration_021'),
+    (22, 'migration_022'),
+    (23, 'migration_023'),
+    (24, 'migration_024'),
+    (25, 'migration_025'),
+]
+
+HEAD_VERSION = MIGRATIONS[-1][0]
+
+
+def get_schema_version(conn):
+    """Returns the newest migration recorded in schema_version, or 0 for an unversioned database."""
+    table = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'schema_version'").fetchone()
+    if table is None:
+        return 0
+    return conn.execute('SELECT IFNULL(MAX(version), 0) FROM schema_version').fetchone()[0]
+
+
+def migrate(db_path=DB_PATH):
+    """
+    Brings the database up to the newest migration in a single transaction.
+    Databases migrated by hand before schema_version existed start from 0;
+    every migration is idempotent, so re-applying them is safe.
+    Returns the list of versions that were applied.
+    """
+    if APP_ROOT not in sys.path:
+        sys.path.insert(0, APP_ROOT)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                name TEXT NOT NULL,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        current = get_schema_version(conn)
+        applied = []
+        for version, module_name in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"Applying {module_name}...")
+            importlib.import_module(module_name).upgrade(conn)
+            conn.execute('INSERT INTO schema_version (version, name) VALUES (?, ?)', (version, module_name))
+            applied.append(version)
+        conn.execute('COMMIT')
+        return applied
+    except Exception:
+        conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    print(f"Migrating database at: {DB_PATH}")
+    try:
+        applied = migrate()
+    except sqlite3.Error as e:
+        print(f"Migration failed, nothing was changed: {e}")
+        sys.exit(1)
+    if applied:
+        print(f"\nApplied {len(applied)} migration(s). Database is at version {HEAD_VERSION}.")
+    else:
+        print(f"Database is already at version {HEAD_VERSION}.")
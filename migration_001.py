@@ -1,39 +1,44 @@
 import sqlite3
 import os
 
-DB_PATH = os.path.join('db', 'docathon.db')
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
 
-def apply_migration():
+def upgrade(conn):
     """Applies the non-destructive migration for the live scoring feature."""
-    print(f"Connecting to database at: {DB_PATH}")
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
+    cursor = conn.cursor()
 
-        print("Creating score_log table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS score_log (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                match_id INTEGER NOT NULL,
-                team_id INTEGER NOT NULL,
-                points_scored INTEGER NOT NULL,
-                event_type TEXT NOT NULL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (match_id) REFERENCES matches (id),
-                FOREIGN KEY (team_id) REFERENCES classes (id)
-            )
-        """)
+    print("Creating score_log table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS score_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            points_scored INTEGER NOT NULL,
+            event_type TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (match_id) REFERENCES matches (id),
+            FOREIGN KEY (team_id) REFERENCES classes (id)
+        )
+    """)
 
-        print("Updating matches table...")
-        # Add live_match_state column if it doesn't exist
-        cursor.execute("PRAGMA table_info(matches)")
-        columns = [col[1] for col in cursor.fetchall()]
-        if 'live_match_state' not in columns:
-            cursor.execute("ALTER TABLE matches ADD COLUMN live_match_state TEXT")
-            print("Added 'live_match_state' column to matches table.")
-        else:
-            print("'live_match_state' column already exists.")
+    print("Updating matches table...")
+    # Add live_match_state column if it doesn't exist
+    cursor.execute("PRAGMA table_info(matches)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'live_match_state' not in columns:
+        cursor.execute("ALTER TABLE matches ADD COLUMN live_match_state TEXT")
+        print("Added 'live_match_state' column to matches table.")
+    else:
+        print("'live_match_state' column already exists.")
 
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
         conn.commit()
         print("\nMigration applied successfully!")
 
@@ -45,4 +50,4 @@ def apply_migration():
             print("Database connection closed.")
 
 if __name__ == '__main__':
-    apply_migration()
\ No newline at end of file
+    apply_migration()
@@ -1,26 +1,31 @@
 import sqlite3
 import os
 
-DB_PATH = os.path.join('db', 'docathon.db')
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
 
-def apply_migration():
+def upgrade(conn):
     """Adds the 'counts_as_ball' column to the score_log table for over tracking."""
+    cursor = conn.cursor()
+
+    print("Updating score_log table...")
+    # Add counts_as_ball column if it doesn't exist
+    cursor.execute("PRAGMA table_info(score_log)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'counts_as_ball' not in columns:
+        # Add the column with a default value of 0 for existing entries
+        cursor.execute("ALTER TABLE score_log ADD COLUMN counts_as_ball INTEGER NOT NULL DEFAULT 0")
+        print("Added 'counts_as_ball' column to score_log table.")
+    else:
+        print("'counts_as_ball' column already exists.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
     print(f"Connecting to database at: {DB_PATH}")
+    conn = None
     try:
         conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        print("Updating score_log table...")
-        # Add counts_as_ball column if it doesn't exist
-        cursor.execute("PRAGMA table_info(score_log)")
-        columns = [col[1] for col in cursor.fetchall()]
-        if 'counts_as_ball' not in columns:
-            # Add the column with a default value of 0 for existing entries
-            cursor.execute("ALTER TABLE score_log ADD COLUMN counts_as_ball INTEGER NOT NULL DEFAULT 0")
-            print("Added 'counts_as_ball' column to score_log table.")
-        else:
-            print("'counts_as_ball' column already exists.")
-
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
         conn.commit()
         print("\nMigration applied successfully!")
 
@@ -32,4 +37,4 @@ def apply_migration():
             print("Database connection closed.")
 
 if __name__ == '__main__':
-    apply_migration()
\ No newline at end of file
+    apply_migration()
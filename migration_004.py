@@ -1,27 +1,32 @@
 import sqlite3
 import os
 
-DB_PATH = os.path.join('db', 'docathon.db')
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
 
-def apply_migration():
+def upgrade(conn):
     """Adds the 'stories' table to the database."""
+    cursor = conn.cursor()
+
+    print("Creating 'stories' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS stories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            content TEXT NOT NULL,
+            author TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    print("'stories' table created or already exists.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
     print(f"Connecting to database at: {DB_PATH}")
+    conn = None
     try:
         conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        print("Creating 'stories' table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS stories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                content TEXT NOT NULL,
-                author TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
-        print("'stories' table created or already exists.")
-
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
         conn.commit()
         print("\nMigration applied successfully!")
 
@@ -33,4 +38,4 @@ def apply_migration():
             print("Database connection closed.")
 
 if __name__ == '__main__':
-    apply_migration()
\ No newline at end of file
+    apply_migration()
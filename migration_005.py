@@ -1,24 +1,29 @@
 import sqlite3
 import os
 
-DB_PATH = os.path.join('db', 'docathon.db')
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
 
-def apply_migration():
+def upgrade(conn):
     """Adds the 'image_filename' column to the stories table."""
+    cursor = conn.cursor()
+
+    print("Updating 'stories' table...")
+    cursor.execute("PRAGMA table_info(stories)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'image_filename' not in columns:
+        cursor.execute("ALTER TABLE stories ADD COLUMN image_filename TEXT")
+        print("Added 'image_filename' column to 'stories' table.")
+    else:
+        print("'image_filename' column already exists.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
     print(f"Connecting to database at: {DB_PATH}")
+    conn = None
     try:
         conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        print("Updating 'stories' table...")
-        cursor.execute("PRAGMA table_info(stories)")
-        columns = [col[1] for col in cursor.fetchall()]
-        if 'image_filename' not in columns:
-            cursor.execute("ALTER TABLE stories ADD COLUMN image_filename TEXT")
-            print("Added 'image_filename' column to 'stories' table.")
-        else:
-            print("'image_filename' column already exists.")
-
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
         conn.commit()
         print("\nMigration applied successfully!")
 
@@ -27,6 +32,7 @@ def apply_migration():
     finally:
         if conn:
             conn.close()
+            print("Database connection closed.")
 
 if __name__ == '__main__':
-    apply_migration()
\ No newline at end of file
+    apply_migration()
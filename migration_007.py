@@ -1,26 +1,31 @@
 import sqlite3
 import os
 
-DB_PATH = os.path.join('db', 'docathon.db')
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
 
-def apply_migration():
+def upgrade(conn):
     """Adds the 'team_members' table to the database."""
+    cursor = conn.cursor()
+
+    print("Creating 'team_members' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS team_members (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            role TEXT NOT NULL,
+            photo_filename TEXT
+        )
+    """)
+    print("'team_members' table created or already exists.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
     print(f"Connecting to database at: {DB_PATH}")
+    conn = None
     try:
         conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-
-        print("Creating 'team_members' table...")
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS team_members (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                role TEXT NOT NULL,
-                photo_filename TEXT
-            )
-        """)
-        print("'team_members' table created or already exists.")
-
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
         conn.commit()
         print("\nMigration applied successfully!")
 
@@ -29,6 +34,7 @@ def apply_migration():
     finally:
         if conn:
             conn.close()
+            print("Database connection closed.")
 
 if __name__ == '__main__':
-    apply_migration()
\ No newline at end of file
+    apply_migration()
@@ -0,0 +1,95 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# The standings of one class as this migration computed them. Kept here, not
+# imported, so the migration stays what it was when it shipped.
+_STANDINGS_QUERY = """
+    INSERT OR REPLACE INTO standings (
+        class_id, played, wins, losses,
+        tournament_points, participation_points, win_points, adjustment_points, total_points
+    )
+    WITH ClassMatches AS (
+        SELECT m.sport_id, m.winner_id, m.result_details, r.round_type
+        FROM matches m JOIN rounds r ON m.round_id = r.id
+        WHERE m.status = 'COMPLETED' AND m.class1_id = :class_id
+        UNION ALL
+        SELECT m.sport_id, m.winner_id, m.result_details, r.round_type
+        FROM matches m JOIN rounds r ON m.round_id = r.id
+        WHERE m.status = 'COMPLETED' AND m.class2_id = :class_id
+    ),
+    Totals AS (
+        SELECT
+            COUNT(*) AS played,
+            IFNULL(SUM(CASE WHEN winner_id = :class_id THEN 1 ELSE 0 END), 0) AS wins,
+            IFNULL(SUM(CASE WHEN winner_id IS NOT NULL AND winner_id != :class_id THEN 1 ELSE 0 END), 0) AS losses,
+            IFNULL(SUM(CASE
+                WHEN winner_id = :class_id AND round_type = 'FINAL' THEN 5
+                WHEN winner_id != :class_id AND round_type = 'FINAL' THEN 4
+                WHEN winner_id != :class_id AND round_type = 'SEMI_FINAL' THEN 3
+                WHEN winner_id != :class_id AND round_type = 'QUARTER_FINAL' THEN 2
+                ELSE 0
+            END), 0) AS tournament_points,
+            (SELECT COUNT(DISTINCT sport_id) FROM ClassMatches WHERE result_details NOT LIKE '%Walkover%') AS participation_points,
+            (SELECT COUNT(*) FROM matches
+             WHERE winner_id = :class_id AND status = 'COMPLETED'
+               AND result_details IS NOT NULL AND result_details != '' AND result_details NOT LIKE '%Walkover%') AS win_points,
+            (SELECT IFNULL(SUM(points), 0) FROM point_adjustments WHERE class_id = :class_id) AS adjustment_points
+        FROM ClassMatches
+    )
+    SELECT :class_id, played, wins, losses,
+           tournament_points, participation_points, win_points, adjustment_points,
+           tournament_points + participation_points + win_points + adjustment_points
+    FROM Totals
+"""
+
+def upgrade(conn):
+    """Adds the materialized 'standings' table and fills it from the existing results."""
+    cursor = conn.cursor()
+
+    print("Creating 'standings' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS standings (
+            class_id INTEGER PRIMARY KEY,
+            played INTEGER NOT NULL DEFAULT 0,
+            wins INTEGER NOT NULL DEFAULT 0,
+            losses INTEGER NOT NULL DEFAULT 0,
+            tournament_points INTEGER NOT NULL DEFAULT 0,
+            participation_points INTEGER NOT NULL DEFAULT 0,
+            win_points INTEGER NOT NULL DEFAULT 0,
+            adjustment_points INTEGER NOT NULL DEFAULT 0,
+            total_points INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (class_id) REFERENCES classes (id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_standings_rank ON standings (total_points DESC, wins DESC)")
+    print("'standings' table created or already exists.")
+
+    print("Rebuilding standings from match results...")
+    cursor.execute('DELETE FROM standings')
+    class_ids = [row[0] for row in cursor.execute('SELECT id FROM classes').fetchall()]
+    for class_id in class_ids:
+        cursor.execute(_STANDINGS_QUERY, {'class_id': class_id})
+    print(f"Standings computed for {len(class_ids)} classes.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,58 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """Adds the 'match_team_totals' running aggregate table and backfills it from score_log."""
+    cursor = conn.cursor()
+
+    print("Creating 'match_team_totals' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS match_team_totals (
+            match_id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            score INTEGER NOT NULL DEFAULT 0,
+            wickets INTEGER NOT NULL DEFAULT 0,
+            legal_balls INTEGER NOT NULL DEFAULT 0,
+            extras INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (match_id, team_id),
+            FOREIGN KEY (match_id) REFERENCES matches (id)
+        )
+    """)
+    print("'match_team_totals' table created or already exists.")
+
+    # The backfill as it was written for this version of score_log.
+    print("Backfilling totals from score_log...")
+    cursor.execute('DELETE FROM match_team_totals')
+    cursor.execute("""
+        INSERT INTO match_team_totals (match_id, team_id, score, wickets, legal_balls, extras)
+        SELECT match_id, team_id,
+               IFNULL(SUM(points_scored), 0),
+               SUM(CASE WHEN event_type = 'Wicket' THEN 1 ELSE 0 END),
+               IFNULL(SUM(counts_as_ball), 0),
+               IFNULL(SUM(CASE WHEN event_type IN ('Wide', 'No-Ball') THEN points_scored ELSE 0 END), 0)
+        FROM score_log
+        GROUP BY match_id, team_id
+    """)
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,43 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """Adds the 'match_set_state' table that caches folded set scores per match."""
+    cursor = conn.cursor()
+
+    print("Creating 'match_set_state' table...")
+    # Rows are rebuilt lazily from score_log, so no backfill is needed.
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS match_set_state (
+            match_id INTEGER PRIMARY KEY,
+            completed_sets TEXT NOT NULL DEFAULT '[]',
+            current_set TEXT NOT NULL DEFAULT '[0, 0]',
+            sets_won TEXT NOT NULL DEFAULT '[0, 0]',
+            last_event_id INTEGER NOT NULL DEFAULT 0,
+            FOREIGN KEY (match_id) REFERENCES matches (id)
+        )
+    """)
+    print("'match_set_state' table created or already exists.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,71 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """
+    Adds a 'version' counter to matches and the triggers that bump it on every
+    score_log write and match update. It backs the ETags of the score API.
+    """
+    cursor = conn.cursor()
+
+    print("Updating 'matches' table...")
+    cursor.execute("PRAGMA table_info(matches)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'version' not in columns:
+        cursor.execute("ALTER TABLE matches ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+        print("Added 'version' column to 'matches' table.")
+    else:
+        print("'version' column already exists.")
+
+    print("Creating version triggers...")
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_score_log_insert_version AFTER INSERT ON score_log
+        BEGIN
+            UPDATE matches SET version = version + 1 WHERE id = NEW.match_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_score_log_update_version AFTER UPDATE ON score_log
+        BEGIN
+            UPDATE matches SET version = version + 1 WHERE id = NEW.match_id;
+        END
+    """)
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_score_log_delete_version AFTER DELETE ON score_log
+        BEGIN
+            UPDATE matches SET version = version + 1 WHERE id = OLD.match_id;
+        END
+    """)
+    # The WHEN guard skips updates that already bumped the version (including
+    # the one this trigger issues), so the trigger never feeds itself.
+    cursor.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_matches_update_version AFTER UPDATE ON matches
+        WHEN NEW.version = OLD.version
+        BEGIN
+            UPDATE matches SET version = OLD.version + 1 WHERE id = NEW.id;
+        END
+    """)
+    print("Version triggers created or already exist.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,51 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# Secondary indexes for the queries every page and scoring request runs.
+INDEXES = [
+    ('idx_score_log_match_team', 'score_log (match_id, team_id)'),
+    ('idx_score_log_match_time', 'score_log (match_id, created_at, id)'),
+    ('idx_matches_status', 'matches (status)'),
+    ('idx_matches_sport', 'matches (sport_id)'),
+    ('idx_matches_round', 'matches (round_id)'),
+    ('idx_matches_class1', 'matches (class1_id)'),
+    ('idx_matches_class2', 'matches (class2_id)'),
+    ('idx_matches_winner', 'matches (winner_id)'),
+    ('idx_matches_match_time', 'matches (match_time)'),
+    ('idx_point_adjustments_class', 'point_adjustments (class_id)'),
+    ('idx_point_adjustments_created', 'point_adjustments (created_at)'),
+    ('idx_stories_created', 'stories (created_at)'),
+]
+
+def upgrade(conn):
+    """Adds the hot-path index pack and refreshes the planner statistics."""
+    cursor = conn.cursor()
+
+    print("Creating indexes...")
+    for name, target in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {target}")
+        print(f"Index '{name}' created or already exists.")
+    cursor.execute("ANALYZE")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
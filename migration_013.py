@@ -0,0 +1,40 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """
+    Replaces the plain match_time index with a covering schedule index, so
+    day-range lookups on the home page and schedule API never touch the table.
+    """
+    cursor = conn.cursor()
+
+    print("Creating schedule index...")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_matches_schedule
+        ON matches (match_time, status, sport_id, class1_id, class2_id, result_details)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_matches_match_time")
+    print("'idx_matches_schedule' created; 'idx_matches_match_time' dropped.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,70 @@
+import sqlite3
+import os
+
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_PATH = os.path.join(APP_ROOT, 'db', 'docathon.db')
+ANNOUNCEMENT_FILE = os.path.join(APP_ROOT, 'announcement.txt')
+
+# Bumps a site_content row past every other version, so MAX(version) changes
+# whenever any piece of site-wide content does.
+NEXT_VERSION = "(SELECT IFNULL(MAX(version), 0) + 1 FROM site_content)"
+
+def upgrade(conn):
+    """
+    Creates the 'site_content' table holding the announcement and the version
+    stamps of other small site-wide content, and imports any existing
+    announcement.txt into it.
+    """
+    cursor = conn.cursor()
+
+    print("Creating 'site_content' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS site_content (
+            key TEXT PRIMARY KEY,
+            value TEXT,
+            version INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_site_content_version ON site_content (version)")
+    print("'site_content' table created or already exists.")
+
+    announcement = ''
+    if os.path.exists(ANNOUNCEMENT_FILE):
+        with open(ANNOUNCEMENT_FILE, 'r') as f:
+            announcement = f.read().strip()
+    cursor.execute(f"INSERT OR IGNORE INTO site_content (key, value, version) VALUES ('announcement', ?, {NEXT_VERSION})",
+                   (announcement,))
+    cursor.execute(f"INSERT OR IGNORE INTO site_content (key, value, version) VALUES ('team_members', NULL, {NEXT_VERSION})")
+
+    print("Creating team_members content triggers...")
+    for action in ('INSERT', 'UPDATE', 'DELETE'):
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_team_members_{action.lower()}_content AFTER {action} ON team_members
+            BEGIN
+                UPDATE site_content SET version = {NEXT_VERSION}, updated_at = CURRENT_TIMESTAMP
+                WHERE key = 'team_members';
+            END
+        """)
+    print("Content triggers created or already exist.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
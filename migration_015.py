@@ -0,0 +1,81 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# Tables whose rows appear on cached pages or in cached content.
+TRACKED_TABLES = (
+    'classes', 'sports', 'rounds', 'standings', 'stories', 'team_members',
+    'point_adjustments', 'site_content',
+)
+# Columns of matches the public pages show. Score events only bump
+# matches.version, which should not invalidate anything.
+TRACKED_MATCH_COLUMNS = (
+    'sport_id', 'round_id', 'class1_id', 'class2_id', 'winner_id', 'result_details',
+    'status', 'match_time', 'notes', 'scorecard_url',
+)
+# change_log only needs to cover the gap between two requests of any worker.
+CHANGE_LOG_KEEP = 1000
+
+def _create_triggers(cursor, table, update_of=''):
+    row = {'INSERT': 'NEW.rowid', 'UPDATE': 'NEW.rowid', 'DELETE': 'OLD.rowid'}
+    for action, row_ref in row.items():
+        event = f'UPDATE OF {update_of}' if action == 'UPDATE' and update_of else action
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_{action.lower()}_change_log AFTER {event} ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, row_id) VALUES ('{table}', {row_ref});
+            END
+        """)
+
+def upgrade(conn):
+    """
+    Creates the 'change_log' table and the triggers that append a row to it
+    for every committed change to a tracked table. Each worker process reads
+    the new rows once per request to invalidate its in-memory caches.
+    """
+    cursor = conn.cursor()
+
+    print("Creating 'change_log' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_change_log_trim AFTER INSERT ON change_log
+        BEGIN
+            DELETE FROM change_log WHERE id <= NEW.id - {CHANGE_LOG_KEEP};
+        END
+    """)
+    print("'change_log' table created or already exists.")
+
+    print("Creating change_log triggers...")
+    for table in TRACKED_TABLES:
+        _create_triggers(cursor, table)
+    _create_triggers(cursor, 'matches', ', '.join(TRACKED_MATCH_COLUMNS))
+    print("change_log triggers created or already exist.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
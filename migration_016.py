@@ -0,0 +1,93 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# (table, column) pairs that reference an uploaded file.
+UPLOAD_REFERENCES = (('stories', 'image_filename'), ('team_members', 'photo_filename'))
+
+def _acquire(filename):
+    return f"""
+        INSERT INTO uploads (filename, ref_count) VALUES ({filename}, 1)
+        ON CONFLICT (filename) DO UPDATE SET ref_count = ref_count + 1, updated_at = CURRENT_TIMESTAMP;
+    """
+
+def _release(filename):
+    return f"UPDATE uploads SET ref_count = ref_count - 1, updated_at = CURRENT_TIMESTAMP WHERE filename = {filename};"
+
+def upgrade(conn):
+    """
+    Creates the 'uploads' table that reference-counts every stored upload,
+    the triggers that keep the counts in step with stories and team members,
+    and backfills it from the files already in use.
+    """
+    cursor = conn.cursor()
+
+    print("Creating 'uploads' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS uploads (
+            filename TEXT PRIMARY KEY,
+            size INTEGER,
+            ref_count INTEGER NOT NULL DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    # Only unreferenced uploads are ever looked up by age, by the GC pass.
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_uploads_unreferenced ON uploads (updated_at) WHERE ref_count <= 0")
+    print("'uploads' table created or already exists.")
+
+    print("Creating upload reference triggers...")
+    for table, column in UPLOAD_REFERENCES:
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_upload AFTER INSERT ON {table}
+            WHEN NEW.{column} IS NOT NULL
+            BEGIN {_acquire(f'NEW.{column}')} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_upload AFTER DELETE ON {table}
+            WHEN OLD.{column} IS NOT NULL
+            BEGIN {_release(f'OLD.{column}')} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_replace_upload AFTER UPDATE OF {column} ON {table}
+            WHEN OLD.{column} IS NOT NEW.{column}
+            BEGIN
+                {_release(f'OLD.{column}')}
+                INSERT INTO uploads (filename, ref_count) SELECT NEW.{column}, 1 WHERE NEW.{column} IS NOT NULL
+                ON CONFLICT (filename) DO UPDATE SET ref_count = ref_count + 1, updated_at = CURRENT_TIMESTAMP;
+            END
+        """)
+    print("Upload reference triggers created or already exist.")
+
+    print("Backfilling upload reference counts...")
+    references = ' UNION ALL '.join(
+        f"SELECT {column} AS filename FROM {table} WHERE {column} IS NOT NULL" for table, column in UPLOAD_REFERENCES
+    )
+    cursor.execute(f"""
+        INSERT INTO uploads (filename, ref_count)
+        SELECT filename, COUNT(*) FROM ({references}) WHERE true GROUP BY filename
+        ON CONFLICT (filename) DO UPDATE SET ref_count = excluded.ref_count
+    """)
+    print(f"Recorded {cursor.execute('SELECT COUNT(*) FROM uploads').fetchone()[0]} uploads.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,39 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """
+    Adds the (sort key, id) indexes behind the keyset-paginated listings, so
+    each page of matches is a short index range read, with or without a sport
+    filter. The sport index supersedes the plain sport_id one.
+    """
+    cursor = conn.cursor()
+
+    print("Creating listing indexes...")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_time_id ON matches (match_time, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_matches_sport_time_id ON matches (sport_id, match_time, id)")
+    cursor.execute("DROP INDEX IF EXISTS idx_matches_sport")
+    print("Listing indexes created; 'idx_matches_sport' dropped.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
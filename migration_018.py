@@ -0,0 +1,75 @@
+import sqlite3
+import os
+import html
+import re
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# A frozen copy of utils.stories.summarize as it was when this migration shipped.
+EXCERPT_LENGTH = 150
+WORDS_PER_MINUTE = 200
+
+_TAG = re.compile(r'<[^>]+>')
+
+def _summarize(content):
+    text = ' '.join(html.unescape(_TAG.sub(' ', content or '')).split())
+    word_count = len(text.split())
+    if len(text) > EXCERPT_LENGTH:
+        text = text[:EXCERPT_LENGTH].rsplit(' ', 1)[0].rstrip('.,;:') + '...'
+    return text, word_count, max(1, round(word_count / WORDS_PER_MINUTE))
+
+def upgrade(conn):
+    """
+    Adds the precomputed excerpt, word count and reading time to stories,
+    backfills them, and replaces the created_at index with one covering the
+    whole list projection, so the story list never reads a story body.
+    """
+    cursor = conn.cursor()
+
+    print("Updating 'stories' table...")
+    cursor.execute("PRAGMA table_info(stories)")
+    columns = [col[1] for col in cursor.fetchall()]
+    for column, definition in (('excerpt', "TEXT NOT NULL DEFAULT ''"),
+                               ('word_count', 'INTEGER NOT NULL DEFAULT 0'),
+                               ('reading_minutes', 'INTEGER NOT NULL DEFAULT 1')):
+        if column not in columns:
+            cursor.execute(f"ALTER TABLE stories ADD COLUMN {column} {definition}")
+            print(f"Added '{column}' column to 'stories' table.")
+        else:
+            print(f"'{column}' column already exists.")
+
+    print("Backfilling story summaries...")
+    stories = cursor.execute("SELECT id, content FROM stories").fetchall()
+    cursor.executemany(
+        "UPDATE stories SET excerpt = ?, word_count = ?, reading_minutes = ? WHERE id = ?",
+        [(*_summarize(story['content']), story['id']) for story in stories]
+    )
+    print(f"Summarized {len(stories)} stories.")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_stories_list
+        ON stories (created_at, id, title, author, image_filename, excerpt, reading_minutes)
+    """)
+    cursor.execute("DROP INDEX IF EXISTS idx_stories_created")
+    print("'idx_stories_list' created; 'idx_stories_created' dropped.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
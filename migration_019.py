@@ -0,0 +1,113 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# Every searchable row lives in one FTS5 table. Its rowid is the source id
+# times 8 plus a per-kind code, so triggers can replace one document directly.
+KIND_CODES = {'story': 1, 'match': 2, 'class': 3, 'sport': 4}
+SOURCE_TABLES = {'story': 'stories', 'match': 'matches', 'class': 'classes', 'sport': 'sports'}
+
+DOCUMENT_VIEWS = {
+    'story': """
+        SELECT s.id * 8 + 1 AS doc_id, 'story' AS kind, s.id AS ref_id, s.title AS title,
+               IFNULL(s.author, '') || ' ' || s.content AS body
+        FROM stories s
+    """,
+    'match': """
+        SELECT m.id * 8 + 2 AS doc_id, 'match' AS kind, m.id AS ref_id,
+               c1.name || ' vs ' || c2.name || ' ' || sp.name AS title,
+               IFNULL(m.result_details, '') || ' ' || IFNULL(m.notes, '') AS body
+        FROM matches m
+        JOIN classes c1 ON m.class1_id = c1.id
+        JOIN classes c2 ON m.class2_id = c2.id
+        JOIN sports sp ON m.sport_id = sp.id
+    """,
+    'class': "SELECT c.id * 8 + 3 AS doc_id, 'class' AS kind, c.id AS ref_id, c.name AS title, '' AS body FROM classes c",
+    'sport': "SELECT sp.id * 8 + 4 AS doc_id, 'sport' AS kind, sp.id AS ref_id, sp.name AS title, '' AS body FROM sports sp",
+}
+
+def _reindex(kind, ref_ids):
+    """Trigger body that replaces the documents of `kind` whose source ids are `ref_ids` (an SQL expression)."""
+    code = KIND_CODES[kind]
+    return f"""
+        DELETE FROM search_index WHERE rowid IN (SELECT id * 8 + {code} FROM {SOURCE_TABLES[kind]} WHERE id IN ({ref_ids}));
+        INSERT INTO search_index (rowid, kind, ref_id, title, body)
+        SELECT doc_id, kind, ref_id, title, body FROM search_{kind}_documents WHERE ref_id IN ({ref_ids});
+    """
+
+def upgrade(conn):
+    """
+    Creates the 'search_index' FTS5 table over stories, matches, classes and
+    sports, the triggers that keep it in sync, and fills it.
+    """
+    cursor = conn.cursor()
+
+    print("Creating 'search_index' table...")
+    cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+            kind UNINDEXED, ref_id UNINDEXED, title, body,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        )
+    """)
+    for kind, query in DOCUMENT_VIEWS.items():
+        cursor.execute(f"DROP VIEW IF EXISTS search_{kind}_documents")
+        cursor.execute(f"CREATE VIEW search_{kind}_documents AS {query}")
+    print("'search_index' table and document views created.")
+
+    print("Creating search triggers...")
+    triggers = {
+        'stories': ('INSERT', 'UPDATE OF title, content, author', [('story', 'NEW.id')]),
+        'matches': ('INSERT', 'UPDATE OF class1_id, class2_id, sport_id, result_details, notes', [('match', 'NEW.id')]),
+        'classes': ('INSERT', 'UPDATE OF name', [
+            ('class', 'NEW.id'),
+            ('match', 'SELECT id FROM matches WHERE class1_id = NEW.id UNION SELECT id FROM matches WHERE class2_id = NEW.id'),
+        ]),
+        'sports': ('INSERT', 'UPDATE OF name', [
+            ('sport', 'NEW.id'),
+            ('match', 'SELECT id FROM matches WHERE sport_id = NEW.id'),
+        ]),
+    }
+    for table, (insert, update, reindex) in triggers.items():
+        body = ''.join(_reindex(kind, ref_ids) for kind, ref_ids in reindex)
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_search AFTER {insert} ON {table} BEGIN {body} END")
+        cursor.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{table}_update_search AFTER {update} ON {table} BEGIN {body} END")
+    for kind, table in SOURCE_TABLES.items():
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_delete_search AFTER DELETE ON {table}
+            BEGIN
+                DELETE FROM search_index WHERE rowid = OLD.id * 8 + {KIND_CODES[kind]};
+            END
+        """)
+    print("Search triggers created or already exist.")
+
+    print("Building search index...")
+    cursor.execute("DELETE FROM search_index")
+    for kind in DOCUMENT_VIEWS:
+        cursor.execute(f"""
+            INSERT INTO search_index (rowid, kind, ref_id, title, body)
+            SELECT doc_id, kind, ref_id, title, body FROM search_{kind}_documents
+        """)
+    cursor.execute("INSERT INTO search_index (search_index) VALUES ('optimize')")
+    print(f"Indexed {cursor.execute('SELECT COUNT(*) FROM search_index').fetchone()[0]} documents.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,63 @@
+import sqlite3
+import os
+
+from migration_015 import TRACKED_MATCH_COLUMNS
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+BRACKET_COLUMNS = ('next_match_id', 'next_slot')
+
+def upgrade(conn):
+    """
+    Links each knockout match to the match its winner advances to, and the
+    slot (1 or 2) the winner takes there. A slot can be fed by one match only.
+    The columns are added to the matches change_log trigger so cached
+    brackets are rebuilt when a link changes.
+    """
+    cursor = conn.cursor()
+
+    print("Updating 'matches' table...")
+    cursor.execute("PRAGMA table_info(matches)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'next_match_id' not in columns:
+        cursor.execute("ALTER TABLE matches ADD COLUMN next_match_id INTEGER REFERENCES matches (id)")
+        print("Added 'next_match_id' column to 'matches' table.")
+    if 'next_slot' not in columns:
+        cursor.execute("ALTER TABLE matches ADD COLUMN next_slot INTEGER CHECK(next_slot IN (1, 2))")
+        print("Added 'next_slot' column to 'matches' table.")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_matches_next_slot ON matches (next_match_id, next_slot)
+        WHERE next_match_id IS NOT NULL
+    """)
+
+    print("Updating matches change_log trigger...")
+    cursor.execute("DROP TRIGGER IF EXISTS trg_matches_update_change_log")
+    cursor.execute(f"""
+        CREATE TRIGGER trg_matches_update_change_log
+        AFTER UPDATE OF {', '.join(TRACKED_MATCH_COLUMNS + BRACKET_COLUMNS)} ON matches
+        BEGIN
+            INSERT INTO change_log (table_name, row_id) VALUES ('matches', NEW.rowid);
+        END
+    """)
+    print("Bracket links added.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
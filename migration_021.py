@@ -0,0 +1,129 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# The ledger and standings of one class as this migration computes them. Kept
+# here, not imported, so later changes to the point rules leave it as it was.
+_CLASS_MATCHES = """
+    ClassMatches AS (
+        SELECT m.id, m.sport_id, m.winner_id, m.result_details, replace(m.match_time, 'T', ' ') AS match_time, r.round_type
+        FROM matches m JOIN rounds r ON m.round_id = r.id
+        WHERE m.status = 'COMPLETED' AND m.class1_id = :class_id
+        UNION ALL
+        SELECT m.id, m.sport_id, m.winner_id, m.result_details, replace(m.match_time, 'T', ' ') AS match_time, r.round_type
+        FROM matches m JOIN rounds r ON m.round_id = r.id
+        WHERE m.status = 'COMPLETED' AND m.class2_id = :class_id
+    )
+"""
+
+_LEDGER_QUERY = f"""
+    INSERT INTO points_ledger (class_id, kind, points, match_id, sport_id, adjustment_id, occurred_at)
+    WITH {_CLASS_MATCHES}
+    SELECT :class_id, 'TOURNAMENT', points, id, sport_id, NULL, match_time FROM (
+        SELECT id, sport_id, match_time, CASE
+            WHEN winner_id = :class_id AND round_type = 'FINAL' THEN 5
+            WHEN winner_id != :class_id AND round_type = 'FINAL' THEN 4
+            WHEN winner_id != :class_id AND round_type = 'SEMI_FINAL' THEN 3
+            WHEN winner_id != :class_id AND round_type = 'QUARTER_FINAL' THEN 2
+            ELSE 0
+        END AS points
+        FROM ClassMatches
+    ) WHERE points > 0
+    UNION ALL
+    SELECT :class_id, 'WIN', 1, id, sport_id, NULL, match_time FROM ClassMatches
+    WHERE winner_id = :class_id
+      AND result_details IS NOT NULL AND result_details != '' AND result_details NOT LIKE '%Walkover%'
+    UNION ALL
+    SELECT :class_id, 'PARTICIPATION', 1, id, sport_id, NULL, MIN(match_time) FROM ClassMatches
+    WHERE result_details NOT LIKE '%Walkover%'
+    GROUP BY sport_id
+    UNION ALL
+    SELECT :class_id, 'ADJUSTMENT', points, NULL, NULL, id, created_at FROM point_adjustments
+    WHERE class_id = :class_id
+"""
+
+_STANDINGS_QUERY = f"""
+    INSERT OR REPLACE INTO standings (
+        class_id, played, wins, losses,
+        tournament_points, participation_points, win_points, adjustment_points, total_points
+    )
+    WITH {_CLASS_MATCHES},
+    Results AS (
+        SELECT
+            COUNT(*) AS played,
+            IFNULL(SUM(CASE WHEN winner_id = :class_id THEN 1 ELSE 0 END), 0) AS wins,
+            IFNULL(SUM(CASE WHEN winner_id IS NOT NULL AND winner_id != :class_id THEN 1 ELSE 0 END), 0) AS losses
+        FROM ClassMatches
+    ),
+    Points AS (
+        SELECT
+            IFNULL(SUM(CASE WHEN kind = 'TOURNAMENT' THEN points END), 0) AS tournament_points,
+            IFNULL(SUM(CASE WHEN kind = 'PARTICIPATION' THEN points END), 0) AS participation_points,
+            IFNULL(SUM(CASE WHEN kind = 'WIN' THEN points END), 0) AS win_points,
+            IFNULL(SUM(CASE WHEN kind = 'ADJUSTMENT' THEN points END), 0) AS adjustment_points,
+            IFNULL(SUM(points), 0) AS total_points
+        FROM points_ledger WHERE class_id = :class_id
+    )
+    SELECT :class_id, played, wins, losses,
+           tournament_points, participation_points, win_points, adjustment_points, total_points
+    FROM Results, Points
+"""
+
+def upgrade(conn):
+    """
+    Creates the 'points_ledger' table, with one row per point-awarding fact,
+    and rebuilds the ledger and standings from it. The class index serves
+    both the per-class rewrite and the points log, newest first.
+    """
+    cursor = conn.cursor()
+
+    print("Creating 'points_ledger' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS points_ledger (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            class_id INTEGER NOT NULL,
+            kind TEXT NOT NULL CHECK(kind IN ('TOURNAMENT', 'WIN', 'PARTICIPATION', 'ADJUSTMENT')),
+            points INTEGER NOT NULL,
+            match_id INTEGER,
+            sport_id INTEGER,
+            adjustment_id INTEGER,
+            occurred_at TIMESTAMP,
+            FOREIGN KEY (class_id) REFERENCES classes (id),
+            FOREIGN KEY (match_id) REFERENCES matches (id),
+            FOREIGN KEY (sport_id) REFERENCES sports (id),
+            FOREIGN KEY (adjustment_id) REFERENCES point_adjustments (id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_points_ledger_class ON points_ledger (class_id, occurred_at)")
+    print("'points_ledger' table created or already exists.")
+
+    print("Rebuilding the ledger and standings...")
+    cursor.execute('DELETE FROM points_ledger')
+    cursor.execute('DELETE FROM standings')
+    class_ids = [row[0] for row in cursor.execute('SELECT id FROM classes').fetchall()]
+    for class_id in class_ids:
+        cursor.execute(_LEDGER_QUERY, {'class_id': class_id})
+        cursor.execute(_STANDINGS_QUERY, {'class_id': class_id})
+    print(f"Rebuilt the points of {len(class_ids)} classes.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
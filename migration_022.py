@@ -0,0 +1,46 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """
+    Adds the client-generated idempotency key to score_log. The unique index
+    makes a retried batch of score events insert each event at most once.
+    """
+    cursor = conn.cursor()
+
+    print("Updating score_log table...")
+    cursor.execute("PRAGMA table_info(score_log)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'client_event_id' not in columns:
+        cursor.execute("ALTER TABLE score_log ADD COLUMN client_event_id TEXT")
+        print("Added 'client_event_id' column to score_log table.")
+    else:
+        print("'client_event_id' column already exists.")
+    cursor.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_score_log_client_event ON score_log (match_id, client_event_id)
+        WHERE client_event_id IS NOT NULL
+    """)
+    print("'idx_score_log_client_event' created or already exists.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -0,0 +1,60 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """
+    Replaces deleting score events with append-only corrections. Undo and
+    redo append a VOID or RESTORE row to 'score_corrections', and the
+    'voided' flag on score_log holds the result for reads. The partial index
+    covers the events still in effect, in order, for every live read.
+    """
+    cursor = conn.cursor()
+
+    print("Updating score_log table...")
+    cursor.execute("PRAGMA table_info(score_log)")
+    columns = [col[1] for col in cursor.fetchall()]
+    if 'voided' not in columns:
+        cursor.execute("ALTER TABLE score_log ADD COLUMN voided INTEGER NOT NULL DEFAULT 0")
+        print("Added 'voided' column to score_log table.")
+    else:
+        print("'voided' column already exists.")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_score_log_live ON score_log (match_id, id) WHERE voided = 0")
+
+    print("Creating 'score_corrections' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS score_corrections (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER NOT NULL,
+            event_id INTEGER NOT NULL,
+            action TEXT NOT NULL CHECK(action IN ('VOID', 'RESTORE')),
+            last_event_id INTEGER NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (match_id) REFERENCES matches (id),
+            FOREIGN KEY (event_id) REFERENCES score_log (id)
+        )
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_score_corrections_match ON score_corrections (match_id, action)")
+    print("'score_corrections' table created or already exists.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
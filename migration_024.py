@@ -0,0 +1,82 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+def upgrade(conn):
+    """
+    Numbers every score event and correction of a match with one monotonic
+    per-match sequence ('matches.event_seq' holds the last number used), so
+    the event feed can return just what a client hasn't seen. Existing rows
+    are numbered in the order they were logged. The feed indexes cover
+    everything the feed reads.
+    """
+    cursor = conn.cursor()
+
+    print("Adding event sequence columns...")
+    for table, column, definition in (('matches', 'event_seq', 'INTEGER NOT NULL DEFAULT 0'),
+                                      ('score_log', 'seq', 'INTEGER'),
+                                      ('score_corrections', 'seq', 'INTEGER')):
+        cursor.execute(f"PRAGMA table_info({table})")
+        if column not in [col[1] for col in cursor.fetchall()]:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+            print(f"Added '{column}' column to '{table}' table.")
+        else:
+            print(f"'{column}' column already exists on '{table}'.")
+
+    print("Numbering existing events...")
+    cursor.execute("""
+        CREATE TEMP TABLE event_numbers AS
+        SELECT kind, id, match_id,
+               ROW_NUMBER() OVER (PARTITION BY match_id ORDER BY created_at, kind, id) AS seq
+        FROM (
+            SELECT 'event' AS kind, id, match_id, created_at FROM score_log
+            UNION ALL
+            SELECT 'fix' AS kind, id, match_id, created_at FROM score_corrections
+        )
+    """)
+    cursor.execute("""
+        UPDATE score_log SET seq = n.seq FROM temp.event_numbers n
+        WHERE n.kind = 'event' AND n.id = score_log.id
+    """)
+    cursor.execute("""
+        UPDATE score_corrections SET seq = n.seq FROM temp.event_numbers n
+        WHERE n.kind = 'fix' AND n.id = score_corrections.id
+    """)
+    cursor.execute("""
+        UPDATE matches SET event_seq = n.last_seq
+        FROM (SELECT match_id, MAX(seq) AS last_seq FROM temp.event_numbers GROUP BY match_id) n
+        WHERE n.match_id = matches.id
+    """)
+    cursor.execute("DROP TABLE temp.event_numbers")
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_score_log_feed
+        ON score_log (match_id, seq, team_id, points_scored, event_type)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_score_corrections_feed
+        ON score_corrections (match_id, seq, event_id, action)
+    """)
+    print("Feed indexes created or already exist.")
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
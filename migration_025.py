@@ -0,0 +1,107 @@
+import sqlite3
+import os
+
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db', 'docathon.db')
+
+# Running totals per team up to and including each event in effect, in log
+# order. Kept here, not imported, so the migration stays what it was when it
+# shipped.
+_DELIVERIES_CTE = """
+    WITH running AS (
+        SELECT id, match_id, team_id, points_scored, event_type, counts_as_ball,
+               SUM(counts_as_ball) OVER team_log - counts_as_ball AS balls_before,
+               SUM(points_scored) OVER team_log AS score_after,
+               SUM(event_type = 'Wicket') OVER team_log AS wickets_after
+        FROM score_log
+        WHERE voided = 0
+        WINDOW team_log AS (PARTITION BY match_id, team_id ORDER BY id ROWS UNBOUNDED PRECEDING)
+    ),
+    deliveries AS (
+        SELECT * FROM running
+        WHERE counts_as_ball != 0 OR event_type IN ('Wide', 'No-Ball')
+    )
+"""
+
+def upgrade(conn):
+    """
+    Adds the cricket aggregates: runs, extras, wickets and legal balls per
+    over of each team's innings in 'cricket_overs', and the team's score and
+    balls at the fall of each wicket in 'cricket_wickets'. Both are
+    backfilled from the score_log events still in effect.
+    """
+    cursor = conn.cursor()
+
+    print("Creating 'cricket_overs' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cricket_overs (
+            match_id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            over_no INTEGER NOT NULL,
+            runs INTEGER NOT NULL DEFAULT 0,
+            extras INTEGER NOT NULL DEFAULT 0,
+            wickets INTEGER NOT NULL DEFAULT 0,
+            legal_balls INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (match_id, team_id, over_no),
+            FOREIGN KEY (match_id) REFERENCES matches (id)
+        )
+    """)
+    print("'cricket_overs' table created or already exists.")
+
+    print("Creating 'cricket_wickets' table...")
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS cricket_wickets (
+            match_id INTEGER NOT NULL,
+            team_id INTEGER NOT NULL,
+            wicket_no INTEGER NOT NULL,
+            event_id INTEGER NOT NULL UNIQUE,
+            score INTEGER NOT NULL,
+            legal_balls INTEGER NOT NULL,
+            PRIMARY KEY (match_id, team_id, wicket_no),
+            FOREIGN KEY (match_id) REFERENCES matches (id),
+            FOREIGN KEY (event_id) REFERENCES score_log (id)
+        )
+    """)
+    print("'cricket_wickets' table created or already exists.")
+
+    print("Backfilling cricket stats from score_log...")
+    cursor.execute('DELETE FROM cricket_overs')
+    cursor.execute('DELETE FROM cricket_wickets')
+    cursor.execute(f"""
+        {_DELIVERIES_CTE}
+        INSERT INTO cricket_overs (match_id, team_id, over_no, runs, extras, wickets, legal_balls)
+        SELECT match_id, team_id, balls_before / 6,
+               IFNULL(SUM(points_scored), 0),
+               IFNULL(SUM(CASE WHEN event_type IN ('Wide', 'No-Ball') THEN points_scored ELSE 0 END), 0),
+               SUM(event_type = 'Wicket'),
+               IFNULL(SUM(counts_as_ball), 0)
+        FROM deliveries
+        GROUP BY match_id, team_id, balls_before / 6
+    """)
+    cursor.execute(f"""
+        {_DELIVERIES_CTE}
+        INSERT INTO cricket_wickets (match_id, team_id, wicket_no, event_id, score, legal_balls)
+        SELECT match_id, team_id, wickets_after, id, IFNULL(score_after, 0), balls_before + counts_as_ball
+        FROM deliveries
+        WHERE event_type = 'Wicket'
+    """)
+
+def apply_migration():
+    """Applies only this migration. `python migrate.py` applies every pending one and records it."""
+    print(f"Connecting to database at: {DB_PATH}")
+    conn = None
+    try:
+        conn = sqlite3.connect(DB_PATH)
+        conn.row_factory = sqlite3.Row
+        upgrade(conn)
+        conn.commit()
+        print("\nMigration applied successfully!")
+
+    except sqlite3.Error as e:
+        print(f"An error occurred: {e}")
+    finally:
+        if conn:
+            conn.close()
+            print("Database connection closed.")
+
+if __name__ == '__main__':
+    apply_migration()
@@ -45,6 +45,19 @@ def clear_and_seed(cursor):
     cursor.executemany("INSERT INTO sports (name, has_scores) VALUES (?, ?)", sports_to_add)
     print(f"{len(sports_to_add)} sports seeded.")
 
+    # Give every new class an empty standings row so it shows on the leaderboard.
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'standings'")
+    if cursor.fetchone():
+        print("\nResetting standings...")
+        cursor.execute("DELETE FROM standings;")
+        cursor.execute("INSERT INTO standings (class_id) SELECT id FROM classes;")
+
+    # The ledger refers to the classes and sports cleared above.
+    cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'points_ledger'")
+    if cursor.fetchone():
+        print("Clearing points ledger...")
+        cursor.execute("DELETE FROM points_ledger;")
+
     print("\nRe-enabling foreign keys...")
     cursor.execute("PRAGMA foreign_keys = ON;")
 
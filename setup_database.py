@@ -1,22 +1,26 @@
 import sqlite3
 import os
 
+from migrate import migrate
+
 # Define the path for the database
-DB_FOLDER = 'db'
+APP_ROOT = os.path.dirname(os.path.abspath(__file__))
+DB_FOLDER = os.path.join(APP_ROOT, 'db')
 DB_NAME = 'docathon.db'
 DB_PATH = os.path.join(DB_FOLDER, DB_NAME)
-SCHEMA_PATH = 'schema.sql'
+SCHEMA_PATH = os.path.join(APP_ROOT, 'schema.sql')
 
-def setup_database():
-    """Creates the database and its tables based on the schema file."""
+def setup_database(db_path=DB_PATH):
+    """Creates the database and its tables based on the schema file, then applies all migrations."""
     # Ensure the db folder exists
-    os.makedirs(DB_FOLDER, exist_ok=True)
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
     
-    print(f"Setting up database at: {DB_PATH}")
+    print(f"Setting up database at: {db_path}")
     
+    conn = None
     try:
         # Connect to the database (this will create the file if it doesn't exist)
-        conn = sqlite3.connect(DB_PATH)
+        conn = sqlite3.connect(db_path)
         cursor = conn.cursor()
         
         # Read the schema file
@@ -31,10 +35,14 @@ def setup_database():
         
     except sqlite3.Error as e:
         print(f"An error occurred: {e}")
+        return
     finally:
         if conn:
             conn.close()
             print("Database connection closed.")
 
+    applied = migrate(db_path)
+    print(f"Applied {len(applied)} migration(s).")
+
 if __name__ == '__main__':
-    setup_database()
\ No newline at end of file
+    setup_database()
@@ -0,0 +1,25 @@
+// "Load more" links: <a href="next page" data-load-more="JSON URL" data-target="#list">.
+// The JSON holds the next rows already rendered as `html`, and `next_url` for
+// the page after that. Without JavaScript the link simply opens the next page.
+document.querySelectorAll('[data-load-more]').forEach((link) => {
+    link.addEventListener('click', async (event) => {
+        event.preventDefault();
+        if (link.classList.contains('disabled')) return;
+        link.classList.add('disabled');
+        try {
+            const response = await fetch(link.dataset.loadMore, { headers: { 'Accept': 'application/json' } });
+            if (!response.ok) throw new Error(`HTTP ${response.status}`);
+            const page = await response.json();
+            document.querySelector(link.dataset.target).insertAdjacentHTML('beforeend', page.html);
+            if (page.next_url) {
+                link.dataset.loadMore = page.next_url;
+                link.classList.remove('disabled');
+            } else {
+                link.remove();
+            }
+        } catch (error) {
+            console.error('Error loading more items:', error);
+            link.classList.remove('disabled');
+        }
+    });
+});
@@ -0,0 +1,155 @@
+"""
+Fingerprinted static assets.
+
+At deploy time, `flask build-assets` copies every file under static/, except
+user uploads and hidden files, into static/build/ under a name containing a
+hash of its content, with PNGs re-encoded more compactly and gzip (plus brotli, when
+the module is installed) variants of the text files written next to it.
+The app only loads the manifest of that build at startup, so workers never
+write to static/build/ themselves. Templates link to the assets through
+`asset_url`, and the /assets route serves them
+with a one-year immutable Cache-Control, so a returning visitor downloads
+nothing but the HTML until an asset actually changes.
+"""
+import gzip
+import hashlib
+import io
+import json
+import mimetypes
+import os
+import threading
+import uuid
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+BUILD_DIR = 'build'
+MANIFEST_NAME = 'manifest.json'
+SKIP_DIRS = {BUILD_DIR, 'uploads'}
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html', '.map'}
+# Content-Encoding -> suffix of the precompressed file, in order of preference.
+ENCODINGS = (('br', '.br'), ('gzip', '.gz'))
+
+
+def _write_atomic(path, data):
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def _optimized_png(data):
+    """Returns the PNG re-encoded with maximum compression, if that makes it smaller."""
+    if Image is None:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            out = io.BytesIO()
+            image.save(out, 'PNG', optimize=True)
+    except OSError:
+        return data
+    return out.getvalue() if out.tell() < len(data) else data
+
+
+class AssetManifest:
+    def __init__(self, static_folder):
+        self.static_folder = static_folder
+        self.build_folder = os.path.join(static_folder, BUILD_DIR)
+        self._lock = threading.Lock()
+        self._files = {}
+
+    def _sources(self):
+        for root, dirs, files in os.walk(self.static_folder):
+            dirs[:] = [d for d in dirs if not d.startswith('.')
+                       and not (root == self.static_folder and d in SKIP_DIRS)]
+            for name in files:
+                if name.startswith('.'):
+                    continue
+                path = os.path.join(root, name)
+                yield os.path.relpath(path, self.static_folder).replace(os.sep, '/'), path
+
+    def load(self):
+        """
+        Reads the manifest of the last build. Without one, every asset is
+        served from its plain static URL. Returns the number of assets found.
+        """
+        try:
+            with open(os.path.join(self.build_folder, MANIFEST_NAME)) as f:
+                files = json.load(f)
+        except (OSError, ValueError):
+            files = {}
+        with self._lock:
+            self._files = files
+        return len(files)
+
+    def build(self):
+        """
+        Fingerprints every static file that changed since the last build and
+        writes the manifest. Returns the number of files (re)built.
+        """
+        manifest_path = os.path.join(self.build_folder, MANIFEST_NAME)
+        try:
+            with open(manifest_path) as f:
+                previous = json.load(f)
+        except (OSError, ValueError):
+            previous = {}
+        os.makedirs(self.build_folder, exist_ok=True)
+
+        files, built = {}, 0
+        for logical, path in self._sources():
+            stat = os.stat(path)
+            entry = previous.get(logical)
+            if entry and entry['mtime'] == stat.st_mtime and entry['size'] == stat.st_size \
+                    and os.path.exists(os.path.join(self.build_folder, entry['hashed'])):
+                files[logical] = entry
+                continue
+            with open(path, 'rb') as f:
+                data = f.read()
+            stem, ext = os.path.splitext(logical)
+            hashed = f'{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}'
+            target = os.path.join(self.build_folder, hashed)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            if ext.lower() == '.png':
+                data = _optimized_png(data)
+            _write_atomic(target, data)
+            if ext.lower() in COMPRESSIBLE:
+                _write_atomic(target + '.gz', gzip.compress(data, compresslevel=9, mtime=0))
+                if brotli is not None:
+                    _write_atomic(target + '.br', brotli.compress(data))
+            files[logical] = {'hashed': hashed, 'mtime': stat.st_mtime, 'size': stat.st_size}
+            built += 1
+
+        if built or files.keys() != previous.keys():
+            _write_atomic(manifest_path, json.dumps(files, indent=2, sort_keys=True).encode())
+        with self._lock:
+            self._files = files
+        return built
+
+    def hashed_name(self, filename):
+        """Returns the fingerprinted name of a static file, or None if it isn't in the build."""
+        with self._lock:
+            entry = self._files.get(filename)
+        return entry['hashed'] if entry else None
+
+    def send(self, filename, accept_encodings):
+        """
+        Returns (path, mimetype, content_encoding) for a fingerprinted asset,
+        picking a precompressed variant the client accepts. Returns None if
+        the asset doesn't exist.
+        """
+        path = os.path.realpath(os.path.join(self.build_folder, filename))
+        if not path.startswith(os.path.realpath(self.build_folder) + os.sep) or not os.path.isfile(path):
+            return None
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        for encoding, suffix in ENCODINGS:
+            if encoding in accept_encodings and os.path.isfile(path + suffix):
+                return path + suffix, mimetype, encoding
+        return path, mimetype, None
+
@@ -0,0 +1,142 @@
+"""
+Bracket trees.
+
+Each match can name the match its winner advances to (`next_match_id`) and
+the slot it fills there (`next_slot`, see migration_020). `build_bracket`
+reads a sport's matches in one query and turns them into a tree: rounds in
+order, each match with its two teams, the matches feeding it and the match it
+feeds, with every round ordered so a match sits next to its sibling. The app
+caches one tree per sport until the change tracker reports a write to a table
+it reads, and renders the bracket page and `/api/brackets/<id>` from it.
+"""
+
+BRACKET_TABLES = frozenset({'sports', 'matches', 'rounds', 'classes'})
+
+_BRACKET_QUERY = """
+    SELECT m.id, m.round_id, r.name AS round_name, r.round_type, m.status, m.match_time,
+           m.result_details, m.winner_id, m.next_match_id, m.next_slot,
+           m.class1_id, c1.name AS class1_name, m.class2_id, c2.name AS class2_name
+    FROM matches m
+    JOIN rounds r ON m.round_id = r.id
+    JOIN classes c1 ON m.class1_id = c1.id
+    JOIN classes c2 ON m.class2_id = c2.id
+    WHERE m.sport_id = ?
+    ORDER BY r.id, m.id
+"""
+
+
+def build_bracket(conn, sport_id):
+    """
+    Returns a sport's bracket as a JSON-ready dict, or None if the sport
+    doesn't exist.
+    """
+    sport = conn.execute('SELECT id, name FROM sports WHERE id = ?', (sport_id,)).fetchone()
+    if sport is None:
+        return None
+    rounds, matches = {}, {}
+    for row in conn.execute(_BRACKET_QUERY, (sport_id,)):
+        teams = [
+            {'id': row[f'class{slot}_id'], 'name': row[f'class{slot}_name'],
+             'winner': row['winner_id'] == row[f'class{slot}_id']}
+            for slot in (1, 2)
+        ]
+        match = {
+            'id': row['id'], 'round_id': row['round_id'], 'status': row['status'],
+            'match_time': row['match_time'], 'result': row['result_details'], 'teams': teams,
+            'next_match_id': row['next_match_id'], 'next_slot': row['next_slot'],
+            'feeders': [None, None],
+        }
+        matches[row['id']] = match
+        rounds.setdefault(row['round_id'], {
+            'id': row['round_id'], 'name': row['round_name'], 'type': row['round_type'], 'matches': [],
+        })['matches'].append(match)
+
+    for match in matches.values():
+        parent = matches.get(match['next_match_id'])
+        if parent is not None:
+            parent['feeders'][match['next_slot'] - 1] = match['id']
+
+    # Order rounds from the last: a match follows the position of the match it
+    # feeds, so siblings end up adjacent and connectors line up.
+    positions = {}
+    for round_ in reversed(list(rounds.values())):
+        round_['matches'].sort(key=lambda m: (
+            (positions[m['next_match_id']], m['next_slot'], m['id'])
+            if m['next_match_id'] in positions else (len(matches), 0, m['id'])
+        ))
+        for position, match in enumerate(round_['matches']):
+            positions[match['id']] = position
+
+    return {
+        'sport': {'id': sport['id'], 'name': sport['name']},
+        'rounds': list(rounds.values()),
+        'finals': [m['id'] for m in matches.values() if m['next_match_id'] is None and any(m['feeders'])],
+    }
+
+
+def validate_link(conn, match_id, next_match_id, next_slot):
+    """
+    Checks that `match_id` may feed slot `next_slot` of `next_match_id`:
+    same sport, slot free, and no cycle. Returns an error message, or None.
+    """
+    if next_slot not in (1, 2):
+        return 'Choose which slot the winner takes in the next match.'
+    match = conn.execute('SELECT sport_id FROM matches WHERE id = ?', (match_id,)).fetchone()
+    target = conn.execute('SELECT sport_id FROM matches WHERE id = ?', (next_match_id,)).fetchone()
+    if match is None or target is None or target['sport_id'] != match['sport_id']:
+        return 'The next match must be a match of the same sport.'
+    taken = conn.execute(
+        'SELECT id FROM matches WHERE next_match_id = ? AND next_slot = ? AND id != ?',
+        (next_match_id, next_slot, match_id)
+    ).fetchone()
+    if taken is not None:
+        return f'That slot is already fed by match #{taken["id"]}.'
+    current = next_match_id
+    while current is not None:
+        if current == match_id:
+            return 'A match cannot advance into itself or an earlier match of its own path.'
+        row = conn.execute('SELECT next_match_id FROM matches WHERE id = ?', (current,)).fetchone()
+        current = row['next_match_id'] if row else None
+    return None
+
+
+class BracketConflict(Exception):
+    """Raised when a winner cannot take its slot in the next match."""
+
+
+def advance_winner(conn, match_id, previous=None):
+    """
+    Puts the winner of a completed match into its slot of the next match, if
+    that match hasn't started, replacing whichever team held the slot before.
+    `previous` is the match's (winner_id, next_match_id, next_slot) row from
+    before the write, so a winner moving to the other slot of the same match
+    swaps the two teams. A match always has both teams, so a cleared winner
+    stays in its slot until a new one replaces it. Does not commit. Returns
+    the id of the updated match, or None. Raises BracketConflict if the
+    winner already holds the other slot.
+    """
+    match = conn.execute(
+        'SELECT winner_id, next_match_id, next_slot FROM matches WHERE id = ?', (match_id,)
+    ).fetchone()
+    if match is None or match['winner_id'] is None or match['next_match_id'] is None:
+        return None
+    target = conn.execute(
+        'SELECT status, class1_id, class2_id FROM matches WHERE id = ?', (match['next_match_id'],)
+    ).fetchone()
+    if target is None or target['status'] != 'UPCOMING':
+        return None
+    column, other = ('class1_id', 'class2_id') if match['next_slot'] == 1 else ('class2_id', 'class1_id')
+    if target[column] == match['winner_id']:
+        return None
+    if target[other] == match['winner_id']:
+        moved = previous is not None and previous['winner_id'] == match['winner_id'] \
+            and previous['next_match_id'] == match['next_match_id'] and previous['next_slot'] != match['next_slot']
+        if not moved:
+            raise BracketConflict(f'The winner already plays in the other slot of match #{match["next_match_id"]}.')
+        conn.execute(
+            f'UPDATE matches SET {column} = ?, {other} = ? WHERE id = ?',
+            (match['winner_id'], target[column], match['next_match_id'])
+        )
+    else:
+        conn.execute(f'UPDATE matches SET {column} = ? WHERE id = ?', (match['winner_id'], match['next_match_id']))
+    return match['next_match_id']
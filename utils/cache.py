@@ -0,0 +1,137 @@
+"""
+Response cache for public pages.
+
+Rendered pages are kept in memory, keyed by route and arguments, together
+with the tables each page is built from. When the change tracker reports that
+one of those tables changed (in this or any other worker process), the pages
+depending on it are dropped. The cache is bounded (least recently used entries
+are evicted first), and concurrent misses for the same key are collapsed so a
+burst of requests right after a result is posted renders each page only once.
+"""
+import datetime
+import hashlib
+import threading
+from collections import OrderedDict, namedtuple
+from functools import wraps
+
+from flask import Response, make_response, request, session
+
+CachedPage = namedtuple('CachedPage', ['body', 'mimetype', 'etag'])
+
+# Every page shows the announcement from base.html.
+BASE_TABLES = frozenset({'site_content'})
+
+
+class ResponseCache:
+    def __init__(self, max_entries=256, max_age=10):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.generation = 0
+        self._entries = OrderedDict()
+        self._flights = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def invalidate(self, tables=None):
+        """Drops the entries built from any of `tables`, or every entry when `tables` is None."""
+        with self._lock:
+            self.generation += 1
+            if tables is None:
+                stale = list(self._entries)
+            else:
+                stale = [key for key, (_, depends_on) in self._entries.items() if depends_on & tables]
+            for key in stale:
+                del self._entries[key]
+            self.invalidations += len(stale)
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def get_or_build(self, key, build, depends_on=frozenset()):
+        """
+        Returns the cached value for `key`, calling `build` on a miss.
+        Only one thread builds a given key at a time; the others wait for it
+        and reuse its result. `build` returns (value, cacheable).
+        """
+        with self._lock:
+            value = self._lookup(key)
+            if value is not None:
+                return value
+            flight = self._flights.setdefault(key, threading.Lock())
+        with flight:
+            with self._lock:
+                value = self._lookup(key)
+                if value is not None:
+                    return value
+                self.misses += 1
+                generation = self.generation
+            try:
+                value, cacheable = build()
+                with self._lock:
+                    # An invalidation during the build may make the result stale; don't keep it.
+                    if cacheable and generation == self.generation:
+                        self._entries[key] = (value, frozenset(depends_on))
+                        while len(self._entries) > self.max_entries:
+                            self._entries.popitem(last=False)
+                            self.evictions += 1
+                return value
+            finally:
+                with self._lock:
+                    self._flights.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries), 'max_entries': self.max_entries,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            }
+
+    def cached_page(self, *tables):
+        """
+        Decorator that serves a public view from the cache, given the tables
+        the page reads. Admins and requests with pending flash messages always
+        get a freshly rendered page.
+        """
+        depends_on = BASE_TABLES | frozenset(tables)
+
+        def decorator(view):
+            @wraps(view)
+            def wrapped(*args, **kwargs):
+                if session.get('role') == 'admin' or '_flashes' in session:
+                    return view(*args, **kwargs)
+                # The date is part of the key because the home page lists today's matches.
+                key = (request.endpoint, tuple(sorted(kwargs.items())),
+                       tuple(sorted(request.args.items(multi=True))), datetime.date.today())
+
+                def build():
+                    response = make_response(view(*args, **kwargs))
+                    if response.status_code != 200 or response.is_streamed:
+                        return response, False
+                    body = response.get_data()
+                    page = CachedPage(body, response.mimetype, hashlib.md5(body).hexdigest())
+                    return page, True
+
+                page = self.get_or_build(key, build, depends_on)
+                if isinstance(page, Response):
+                    return page
+                if page.etag in request.if_none_match:
+                    response = Response(status=304)
+                else:
+                    response = Response(page.body, mimetype=page.mimetype)
+                response.set_etag(page.etag)
+                response.headers['Cache-Control'] = f'public, max-age={self.max_age}'
+                response.vary.add('Cookie')
+                return response
+            return wrapped
+        return decorator
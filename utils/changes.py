@@ -0,0 +1,60 @@
+"""
+Cross-process cache invalidation.
+
+Triggers append a row to `change_log` for every write to a table that feeds a
+cache (see migration_015). Each worker process remembers the newest id it has
+seen; once per request it compares that with MAX(id), and when another process
+(or this one) has committed changes it tells the registered caches which
+tables changed so they can drop only the entries built from them.
+"""
+import threading
+
+
+class ChangeTracker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._last_id = None
+        self._listeners = []
+
+    def register(self, listener):
+        """
+        Adds a callable invoked with the set of changed table names, or with
+        None when the change_log no longer covers the gap and every cache
+        should be dropped.
+        """
+        self._listeners.append(listener)
+
+    def record(self, conn, table, row_ids):
+        """
+        Appends change_log rows for changes to a table's rows that the
+        triggers cannot see, such as new files on disk for them. Does not
+        commit.
+        """
+        conn.executemany(
+            'INSERT INTO change_log (table_name, row_id) VALUES (?, ?)', [(table, row_id) for row_id in row_ids]
+        )
+
+    def check(self, conn):
+        """Invalidates the registered caches for changes committed since the last check."""
+        latest = conn.execute('SELECT MAX(id) FROM change_log').fetchone()[0] or 0
+        with self._lock:
+            last_id = self._last_id
+            if last_id is None:
+                # Nothing is cached before the first request of this process.
+                self._last_id = latest
+                return
+        if latest <= last_id:
+            return
+        oldest = conn.execute('SELECT MIN(id) FROM change_log').fetchone()[0]
+        if oldest is None or oldest > last_id + 1:
+            tables = None
+        else:
+            tables = {row[0] for row in conn.execute(
+                'SELECT DISTINCT table_name FROM change_log WHERE id > ? AND id <= ?', (last_id, latest)
+            )}
+        # Invalidate before advancing, so no request skips the check while
+        # stale entries are still being dropped.
+        for listener in self._listeners:
+            listener(tables)
+        with self._lock:
+            self._last_id = max(self._last_id, latest)
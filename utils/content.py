@@ -0,0 +1,58 @@
+"""
+In-memory store for small site-wide content.
+
+The announcement and the team member list are read on many pages but change
+rarely. They are kept in memory and dropped when the change tracker reports a
+write to `site_content` or `team_members`, so every worker process picks up
+an update on its next request without re-reading the database each render.
+"""
+import threading
+
+_NEXT_VERSION = "(SELECT IFNULL(MAX(version), 0) + 1 FROM site_content)"
+CONTENT_TABLES = frozenset({'site_content', 'team_members'})
+
+
+class ContentStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}
+        self._generation = 0
+
+    def invalidate(self, tables=None):
+        """Change tracker listener: drops the cached content if its tables changed."""
+        if tables is None or tables & CONTENT_TABLES:
+            with self._lock:
+                self._values = {}
+                self._generation += 1
+
+    def _cached(self, key, load):
+        with self._lock:
+            if key in self._values:
+                return self._values[key]
+            generation = self._generation
+        value = load()
+        with self._lock:
+            # Don't keep a value that may predate an invalidation that ran while loading.
+            if generation == self._generation:
+                self._values[key] = value
+        return value
+
+    def get(self, conn, key, default=''):
+        """Returns a text value from site_content."""
+        def load():
+            row = conn.execute('SELECT value FROM site_content WHERE key = ?', (key,)).fetchone()
+            return row['value'] if row is not None and row['value'] is not None else default
+        return self._cached(key, load)
+
+    def set(self, conn, key, value):
+        """Stores a text value and bumps its version. Does not commit."""
+        conn.execute(f"""
+            INSERT INTO site_content (key, value, version) VALUES (?, ?, {_NEXT_VERSION})
+            ON CONFLICT (key) DO UPDATE SET value = excluded.value, version = excluded.version,
+                                            updated_at = CURRENT_TIMESTAMP
+        """, (key, value))
+
+    def team_members(self, conn):
+        """Returns every team member ordered by name."""
+        return self._cached('team_members',
+                            lambda: conn.execute('SELECT * FROM team_members ORDER BY name').fetchall())
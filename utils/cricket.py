@@ -0,0 +1,202 @@
+"""
+Cricket statistics.
+
+Deliveries (events that count as a ball, plus wides and no-balls) are added
+up per over in `cricket_overs`, and every wicket is recorded in
+`cricket_wickets` with the team's score and balls at its fall (see
+migration_025). `utils.scoring` keeps both current through `apply_delivery`
+in the same transaction as the event, from the team's running totals, so
+logging, undoing or redoing a ball costs a few row updates. `cricket_stats`
+reads the aggregates back for run rates, partnerships and the over series
+without replaying the log; `rebuild_cricket_stats` recomputes them from it
+(`flask rebuild-score-totals`).
+"""
+EXTRA_EVENT_TYPES = ('Wide', 'No-Ball')
+BALLS_PER_OVER = 6
+
+# Placeholders for EXTRA_EVENT_TYPES in an IN list.
+_EXTRAS = ', '.join('?' for _ in EXTRA_EVENT_TYPES)
+
+_APPLY_OVER_QUERY = """
+    INSERT INTO cricket_overs (match_id, team_id, over_no, runs, extras, wickets, legal_balls)
+    VALUES (:match_id, :team_id, :over_no, :runs, :extras, :wickets, :legal_balls)
+    ON CONFLICT (match_id, team_id, over_no) DO UPDATE SET
+        runs = runs + excluded.runs,
+        extras = extras + excluded.extras,
+        wickets = wickets + excluded.wickets,
+        legal_balls = legal_balls + excluded.legal_balls
+"""
+
+
+def is_delivery(event_type, counts_as_ball):
+    return bool(counts_as_ball) or event_type in EXTRA_EVENT_TYPES
+
+
+def apply_delivery(conn, event_id, match_id, team_id, points, event_type, counts_as_ball, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) one event in the team's over and
+    wicket aggregates. Must run before `match_team_totals` is updated for the
+    event: the over and wicket number follow from the team's totals, since
+    only the newest event in effect is ever removed.
+    """
+    if not is_delivery(event_type, counts_as_ball):
+        return
+    points = int(points or 0)
+    counts_as_ball = int(counts_as_ball or 0)
+    before = conn.execute(
+        'SELECT score, wickets, legal_balls FROM match_team_totals WHERE match_id = ? AND team_id = ?',
+        (match_id, team_id)
+    ).fetchone()
+    score, wickets, legal_balls = tuple(before) if before else (0, 0, 0)
+    if sign < 0:
+        score -= points
+        legal_balls -= counts_as_ball
+    is_wicket = event_type == 'Wicket'
+    conn.execute(_APPLY_OVER_QUERY, {
+        'match_id': match_id,
+        'team_id': team_id,
+        'over_no': legal_balls // BALLS_PER_OVER,
+        'runs': sign * points,
+        'extras': sign * (points if event_type in EXTRA_EVENT_TYPES else 0),
+        'wickets': sign * int(is_wicket),
+        'legal_balls': sign * counts_as_ball,
+    })
+    if not is_wicket:
+        return
+    if sign > 0:
+        conn.execute("""
+            INSERT INTO cricket_wickets (match_id, team_id, wicket_no, event_id, score, legal_balls)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (match_id, team_id, wickets + 1, event_id, score + points, legal_balls + counts_as_ball))
+    else:
+        conn.execute('DELETE FROM cricket_wickets WHERE event_id = ?', (event_id,))
+
+
+def delete_match_stats(conn, match_id):
+    conn.execute('DELETE FROM cricket_overs WHERE match_id = ?', (match_id,))
+    conn.execute('DELETE FROM cricket_wickets WHERE match_id = ?', (match_id,))
+
+
+# Running totals per team up to and including each event in effect, in log
+# order. Takes EXTRA_EVENT_TYPES as its parameters.
+_DELIVERIES_CTE = f"""
+    WITH running AS (
+        SELECT id, match_id, team_id, points_scored, event_type, counts_as_ball,
+               SUM(counts_as_ball) OVER team_log - counts_as_ball AS balls_before,
+               SUM(points_scored) OVER team_log AS score_after,
+               SUM(event_type = 'Wicket') OVER team_log AS wickets_after
+        FROM score_log
+        WHERE voided = 0
+        WINDOW team_log AS (PARTITION BY match_id, team_id ORDER BY id ROWS UNBOUNDED PRECEDING)
+    ),
+    deliveries AS (
+        SELECT * FROM running
+        WHERE counts_as_ball != 0 OR event_type IN ({_EXTRAS})
+    )
+"""
+
+
+def rebuild_cricket_stats(conn):
+    """
+    Recomputes the over and wicket aggregates of every match from the
+    score_log. Does not commit. Returns the number of overs written.
+    """
+    conn.execute('DELETE FROM cricket_overs')
+    conn.execute('DELETE FROM cricket_wickets')
+    conn.execute(f"""
+        {_DELIVERIES_CTE}
+        INSERT INTO cricket_overs (match_id, team_id, over_no, runs, extras, wickets, legal_balls)
+        SELECT match_id, team_id, balls_before / {BALLS_PER_OVER},
+               IFNULL(SUM(points_scored), 0),
+               IFNULL(SUM(CASE WHEN event_type IN ({_EXTRAS}) THEN points_scored ELSE 0 END), 0),
+               SUM(event_type = 'Wicket'),
+               IFNULL(SUM(counts_as_ball), 0)
+        FROM deliveries
+        GROUP BY match_id, team_id, balls_before / {BALLS_PER_OVER}
+    """, EXTRA_EVENT_TYPES * 2)
+    conn.execute(f"""
+        {_DELIVERIES_CTE}
+        INSERT INTO cricket_wickets (match_id, team_id, wicket_no, event_id, score, legal_balls)
+        SELECT match_id, team_id, wickets_after, id, IFNULL(score_after, 0), balls_before + counts_as_ball
+        FROM deliveries
+        WHERE event_type = 'Wicket'
+    """, EXTRA_EVENT_TYPES)
+    return conn.execute('SELECT COUNT(*) FROM cricket_overs').fetchone()[0]
+
+
+def _run_rate(runs, balls):
+    return round(runs * BALLS_PER_OVER / balls, 2) if balls > 0 else None
+
+
+def _overs(balls):
+    return f'{balls // BALLS_PER_OVER}.{balls % BALLS_PER_OVER}'
+
+
+def cricket_stats(conn, match_id, team_ids, overs=None):
+    """
+    Returns per-team stats of a cricket match as a JSON-ready dict: score,
+    overs, current run rate, fall of wickets, partnerships (the last one still
+    unbroken), the runs of every over for a Manhattan chart and, for the team
+    batting second in a match of `overs` overs, the target and required rate.
+    """
+    totals = {row['team_id']: row for row in conn.execute(
+        'SELECT team_id, score, wickets, legal_balls, extras FROM match_team_totals WHERE match_id = ?',
+        (match_id,)
+    )}
+    over_rows = conn.execute("""
+        SELECT team_id, over_no, runs, extras, wickets, legal_balls FROM cricket_overs
+        WHERE match_id = ? ORDER BY team_id, over_no
+    """, (match_id,)).fetchall()
+    wicket_rows = conn.execute("""
+        SELECT team_id, wicket_no, score, legal_balls FROM cricket_wickets
+        WHERE match_id = ? ORDER BY team_id, wicket_no
+    """, (match_id,)).fetchall()
+    first = conn.execute(f"""
+        SELECT team_id FROM score_log
+        WHERE match_id = ? AND voided = 0 AND (counts_as_ball != 0 OR event_type IN ({_EXTRAS}))
+        ORDER BY id LIMIT 1
+    """, (match_id, *EXTRA_EVENT_TYPES)).fetchone()
+    batting_order = sorted(team_ids, key=lambda team_id: first is None or team_id != first['team_id'])
+
+    teams = {}
+    for team_id in batting_order:
+        total = totals.get(team_id)
+        score, wickets, balls, extras = (
+            (total['score'], total['wickets'], total['legal_balls'], total['extras']) if total else (0, 0, 0, 0)
+        )
+        fall_of_wickets, partnerships = [], []
+        previous_score = previous_balls = 0
+        for row in wicket_rows:
+            if row['team_id'] != team_id:
+                continue
+            fall_of_wickets.append({'wicket': row['wicket_no'], 'score': row['score'], 'overs': _overs(row['legal_balls'])})
+            partnerships.append({'runs': row['score'] - previous_score, 'balls': row['legal_balls'] - previous_balls})
+            previous_score, previous_balls = row['score'], row['legal_balls']
+        partnerships.append({'runs': score - previous_score, 'balls': balls - previous_balls, 'unbroken': True})
+        teams[team_id] = {
+            'score': score, 'wickets': wickets, 'extras': extras, 'overs': _overs(balls),
+            'run_rate': _run_rate(score, balls),
+            'overs_series': [
+                {'over': row['over_no'] + 1, 'runs': row['runs'], 'extras': row['extras'],
+                 'wickets': row['wickets'], 'balls': row['legal_balls']}
+                for row in over_rows if row['team_id'] == team_id
+            ],
+            'fall_of_wickets': fall_of_wickets,
+            'partnerships': partnerships,
+        }
+
+    # The chase starts with the second team's first delivery.
+    setting, chasing = (teams[team_id] for team_id in batting_order)
+    if overs and chasing['overs_series']:
+        target = setting['score'] + 1
+        balls_left = max(overs * BALLS_PER_OVER - sum(over['balls'] for over in chasing['overs_series']), 0)
+        chasing['target'] = target
+        chasing['runs_needed'] = max(target - chasing['score'], 0)
+        chasing['balls_left'] = balls_left
+        chasing['required_run_rate'] = _run_rate(chasing['runs_needed'], balls_left)
+
+    return {
+        'match_id': match_id, 'overs_limit': overs,
+        'batting_order': batting_order,
+        'teams': {str(team_id): stats for team_id, stats in teams.items()},
+    }
@@ -1,14 +1,88 @@
 import sqlite3
 import os
+import threading
+from flask import g, has_app_context
 
 # Get the absolute path to the directory where this file (db.py) is located
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # Construct the full path to the database file
 DB_PATH = os.path.join(BASE_DIR, '..', 'db', 'docathon.db')
 
-def get_db_connection():
-    """Establishes a connection to the database."""
-    conn = sqlite3.connect(DB_PATH)
+# Applied to every new connection. WAL lets spectators keep reading while a
+# scorer writes, and busy_timeout makes writers wait for the lock instead of
+# failing straight away with "database is locked".
+CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode = WAL',
+    'PRAGMA synchronous = NORMAL',
+    'PRAGMA busy_timeout = 5000',
+    'PRAGMA cache_size = -16000',
+    'PRAGMA mmap_size = 134217728',
+)
+
+_local = threading.local()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    A connection owned by one worker thread and reused across its requests.
+    `close()` only rolls back anything left uncommitted and hands the
+    connection back; `release_all` or the thread exiting closes it for real.
+    """
+
+    def close(self):
+        if self.in_transaction:
+            self.rollback()
+
+    def close_for_real(self):
+        super().close()
+
+
+def open_connection(factory=sqlite3.Connection):
+    """Opens a new, tuned connection to the database."""
+    conn = sqlite3.connect(DB_PATH, factory=factory, timeout=5)
     # This allows you to access columns by name (like a dictionary)
     conn.row_factory = sqlite3.Row
-    return conn
\ No newline at end of file
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def _thread_connection():
+    conn = getattr(_local, 'conn', None)
+    if conn is None:
+        conn = _local.conn = open_connection(factory=PooledConnection)
+    return conn
+
+
+def get_db_connection():
+    """
+    Returns the database connection for the current request.
+    Every call within one app context gets the same connection, and it is
+    released automatically when the context ends, even if a handler returns
+    early without closing it.
+    """
+    if not has_app_context():
+        return _thread_connection()
+    if '_db_conn' not in g:
+        g._db_conn = _thread_connection()
+    return g._db_conn
+
+
+def release_db_connection(exception=None):
+    """Teardown handler: rolls back any unfinished transaction of this request."""
+    conn = g.pop('_db_conn', None) if has_app_context() else None
+    if conn is not None:
+        conn.close()
+
+
+def release_all():
+    """Closes the current thread's pooled connection."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        _local.conn = None
+        conn.close_for_real()
+
+
+def init_app(app):
+    """Registers the connection teardown with the Flask app."""
+    app.teardown_appcontext(release_db_connection)
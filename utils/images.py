@@ -0,0 +1,155 @@
+"""
+Image derivatives for uploaded story and team photos.
+
+A background thread pool turns each stored upload into resized variants
+(thumb, card and full) in both WebP and JPEG, with EXIF metadata stripped and
+orientation applied. Templates call
+`responsive_image`, which emits a <picture> with `srcset` once the variants
+exist and falls back to the original upload until then.
+
+That original is public too, so `strip_metadata` re-saves it before it is
+stored without its EXIF, XMP and comment blocks (GPS position, camera
+serials), keeping only the orientation and colour profile.
+
+Pillow is optional: without it uploads are still saved and served as-is.
+"""
+import logging
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import url_for
+from markupsafe import Markup, escape
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# Variant name -> maximum width in pixels.
+VARIANTS = {'thumb': 320, 'card': 640, 'full': 1280}
+# File extension -> (Pillow format, save options). Not passing `exif` drops it.
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 6}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+# Pillow format of an upload -> options that re-save it as close to the
+# original as possible. JPEGs keep their quantization tables, so they are not
+# recompressed any further.
+STRIP_FORMATS = {
+    'JPEG': {'quality': 'keep', 'subsampling': 'keep', 'comment': b''},
+    'PNG': {'optimize': True},
+    'WEBP': {'quality': 90},
+}
+EXIF_ORIENTATION_TAG = 0x0112
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-derivatives')
+_ready = set()
+
+
+def strip_metadata(path):
+    """
+    Re-saves an uploaded JPEG, PNG or WebP photo in place without its
+    metadata, keeping the orientation and colour profile. Returns True if the
+    file changed. Other and animated files, unreadable ones and every file
+    when Pillow is missing are kept as they are.
+    """
+    if Image is None:
+        return False
+    try:
+        with Image.open(path) as image:
+            options = STRIP_FORMATS.get(image.format)
+            if options is None or getattr(image, 'n_frames', 1) > 1:
+                return False
+            image.load()
+            options = dict(options)
+            orientation = image.getexif().get(EXIF_ORIENTATION_TAG)
+            if orientation:
+                exif = Image.Exif()
+                exif[EXIF_ORIENTATION_TAG] = orientation
+                options['exif'] = exif.tobytes()
+            if image.info.get('icc_profile'):
+                options['icc_profile'] = image.info['icc_profile']
+            _write_atomic(path, lambda f: image.save(f, image.format, **options))
+    except (OSError, ValueError) as e:
+        logger.warning("Could not strip the metadata of %s: %s", path, e)
+        return False
+    return True
+
+
+def variant_name(filename, variant, ext):
+    stem = os.path.splitext(filename)[0]
+    return f'{stem}-{variant}.{ext}'
+
+
+def derivative_files(filename):
+    """Returns the names of every variant of an upload."""
+    return [variant_name(filename, variant, ext) for variant in VARIANTS for ext in FORMATS]
+
+
+def queue_derivatives(filename, upload_folder, on_ready=None):
+    """Processes an upload on the background pool. Returns the future, or None without Pillow."""
+    if Image is None:
+        return None
+    _ready.discard(filename)
+    future = _executor.submit(make_derivatives, filename, upload_folder)
+    if on_ready is not None:
+        future.add_done_callback(lambda f: f.result() and on_ready(filename))
+    return future
+
+
+def make_derivatives(filename, upload_folder):
+    """Writes every variant of an upload. Returns False if it isn't a readable image."""
+    try:
+        with Image.open(os.path.join(upload_folder, filename)) as source:
+            image = ImageOps.exif_transpose(source).convert('RGB')
+    except (OSError, ValueError) as e:
+        logger.warning("Could not process image %s: %s", filename, e)
+        return False
+    for variant, width in VARIANTS.items():
+        resized = image.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        for ext, (image_format, options) in FORMATS.items():
+            path = os.path.join(upload_folder, variant_name(filename, variant, ext))
+            _write_atomic(path, lambda f: resized.save(f, image_format, **options))
+    return True
+
+
+def _write_atomic(path, write):
+    """Writes a file via a temporary name so a half-written file is never served."""
+    tmp_path = f'{path}.{uuid.uuid4().hex}.tmp'
+    with open(tmp_path, 'wb') as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+
+def _has_derivatives(filename, upload_folder):
+    if filename in _ready:
+        return True
+    # The last variant written is the largest JPEG.
+    if os.path.exists(os.path.join(upload_folder, variant_name(filename, 'full', 'jpg'))):
+        _ready.add(filename)
+        return True
+    return False
+
+
+def responsive_image(filename, upload_folder, alt='', sizes='100vw', **attrs):
+    """Jinja helper: renders an uploaded image with WebP/JPEG srcsets when its variants exist."""
+    attributes = ''.join(f' {name.rstrip("_").replace("_", "-")}="{escape(value)}"' for name, value in attrs.items())
+    if not _has_derivatives(filename, upload_folder):
+        src = url_for('static', filename='uploads/' + filename)
+        return Markup(f'<img src="{src}" alt="{escape(alt)}" loading="lazy"{attributes}>')
+
+    def srcset(ext):
+        return ', '.join(
+            f"{url_for('static', filename='uploads/' + variant_name(filename, variant, ext))} {width}w"
+            for variant, width in VARIANTS.items()
+        )
+    fallback = url_for('static', filename='uploads/' + variant_name(filename, 'card', 'jpg'))
+    return Markup(
+        f'<picture><source type="image/webp" srcset="{srcset("webp")}" sizes="{escape(sizes)}">'
+        f'<img src="{fallback}" srcset="{srcset("jpg")}" sizes="{escape(sizes)}" alt="{escape(alt)}"'
+        f' loading="lazy"{attributes}></picture>'
+    )
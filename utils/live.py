@@ -0,0 +1,133 @@
+"""
+In-process publish/subscribe hub for live match updates.
+
+Scoring routes publish a fresh score snapshot for a match after they commit,
+and every open Server-Sent Events stream for that match receives it straight
+away. Each match keeps a short backlog of recent messages so a reconnecting
+client that sends `Last-Event-ID` only receives what it missed. A match's
+channel is dropped with its last subscriber; event ids are numbered across
+the whole hub, so a client resuming against a newer channel is sent a full
+snapshot instead. Streams end after STREAM_MAX_SECONDS, and the browser's
+automatic reconnect resumes them, so an abandoned connection cannot hold a
+worker thread forever.
+
+Only the streams served by the publishing process hear about an update, so
+with several workers the match page keeps polling slowly alongside its stream.
+"""
+import json
+import queue
+import threading
+import time
+from collections import deque
+
+HEARTBEAT_SECONDS = 15
+STREAM_MAX_SECONDS = 300
+BACKLOG_SIZE = 50
+
+
+class _MatchChannel:
+    def __init__(self, last_id):
+        self.last_id = last_id
+        # Every message of this match after this id is still in the backlog.
+        self.complete_after = last_id
+        self.backlog = deque(maxlen=BACKLOG_SIZE)
+        self.subscribers = set()
+
+
+class LiveHub:
+    """Fans out match updates to the subscribers of each match."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._channels = {}
+        self._last_id = 0
+
+    def publish(self, match_id, event, data):
+        """Sends a message to every subscriber of a match and returns its event id."""
+        with self._lock:
+            self._last_id += 1
+            channel = self._channels.get(match_id)
+            if channel is not None:
+                channel.last_id = self._last_id
+                message = (channel.last_id, event, data)
+                if len(channel.backlog) == channel.backlog.maxlen:
+                    channel.complete_after = channel.backlog[0][0]
+                channel.backlog.append(message)
+                for subscriber in channel.subscribers:
+                    subscriber.put(message)
+            return self._last_id
+
+    def subscribe(self, match_id, last_event_id=None):
+        """
+        Registers a new subscriber for a match.
+        Returns (queue, missed, up_to_date): `missed` holds the backlog messages
+        newer than `last_event_id`, and `up_to_date` is False when the client
+        is new or too far behind, meaning it needs a full snapshot first.
+        """
+        subscriber = queue.Queue()
+        with self._lock:
+            channel = self._channels.get(match_id)
+            if channel is None:
+                channel = self._channels[match_id] = _MatchChannel(self._last_id)
+            channel.subscribers.add(subscriber)
+            missed = []
+            up_to_date = False
+            if last_event_id is not None and channel.complete_after <= last_event_id <= channel.last_id:
+                missed = [message for message in channel.backlog if message[0] > last_event_id]
+                up_to_date = True
+            return subscriber, missed, up_to_date
+
+    def unsubscribe(self, match_id, subscriber):
+        with self._lock:
+            channel = self._channels.get(match_id)
+            if channel is not None:
+                channel.subscribers.discard(subscriber)
+                if not channel.subscribers:
+                    del self._channels[match_id]
+
+    def last_event_id(self, match_id):
+        with self._lock:
+            channel = self._channels.get(match_id)
+            return channel.last_id if channel is not None else self._last_id
+
+
+def format_sse(data, event=None, event_id=None):
+    """Encodes one Server-Sent Events message."""
+    lines = []
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    if event is not None:
+        lines.append(f'event: {event}')
+    lines.append(f'data: {json.dumps(data)}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def stream_messages(hub, match_id, subscription, snapshot):
+    """
+    Generator behind a match's SSE endpoint. `subscription` is the result of
+    `hub.subscribe`, taken before the snapshot was read so nothing published in
+    between is lost. Sends the snapshot (or only the missed messages on
+    resume), then every published message, with a comment line as a heartbeat
+    whenever the match is quiet, until STREAM_MAX_SECONDS have passed.
+    """
+    subscriber, missed, up_to_date = subscription
+    deadline = time.monotonic() + STREAM_MAX_SECONDS
+    try:
+        yield f'retry: {HEARTBEAT_SECONDS * 1000 // 3}\n\n'
+        if up_to_date:
+            for event_id, event, data in missed:
+                yield format_sse(data, event, event_id)
+        else:
+            yield format_sse(snapshot, 'scores', hub.last_event_id(match_id))
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            try:
+                event_id, event, data = subscriber.get(timeout=min(HEARTBEAT_SECONDS, remaining))
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            yield format_sse(data, event, event_id)
+    finally:
+        hub.unsubscribe(match_id, subscriber)
@@ -0,0 +1,65 @@
+"""
+Keyset (cursor) pagination.
+
+Listings are ordered newest first by a pair of columns such as
+(match_time, id), and each page starts strictly after the last row of the
+previous one. With an index on those columns every page is a short index
+range scan, however far down the list it is, and rows inserted while someone
+is paging never shift or duplicate what they see.
+"""
+import base64
+import json
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, size):
+    """Returns the key values in a cursor, or None for a missing or malformed one."""
+    if not token:
+        return None
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+    except ValueError:
+        return None
+    if not isinstance(values, list) or len(values) != size:
+        return None
+    # Only plain column values can be bound; anything else is a crafted cursor.
+    if any(isinstance(value, bool) or not isinstance(value, (str, int, float)) for value in values):
+        return None
+    return values
+
+
+def page_size(value, default=DEFAULT_PAGE_SIZE):
+    """Parses a requested page size, clamped to 1..MAX_PAGE_SIZE."""
+    try:
+        return max(1, min(int(value), MAX_PAGE_SIZE))
+    except (TypeError, ValueError):
+        return default
+
+
+def fetch_page(conn, query, conditions, params, key_columns, cursor, limit):
+    """
+    Runs one page of a listing. `query` is a SELECT up to (not including) its
+    WHERE clause, and must select the key columns under their bare names.
+    `key_columns` are the qualified columns to order by, descending.
+    Returns (rows, next_cursor), where next_cursor is None on the last page.
+    """
+    conditions, params = list(conditions), list(params)
+    after = decode_cursor(cursor, len(key_columns))
+    if after is not None:
+        conditions.append(f"({', '.join(key_columns)}) < ({', '.join('?' for _ in key_columns)})")
+        params.extend(after)
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY ' + ', '.join(f'{column} DESC' for column in key_columns) + ' LIMIT ?'
+    rows = conn.execute(query, params + [limit + 1]).fetchall()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[column.rsplit('.', 1)[-1]] for column in key_columns)
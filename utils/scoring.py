@@ -0,0 +1,316 @@
+"""
+Score logging helpers.
+
+Every write to `score_log` goes through `log_score_event`, `void_last_event`
+or `restore_last_voided` so that the running per-team aggregates in
+`match_team_totals` are updated in the same transaction as the event itself.
+Live score reads then fetch a single row instead of re-summing the log.
+Cricket deliveries also update the per-over aggregates of `utils.cricket`.
+
+Events are never deleted to correct a mistake. Undo appends a VOID row to
+`score_corrections` and redo a RESTORE row, and the event's `voided` flag
+records the outcome; everything that reads the log skips voided events.
+
+Events and corrections are numbered with a per-match sequence (`seq`, with
+the last number used kept in `matches.event_seq`), which `get_event_feed`
+uses to return only what a client hasn't seen yet.
+
+Set-based sports keep a folded state per match in `match_set_state`, with the
+id of the last score_log event it includes. Reads only fold the events logged
+after that id, and voiding or restoring an event adjusts the state by that
+one event instead of rebuilding it.
+"""
+import json
+
+from utils.cricket import EXTRA_EVENT_TYPES, apply_delivery, delete_match_stats
+
+_APPLY_TOTALS_QUERY = """
+    INSERT INTO match_team_totals (match_id, team_id, score, wickets, legal_balls, extras)
+    VALUES (:match_id, :team_id, :score, :wickets, :legal_balls, :extras)
+    ON CONFLICT (match_id, team_id) DO UPDATE SET
+        score = score + excluded.score,
+        wickets = wickets + excluded.wickets,
+        legal_balls = legal_balls + excluded.legal_balls,
+        extras = extras + excluded.extras
+"""
+
+
+def _apply_totals(conn, match_id, team_id, points, event_type, counts_as_ball, sign):
+    """Adds (sign=1) or removes (sign=-1) one event's contribution to the running totals."""
+    points = int(points or 0)
+    conn.execute(_APPLY_TOTALS_QUERY, {
+        'match_id': match_id,
+        'team_id': team_id,
+        'score': sign * points,
+        'wickets': sign * (1 if event_type == 'Wicket' else 0),
+        'legal_balls': sign * int(counts_as_ball or 0),
+        'extras': sign * (points if event_type in EXTRA_EVENT_TYPES else 0),
+    })
+
+
+# The sequence number the next event or correction of a match takes. It is
+# only claimed (by `_advance_seq`) once the row is actually inserted, so
+# ignored duplicates leave no gaps.
+_NEXT_SEQ = '(SELECT event_seq + 1 FROM matches WHERE id = ?)'
+
+
+def _advance_seq(conn, match_id):
+    conn.execute('UPDATE matches SET event_seq = event_seq + 1 WHERE id = ?', (match_id,))
+
+
+def log_score_event(conn, match_id, team_id, points, event_type, counts_as_ball, client_event_id=None):
+    """
+    Inserts a score_log event and updates the running totals. Returns the new
+    event id, or None if an event with the same `client_event_id` was already
+    logged for the match.
+    """
+    cursor = conn.execute(f"""
+        INSERT INTO score_log (match_id, team_id, points_scored, event_type, counts_as_ball, client_event_id, seq)
+        VALUES (?, ?, ?, ?, ?, ?, {_NEXT_SEQ})
+        ON CONFLICT (match_id, client_event_id) WHERE client_event_id IS NOT NULL DO NOTHING
+    """, (match_id, team_id, points, event_type, counts_as_ball, client_event_id, match_id))
+    if cursor.rowcount == 0:
+        return None
+    _advance_seq(conn, match_id)
+    apply_delivery(conn, cursor.lastrowid, match_id, team_id, points, event_type, counts_as_ball, 1)
+    _apply_totals(conn, match_id, team_id, points, event_type, counts_as_ball, 1)
+    return cursor.lastrowid
+
+
+def _fold_event(completed_sets, current_set, sets_won, event, sides):
+    """Applies one event to a set fold, in place."""
+    if event['event_type'] == 'Set End':
+        completed_sets.append(current_set[:])
+        sets_won[0 if current_set[0] > current_set[1] else 1] += 1
+        current_set[:] = [0, 0]
+    elif event['team_id'] in sides:
+        current_set[sides[event['team_id']]] += event['points_scored']
+
+
+def _unfold_event(completed_sets, current_set, sets_won, event, sides):
+    """Takes the most recently folded event back out of a set fold, in place. Returns False if it can't."""
+    if event['event_type'] == 'Set End':
+        if not completed_sets or current_set != [0, 0]:
+            return False
+        current_set[:] = completed_sets.pop()
+        sets_won[0 if current_set[0] > current_set[1] else 1] -= 1
+    elif event['team_id'] in sides:
+        current_set[sides[event['team_id']]] -= event['points_scored']
+    return True
+
+
+def _adjust_set_state(conn, event, sign):
+    """
+    Adds (sign=1) or removes (sign=-1) an event in the match's saved set fold.
+    Events past the fold need nothing: the next read folds them, or skips them
+    once voided. Only the newest event in effect is ever voided and only the
+    one right after it restored, so the delta lands at the end of the fold.
+    """
+    if event['event_type'] not in ('Point', 'Set End'):
+        return
+    state = conn.execute("""
+        SELECT s.completed_sets, s.current_set, s.sets_won, s.last_event_id, m.class1_id, m.class2_id
+        FROM match_set_state s JOIN matches m ON m.id = s.match_id
+        WHERE s.match_id = ?
+    """, (event['match_id'],)).fetchone()
+    if state is None or event['id'] > state['last_event_id']:
+        return
+    completed_sets = json.loads(state['completed_sets'])
+    current_set = json.loads(state['current_set'])
+    sets_won = json.loads(state['sets_won'])
+    sides = {state['class1_id']: 0, state['class2_id']: 1}
+    if sign > 0:
+        _fold_event(completed_sets, current_set, sets_won, event, sides)
+    elif not _unfold_event(completed_sets, current_set, sets_won, event, sides):
+        conn.execute('DELETE FROM match_set_state WHERE match_id = ?', (event['match_id'],))
+        return
+    conn.execute(
+        'UPDATE match_set_state SET completed_sets = ?, current_set = ?, sets_won = ? WHERE match_id = ?',
+        (json.dumps(completed_sets), json.dumps(current_set), json.dumps(sets_won), event['match_id'])
+    )
+
+
+def _correct_event(conn, event, action):
+    voided = 1 if action == 'VOID' else 0
+    conn.execute('UPDATE score_log SET voided = ? WHERE id = ?', (voided, event['id']))
+    conn.execute(f"""
+        INSERT INTO score_corrections (match_id, event_id, action, last_event_id, seq)
+        VALUES (?, ?, ?, (SELECT MAX(id) FROM score_log WHERE match_id = ?), {_NEXT_SEQ})
+    """, (event['match_id'], event['id'], action, event['match_id'], event['match_id']))
+    _advance_seq(conn, event['match_id'])
+    sign = -1 if voided else 1
+    apply_delivery(conn, event['id'], event['match_id'], event['team_id'], event['points_scored'],
+                   event['event_type'], event['counts_as_ball'], sign)
+    _apply_totals(conn, event['match_id'], event['team_id'], event['points_scored'],
+                  event['event_type'], event['counts_as_ball'], sign)
+    _adjust_set_state(conn, event, sign)
+
+
+_EVENT_COLUMNS = 'sl.id, sl.match_id, sl.team_id, sl.points_scored, sl.event_type, sl.counts_as_ball'
+
+
+def void_last_event(conn, match_id):
+    """Undo: voids the newest event still in effect. Returns the event, or None if there is none."""
+    event = conn.execute(f"""
+        SELECT {_EVENT_COLUMNS} FROM score_log sl
+        WHERE sl.match_id = ? AND sl.voided = 0
+        ORDER BY sl.id DESC LIMIT 1
+    """, (match_id,)).fetchone()
+    if event is not None:
+        _correct_event(conn, event, 'VOID')
+    return event
+
+
+def restore_last_voided(conn, match_id):
+    """
+    Redo: restores the most recently voided event, as long as no new event
+    has been logged since it was voided. Returns the event, or None.
+    """
+    event = conn.execute(f"""
+        SELECT {_EVENT_COLUMNS}, c.last_event_id FROM score_corrections c
+        JOIN score_log sl ON sl.id = c.event_id
+        WHERE c.match_id = ? AND c.action = 'VOID' AND sl.voided = 1
+        ORDER BY c.id DESC LIMIT 1
+    """, (match_id,)).fetchone()
+    if event is None:
+        return None
+    latest = conn.execute('SELECT MAX(id) FROM score_log WHERE match_id = ?', (match_id,)).fetchone()[0]
+    if latest != event['last_event_id']:
+        return None
+    _correct_event(conn, event, 'RESTORE')
+    return event
+
+
+_FEED_QUERY = """
+    SELECT seq, id, team_id, points_scored, event_type, NULL AS action
+    FROM score_log WHERE match_id = :match_id AND seq > :after
+    UNION ALL
+    SELECT c.seq, c.event_id, sl.team_id, sl.points_scored, sl.event_type, c.action
+    FROM score_corrections c JOIN score_log sl ON sl.id = c.event_id
+    WHERE c.match_id = :match_id AND c.seq > :after
+    ORDER BY seq
+    LIMIT :limit
+"""
+
+
+def get_event_feed(conn, match_id, after, limit):
+    """
+    Returns up to `limit` events and corrections of a match numbered after
+    `after`, in order, as compact dicts: new events carry their id, team,
+    points and type, and corrections add `op` ('void' or 'restore') for the
+    event they apply to. Returns (entries, has_more).
+    """
+    rows = conn.execute(_FEED_QUERY, {'match_id': match_id, 'after': after, 'limit': limit + 1}).fetchall()
+    entries = []
+    for row in rows[:limit]:
+        entry = {'seq': row['seq'], 'id': row['id'], 'team': row['team_id'],
+                 'points': row['points_scored'], 'type': row['event_type']}
+        if row['action'] is not None:
+            entry['op'] = row['action'].lower()
+        entries.append(entry)
+    return entries, len(rows) > limit
+
+
+def delete_match_events(conn, match_id):
+    """Removes every score_log event and running total for a match."""
+    delete_match_stats(conn, match_id)
+    conn.execute('DELETE FROM score_corrections WHERE match_id = ?', (match_id,))
+    conn.execute('DELETE FROM score_log WHERE match_id = ?', (match_id,))
+    conn.execute('DELETE FROM match_team_totals WHERE match_id = ?', (match_id,))
+    conn.execute('DELETE FROM match_set_state WHERE match_id = ?', (match_id,))
+
+
+def rebuild_match_totals(conn):
+    """
+    Recomputes `match_team_totals` for every match from the score_log. Does
+    not commit. Returns the number of team totals written.
+    """
+    conn.execute('DELETE FROM match_team_totals')
+    extras = ', '.join('?' for _ in EXTRA_EVENT_TYPES)
+    return conn.execute(f"""
+        INSERT INTO match_team_totals (match_id, team_id, score, wickets, legal_balls, extras)
+        SELECT match_id, team_id,
+               IFNULL(SUM(points_scored), 0),
+               SUM(CASE WHEN event_type = 'Wicket' THEN 1 ELSE 0 END),
+               IFNULL(SUM(counts_as_ball), 0),
+               IFNULL(SUM(CASE WHEN event_type IN ({extras}) THEN points_scored ELSE 0 END), 0)
+        FROM score_log
+        WHERE voided = 0
+        GROUP BY match_id, team_id
+    """, EXTRA_EVENT_TYPES).rowcount
+
+
+def _format_live_scores(score, wickets, balls_faced):
+    return {'score': score, 'wickets': wickets, 'overs': balls_faced // 6, 'balls': balls_faced % 6}
+
+
+def get_live_scores(conn, match_id, team_id):
+    """Returns point-based scores (Cricket, Basketball) from the running totals."""
+    row = conn.execute(
+        'SELECT score, wickets, legal_balls FROM match_team_totals WHERE match_id = ? AND team_id = ?',
+        (match_id, team_id)
+    ).fetchone()
+    if row is None:
+        return _format_live_scores(0, 0, 0)
+    return _format_live_scores(row['score'], row['wickets'], row['legal_balls'])
+
+
+def get_live_scores_for_matches(conn, match_ids):
+    """
+    Returns point-based scores for many matches with a single query, as a dict
+    keyed by (match_id, team_id). Teams with no events are simply absent.
+    """
+    match_ids = list(match_ids)
+    if not match_ids:
+        return {}
+    placeholders = ', '.join('?' for _ in match_ids)
+    rows = conn.execute(f"""
+        SELECT match_id, team_id, score, wickets, legal_balls FROM match_team_totals
+        WHERE match_id IN ({placeholders})
+    """, match_ids).fetchall()
+    return {
+        (row['match_id'], row['team_id']): _format_live_scores(row['score'], row['wickets'], row['legal_balls'])
+        for row in rows
+    }
+
+
+def get_set_scores(conn, match_id, class1_id, class2_id):
+    """
+    Returns set-based scores (Volleyball, Throwball).
+    Starts from the cached fold state and applies only the events logged since.
+    When called inside a write transaction the advanced state is saved, so the
+    scorer's own requests keep the cache current for everyone else.
+    """
+    state = conn.execute(
+        'SELECT completed_sets, current_set, sets_won, last_event_id FROM match_set_state WHERE match_id = ?', (match_id,)
+    ).fetchone()
+    if state is None:
+        completed_sets, current_set, sets_won, last_event_id = [], [0, 0], [0, 0], 0
+    else:
+        completed_sets = json.loads(state['completed_sets'])
+        current_set = json.loads(state['current_set'])
+        sets_won = json.loads(state['sets_won'])
+        last_event_id = state['last_event_id']
+
+    events = conn.execute("""
+        SELECT id, team_id, points_scored, event_type FROM score_log
+        WHERE match_id = ? AND voided = 0 AND id > ? AND event_type IN ('Point', 'Set End')
+        ORDER BY id ASC
+    """, (match_id, last_event_id)).fetchall()
+
+    sides = {int(class1_id): 0, int(class2_id): 1}
+    for event in events:
+        _fold_event(completed_sets, current_set, sets_won, event, sides)
+        last_event_id = event['id']
+
+    if events and conn.in_transaction:
+        conn.execute("""
+            INSERT OR REPLACE INTO match_set_state (match_id, completed_sets, current_set, sets_won, last_event_id)
+            VALUES (?, ?, ?, ?, ?)
+        """, (match_id, json.dumps(completed_sets), json.dumps(current_set), json.dumps(sets_won), last_event_id))
+
+    return {
+        'completed_sets': [{class1_id: a, class2_id: b} for a, b in completed_sets],
+        'current_set_scores': {class1_id: current_set[0], class2_id: current_set[1]},
+        'sets_won': {class1_id: sets_won[0], class2_id: sets_won[1]},
+    }
@@ -0,0 +1,56 @@
+"""
+Full-text search over stories, matches, classes and sports.
+
+Backed by the `search_index` FTS5 table (see migration_019), which triggers
+keep in sync with its source tables. Every word of a query is matched as a
+prefix, so "3 bco f" finds "3 BCOM F&I", and results are ranked with bm25,
+weighting titles above body text.
+"""
+import re
+
+from markupsafe import escape
+
+MAX_QUERY_LENGTH = 100
+MAX_RESULTS = 50
+# Private-use markers FTS5 puts around matches; swapped for <mark> after escaping.
+_OPEN, _CLOSE = '\ue000', '\ue001'
+_WORD = re.compile(r'\w+')
+
+_SEARCH_QUERY = f"""
+    SELECT kind, ref_id,
+           highlight(search_index, 2, '{_OPEN}', '{_CLOSE}') AS title,
+           snippet(search_index, 3, '{_OPEN}', '{_CLOSE}', '...', 16) AS snippet
+    FROM search_index
+    WHERE search_index MATCH ?
+    ORDER BY bm25(search_index, 0, 0, 10.0, 1.0)
+    LIMIT ?
+"""
+
+
+def build_match_query(text):
+    """Turns free text into an FTS5 query where every word is a prefix term, or None if it has no words."""
+    words = _WORD.findall((text or '')[:MAX_QUERY_LENGTH])
+    if not words:
+        return None
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def _highlighted(text):
+    return str(escape(text or '')).replace(_OPEN, '<mark>').replace(_CLOSE, '</mark>')
+
+
+def search(conn, text, limit=20):
+    """
+    Returns up to `limit` ranked results as dicts with kind, ref_id, and
+    HTML-safe `title` and `snippet` strings with matches wrapped in <mark>.
+    """
+    query = build_match_query(text)
+    if query is None:
+        return []
+    rows = conn.execute(_SEARCH_QUERY, (query, max(1, min(limit, MAX_RESULTS)))).fetchall()
+    return [{
+        'kind': row['kind'],
+        'ref_id': row['ref_id'],
+        'title': _highlighted(row['title']),
+        'snippet': _highlighted(row['snippet'].strip()),
+    } for row in rows]
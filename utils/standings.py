@@ -0,0 +1,242 @@
+"""
+Points ledger and materialized leaderboard standings.
+
+Every point a class earns is recorded in `points_ledger`: a tournament
+placing, participation in a sport, a win point or an adjustment (walkover
+penalties are adjustments too). The ledger is append-only. When a result or
+an adjustment changes or goes away, a compensating row is appended for the
+difference, so the ledger keeps the history of every correction and the net
+points of each fact are the sum of its rows. The `standings` table holds one
+row per class with everything the public leaderboard needs, its points summed
+from the ledger. Every write that can change a class's points calls
+`refresh_standings` for the affected classes inside the same transaction,
+which appends their ledger corrections and then refreshes their standings, so
+the leaderboard and the per-class points log only ever read indexed tables
+and always agree.
+"""
+
+# The reference leaderboard query. It is no longer used to serve pages, but
+# `verify_standings` compares the materialized table against it.
+LEADERBOARD_QUERY = """
+    WITH MatchParticipants AS (
+        SELECT m.id as match_id, m.sport_id, m.winner_id, m.result_details, r.round_type, c.id as class_id, c.name as class_name
+        FROM matches m JOIN rounds r ON m.round_id = r.id JOIN classes c ON m.class1_id = c.id WHERE m.status = 'COMPLETED'
+        UNION ALL
+        SELECT m.id as match_id, m.sport_id, m.winner_id, m.result_details, r.round_type, c.id as class_id, c.name as class_name
+        FROM matches m JOIN rounds r ON m.round_id = r.id JOIN classes c ON m.class2_id = c.id WHERE m.status = 'COMPLETED'
+    ),
+    ClassStats AS (
+        SELECT
+            c.id AS class_id, c.name AS class_name, COUNT(mp.match_id) AS played,
+            SUM(CASE WHEN mp.winner_id = c.id THEN 1 ELSE 0 END) AS wins,
+            SUM(CASE WHEN mp.winner_id IS NOT NULL AND mp.winner_id != c.id THEN 1 ELSE 0 END) AS losses,
+            SUM(CASE
+                WHEN mp.winner_id = c.id AND mp.round_type = 'FINAL' THEN 5
+                WHEN mp.winner_id != c.id AND mp.round_type = 'FINAL' THEN 4
+                WHEN mp.winner_id != c.id AND mp.round_type = 'SEMI_FINAL' THEN 3
+                WHEN mp.winner_id != c.id AND mp.round_type = 'QUARTER_FINAL' THEN 2
+                ELSE 0
+            END) AS tournament_points
+        FROM classes c LEFT JOIN MatchParticipants mp ON c.id = mp.class_id GROUP BY c.id, c.name
+    ),
+    ParticipationPoints AS (
+        SELECT class_id, COUNT(DISTINCT sport_id) AS participation_points
+        FROM MatchParticipants WHERE result_details NOT LIKE '%Walkover%' GROUP BY class_id
+    ),
+    WinPoints AS (
+        SELECT winner_id as class_id, COUNT(id) as win_points
+        FROM matches
+        WHERE status = 'COMPLETED' AND result_details IS NOT NULL AND result_details != '' AND result_details NOT LIKE '%Walkover%'
+        GROUP BY winner_id
+    ),
+    AdjustmentPoints AS (
+        SELECT class_id, SUM(points) AS adjustment_points FROM point_adjustments GROUP BY class_id
+    )
+    SELECT
+        cs.class_id, cs.class_name, cs.played, cs.wins, cs.losses,
+        (IFNULL(cs.tournament_points, 0) + IFNULL(pp.participation_points, 0) + IFNULL(ap.adjustment_points, 0) + IFNULL(wp.win_points, 0)) AS total_points
+    FROM ClassStats cs
+    LEFT JOIN ParticipationPoints pp ON cs.class_id = pp.class_id
+    LEFT JOIN AdjustmentPoints ap ON cs.class_id = ap.class_id
+    LEFT JOIN WinPoints wp ON cs.class_id = wp.class_id
+    ORDER BY total_points DESC, cs.wins DESC
+"""
+
+# Ledger kinds, in the order the points log lists them.
+LEDGER_KINDS = ('TOURNAMENT', 'WIN', 'PARTICIPATION', 'ADJUSTMENT')
+
+# The completed matches of one class. Both halves are restricted to that
+# class, so the cost is proportional to the class's own matches rather than
+# to the whole tournament.
+_CLASS_MATCHES = """
+    ClassMatches AS (
+        SELECT m.id, m.sport_id, m.winner_id, m.result_details, replace(m.match_time, 'T', ' ') AS match_time, r.round_type
+        FROM matches m JOIN rounds r ON m.round_id = r.id
+        WHERE m.status = 'COMPLETED' AND m.class1_id = :class_id
+        UNION ALL
+        SELECT m.id, m.sport_id, m.winner_id, m.result_details, replace(m.match_time, 'T', ' ') AS match_time, r.round_type
+        FROM matches m JOIN rounds r ON m.round_id = r.id
+        WHERE m.status = 'COMPLETED' AND m.class2_id = :class_id
+    )
+"""
+
+# The fact a ledger row belongs to. Participation is one point per sport,
+# whichever match it is credited to.
+_LEDGER_FACT = """
+    kind, CASE kind WHEN 'PARTICIPATION' THEN sport_id WHEN 'ADJUSTMENT' THEN adjustment_id ELSE match_id END
+"""
+
+# Appends the ledger rows that bring one class's net points per fact in line
+# with the point rules: a new fact gets its points, a changed one the
+# difference and a removed one a row cancelling it. Participation is credited
+# to the class's first match in the sport (SQLite takes the bare columns from
+# the row holding the MIN), and the bare columns of each appended row come
+# from the expected entry when there is one (the row holding MAX(expected)).
+_APPEND_LEDGER_QUERY = f"""
+    INSERT INTO points_ledger (class_id, kind, points, match_id, sport_id, adjustment_id, occurred_at)
+    WITH {_CLASS_MATCHES},
+    Expected AS (
+        SELECT 'TOURNAMENT' AS kind, points, id AS match_id, sport_id, NULL AS adjustment_id, match_time AS occurred_at FROM (
+            SELECT id, sport_id, match_time, CASE
+                WHEN winner_id = :class_id AND round_type = 'FINAL' THEN 5
+                WHEN winner_id != :class_id AND round_type = 'FINAL' THEN 4
+                WHEN winner_id != :class_id AND round_type = 'SEMI_FINAL' THEN 3
+                WHEN winner_id != :class_id AND round_type = 'QUARTER_FINAL' THEN 2
+                ELSE 0
+            END AS points
+            FROM ClassMatches
+        ) WHERE points > 0
+        UNION ALL
+        SELECT 'WIN', 1, id, sport_id, NULL, match_time FROM ClassMatches
+        WHERE winner_id = :class_id
+          AND result_details IS NOT NULL AND result_details != '' AND result_details NOT LIKE '%Walkover%'
+        UNION ALL
+        SELECT 'PARTICIPATION', 1, id, sport_id, NULL, MIN(match_time) FROM ClassMatches
+        WHERE result_details NOT LIKE '%Walkover%'
+        GROUP BY sport_id
+        UNION ALL
+        SELECT 'ADJUSTMENT', points, NULL, NULL, id, created_at FROM point_adjustments
+        WHERE class_id = :class_id
+    ),
+    Changes AS (
+        SELECT kind, points, match_id, sport_id, adjustment_id, occurred_at, 1 AS expected FROM Expected
+        UNION ALL
+        SELECT kind, -points, match_id, sport_id, adjustment_id, occurred_at, 0 FROM points_ledger
+        WHERE class_id = :class_id
+    )
+    SELECT :class_id, kind, points, match_id, sport_id, adjustment_id, occurred_at FROM (
+        SELECT kind, SUM(points) AS points, match_id, sport_id, adjustment_id, occurred_at, MAX(expected)
+        FROM Changes
+        GROUP BY {_LEDGER_FACT}
+    ) WHERE points != 0
+"""
+
+# Recomputes the standings row for one class from its matches and ledger.
+_REFRESH_CLASS_QUERY = f"""
+    INSERT OR REPLACE INTO standings (
+        class_id, played, wins, losses,
+        tournament_points, participation_points, win_points, adjustment_points, total_points
+    )
+    WITH {_CLASS_MATCHES},
+    Results AS (
+        SELECT
+            COUNT(*) AS played,
+            IFNULL(SUM(CASE WHEN winner_id = :class_id THEN 1 ELSE 0 END), 0) AS wins,
+            IFNULL(SUM(CASE WHEN winner_id IS NOT NULL AND winner_id != :class_id THEN 1 ELSE 0 END), 0) AS losses
+        FROM ClassMatches
+    ),
+    Points AS (
+        SELECT
+            IFNULL(SUM(CASE WHEN kind = 'TOURNAMENT' THEN points END), 0) AS tournament_points,
+            IFNULL(SUM(CASE WHEN kind = 'PARTICIPATION' THEN points END), 0) AS participation_points,
+            IFNULL(SUM(CASE WHEN kind = 'WIN' THEN points END), 0) AS win_points,
+            IFNULL(SUM(CASE WHEN kind = 'ADJUSTMENT' THEN points END), 0) AS adjustment_points,
+            IFNULL(SUM(points), 0) AS total_points
+        FROM points_ledger WHERE class_id = :class_id
+    )
+    SELECT :class_id, played, wins, losses,
+           tournament_points, participation_points, win_points, adjustment_points, total_points
+    FROM Results, Points
+"""
+
+# A class's points log: the net points of each fact still in effect, taken
+# from its latest ledger row, with the names the entry refers to.
+_LEDGER_QUERY = f"""
+    WITH Entries AS (
+        SELECT class_id, kind, SUM(points) AS points, match_id, sport_id, adjustment_id, occurred_at, MAX(id) AS id
+        FROM points_ledger
+        WHERE class_id = ?
+        GROUP BY {_LEDGER_FACT}
+        HAVING SUM(points) != 0
+    )
+    SELECT l.kind, l.points, l.occurred_at, s.name AS sport_name, r.round_type, pa.reason,
+           CASE WHEN m.winner_id = l.class_id THEN 'Won' ELSE 'Lost' END AS outcome,
+           o.name AS opponent_name
+    FROM Entries l
+    LEFT JOIN sports s ON s.id = l.sport_id
+    LEFT JOIN matches m ON m.id = l.match_id
+    LEFT JOIN rounds r ON r.id = m.round_id
+    LEFT JOIN classes o ON o.id = CASE WHEN m.class1_id = l.class_id THEN m.class2_id ELSE m.class1_id END
+    LEFT JOIN point_adjustments pa ON pa.id = l.adjustment_id
+    ORDER BY l.occurred_at DESC, l.id DESC
+"""
+
+
+def refresh_standings(conn, *class_ids):
+    """
+    Appends the ledger corrections and recomputes the standings rows for the
+    given classes.
+    Call this before committing any write that changes a match result or an
+    adjustment, so the standings stay consistent with the source tables.
+    """
+    for class_id in {int(c) for c in class_ids if c is not None}:
+        conn.execute(_APPEND_LEDGER_QUERY, {'class_id': class_id})
+        conn.execute(_REFRESH_CLASS_QUERY, {'class_id': class_id})
+
+
+def refresh_match_standings(conn, match_id):
+    """Recomputes the standings of both classes taking part in a match."""
+    match = conn.execute('SELECT class1_id, class2_id FROM matches WHERE id = ?', (match_id,)).fetchone()
+    if match is not None:
+        refresh_standings(conn, match['class1_id'], match['class2_id'])
+
+
+def rebuild_standings(conn):
+    """
+    Recomputes the whole standings table from scratch, appending a correction
+    to the ledger for any fact it got wrong. Does not commit.
+    """
+    conn.execute('DELETE FROM standings')
+    class_ids = [row[0] for row in conn.execute('SELECT id FROM classes').fetchall()]
+    refresh_standings(conn, *class_ids)
+    return len(class_ids)
+
+
+def points_log(conn, class_id):
+    """Returns a class's ledger entries grouped by kind, newest first."""
+    log = {kind: [] for kind in LEDGER_KINDS}
+    for row in conn.execute(_LEDGER_QUERY, (class_id,)):
+        log[row['kind']].append(row)
+    return log
+
+
+def verify_standings(conn):
+    """
+    Compares the standings table against the reference leaderboard query.
+    Returns a list of (class_name, expected, actual) tuples for every class
+    whose materialized row disagrees; an empty list means they match.
+    """
+    stored = {
+        row['class_id']: row
+        for row in conn.execute('SELECT class_id, played, wins, losses, total_points FROM standings').fetchall()
+    }
+    mismatches = []
+    for expected in conn.execute(LEADERBOARD_QUERY).fetchall():
+        expected_values = (expected['played'], expected['wins'], expected['losses'], expected['total_points'])
+        actual = stored.get(expected['class_id'])
+        actual_values = None
+        if actual is not None:
+            actual_values = (actual['played'], actual['wins'], actual['losses'], actual['total_points'])
+        if actual_values != expected_values:
+            mismatches.append((expected['class_name'], expected_values, actual_values))
+    return mismatches
@@ -0,0 +1,22 @@
+"""
+Story text helpers.
+
+A story's list card only needs a short plain-text excerpt and a reading time,
+so both are computed once when the story is saved and stored next to it.
+"""
+import html
+import re
+
+EXCERPT_LENGTH = 150
+WORDS_PER_MINUTE = 200
+
+_TAG = re.compile(r'<[^>]+>')
+
+
+def summarize(content):
+    """Returns (excerpt, word_count, reading_minutes) for a story body, which may contain HTML."""
+    text = ' '.join(html.unescape(_TAG.sub(' ', content or '')).split())
+    word_count = len(text.split())
+    if len(text) > EXCERPT_LENGTH:
+        text = text[:EXCERPT_LENGTH].rsplit(' ', 1)[0].rstrip('.,;:') + '...'
+    return text, word_count, max(1, round(word_count / WORDS_PER_MINUTE))
@@ -0,0 +1,97 @@
+"""
+Content-addressed storage for uploaded files.
+
+Every upload is streamed to disk in chunks while its SHA-256 is computed, and
+stored as `<sha256><ext>`. Identical files share one copy, different files
+can never overwrite each other, and a stored file never changes, so it can be
+cached by browsers forever. The `uploads` table counts the rows that use each
+file (triggers keep it in step, see migration_016), and `collect_garbage`
+removes files nothing has referenced for a while.
+"""
+import hashlib
+import os
+import uuid
+
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 64 * 1024
+# Unreferenced uploads are kept this long, so a file stored by a form that
+# hasn't committed yet is never collected from under it.
+GC_GRACE_SECONDS = 3600
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest
+
+
+def store_upload(conn, file_storage, upload_folder, max_bytes, prepare=None):
+    """
+    Streams an upload into the store and returns its filename. Registers it
+    in `uploads` within the caller's transaction, which also holds the write
+    lock so a concurrent GC pass cannot remove the file before it is
+    referenced. Raises UploadTooLarge past `max_bytes`.
+
+    `prepare(path)` may rewrite the received file before it is named, and
+    returns True if it did.
+    """
+    ext = os.path.splitext(secure_filename(file_storage.filename))[1].lower()
+    tmp_path = os.path.join(upload_folder, f'.upload-{uuid.uuid4().hex}.tmp')
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(tmp_path, 'wb') as f:
+            while True:
+                chunk = file_storage.stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f'Uploads are limited to {max_bytes // (1024 * 1024)} MB.')
+                digest.update(chunk)
+                f.write(chunk)
+        if prepare is not None and prepare(tmp_path):
+            digest, size = _file_digest(tmp_path), os.path.getsize(tmp_path)
+        filename = digest.hexdigest() + ext
+        conn.execute("""
+            INSERT INTO uploads (filename, size) VALUES (?, ?)
+            ON CONFLICT (filename) DO UPDATE SET updated_at = CURRENT_TIMESTAMP
+        """, (filename, size))
+        # Same name means same bytes, so replacing an existing copy is harmless.
+        os.replace(tmp_path, os.path.join(upload_folder, filename))
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return filename
+
+
+def collect_garbage(conn, upload_folder, related_files=lambda filename: (), grace_seconds=GC_GRACE_SECONDS):
+    """
+    Deletes uploads that have had no references for `grace_seconds`, along
+    with the files `related_files(filename)` names (such as resized variants).
+    Commits. Returns the filenames removed.
+    """
+    conn.execute('BEGIN IMMEDIATE')
+    try:
+        filenames = [row[0] for row in conn.execute(
+            "SELECT filename FROM uploads WHERE ref_count <= 0 AND updated_at < datetime('now', ?)",
+            (f'-{grace_seconds} seconds',)
+        )]
+        for filename in filenames:
+            conn.execute('DELETE FROM uploads WHERE filename = ?', (filename,))
+            for name in (filename, *related_files(filename)):
+                path = os.path.join(upload_folder, name)
+                if os.path.exists(path):
+                    os.remove(path)
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    return filenames
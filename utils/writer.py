@@ -0,0 +1,148 @@
+"""
+Single writer for score events.
+
+Scoring requests don't write to the database themselves. They hand an
+operation (a function taking a connection) to the `ScoreWriter`, whose one
+thread runs every write of this process to score_log, matches, point
+adjustments and the standings. Only the standings rebuild, a maintenance
+action, and writes that touch none of these tables (rounds, stories, the
+team) still commit on the request's own connection. Operations that arrive
+within a few milliseconds of each other share one transaction, each inside
+its own SAVEPOINT so a failing operation is rolled back alone, and one COMMIT
+covers the whole group. Each request waits on a future that is resolved with
+its operation's result once the group has committed; an optional `on_commit`
+callback runs on the writer thread first, so updates published from it go out
+in commit order. `stats` counts the commits and operations, for the admin
+dashboard.
+
+Scorers therefore never contend with each other for SQLite's write lock, and
+three busy matches cost one commit per burst of taps instead of one per tap.
+"""
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from utils.db import open_connection
+
+logger = logging.getLogger(__name__)
+
+# Longest a request waits for its operation to be committed, in seconds.
+WRITE_TIMEOUT = 10
+
+
+class ScoreWriter:
+    def __init__(self, batch_window=0.005, max_batch=100, connect=open_connection):
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.connect = connect
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.operations = 0
+
+    def submit(self, operation, on_commit=None):
+        """
+        Queues `operation(conn)` and returns a Future for its result. The
+        operation runs inside the writer's transaction and must not commit.
+        `on_commit(result)` is called once the result is committed.
+        """
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='score-writer', daemon=True)
+                self._thread.start()
+            self._queue.put((operation, on_commit, future))
+        return future
+
+    def run(self, operation, on_commit=None, timeout=WRITE_TIMEOUT):
+        """
+        Submits an operation and waits until it is committed. Returns its
+        result or raises its error. If it is still queued after `timeout`
+        seconds it is cancelled, so a timed-out write never lands later and a
+        retry cannot apply it twice; one already being written is waited for.
+        """
+        future = self.submit(operation, on_commit)
+        try:
+            return future.result(timeout)
+        except FutureTimeout:
+            if future.cancel():
+                raise
+            return future.result()
+
+    def stats(self):
+        return {'batches': self.batches, 'operations': self.operations,
+                'pending': self._queue.qsize()}
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.batch_window
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            conn = self.connect()
+        except Exception as e:
+            logger.exception("Score writer could not open its database connection")
+            self._stop(e)
+            return
+        # Transactions are managed explicitly below.
+        conn.isolation_level = None
+        while True:
+            batch = [item for item in self._next_batch() if item[2].set_running_or_notify_cancel()]
+            if batch:
+                self._write(conn, batch)
+
+    def _stop(self, error):
+        """Fails every queued operation and lets the next `submit` start a new writer thread."""
+        with self._lock:
+            self._thread = None
+            while True:
+                try:
+                    _, _, future = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(error)
+
+    def _write(self, conn, batch):
+        results = []
+        try:
+            conn.execute('BEGIN IMMEDIATE')
+            for operation, _, _ in batch:
+                conn.execute('SAVEPOINT operation')
+                try:
+                    results.append((operation(conn), None))
+                    conn.execute('RELEASE operation')
+                except Exception as e:
+                    conn.execute('ROLLBACK TO operation')
+                    conn.execute('RELEASE operation')
+                    results.append((None, e))
+            conn.execute('COMMIT')
+        except Exception as e:
+            logger.exception("Score writer batch of %d operations failed", len(batch))
+            if conn.in_transaction:
+                conn.execute('ROLLBACK')
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.operations += len(batch)
+        for (_, on_commit, future), (result, error) in zip(batch, results):
+            if error is not None:
+                future.set_exception(error)
+                continue
+            if on_commit is not None:
+                try:
+                    on_commit(result)
+                except Exception:
+                    logger.exception("Score writer on_commit callback failed")
+            future.set_result(result)